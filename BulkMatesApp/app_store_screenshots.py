@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+BulkMates App Store Screenshot Compositor
+Frames the simulator captures in images/raw/ and adds the headline text
+
+images/screenshots.json lists each screenshot (raw capture, headline,
+subheadline) plus shared defaults for the background gradient, fonts and
+device placement; any default can be overridden per screenshot. Sizes in the
+spec are pixels on the 1290px-wide 6.7" canvas and scale with the width for
+other devices. The gradient comes from icon_gradient.py, and the device frame
+is drawn procedurally (a bezel with rounded screen corners and a soft shadow).
+
+Every screenshot is rendered for every device size in a process pool; fonts,
+frames and gradients are cached in each worker, so they are built once per
+size rather than once per image. Outputs are keyed in the icon build cache
+by their layout, the raw capture's contents and this script, so changing
+one caption rebuilds only that screenshot.
+
+Usage:
+    python3 app_store_screenshots.py
+    python3 app_store_screenshots.py --device iphone-6.7 --force
+"""
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+import argparse
+import json
+import os
+import time
+
+from create_icon_improved import hex_to_rgb
+from icon_build_cache import BuildCache, build_key, file_digest
+from icon_encoder import DEFAULT_PRESET, PRESETS
+from icon_gradient import create_gradient
+from icon_resize import IconResult, print_summary, run_parallel, save_png_atomic
+
+SPEC_PATH = '../images/screenshots.json'
+
+# App Store screenshot sizes; the first is written to images/final/ itself,
+# the others to a subfolder named after the device
+DEVICES = OrderedDict([
+    ('iphone-6.7', (1290, 2796)),
+    ('iphone-6.5', (1242, 2688)),
+    ('iphone-5.5', (1242, 2208)),
+])
+
+# Canvas width the spec's pixel values refer to
+REFERENCE_WIDTH = 1290
+
+# Device frame proportions, relative to the frame width
+BEZEL_FRACTION = 0.03
+CORNER_FRACTION = 0.13
+SHADOW_FRACTION = 0.04
+
+# image: bezel and shadow (RGBA), screen_box: where the capture goes inside
+# it, screen_mask: the rounded screen shape, origin: frame corner in the image
+DeviceFrame = namedtuple('DeviceFrame', ['image', 'screen_box', 'screen_mask', 'origin'])
+
+def load_spec(path=SPEC_PATH):
+    """Read the spec and return its screenshots with the defaults applied"""
+    with open(path) as f:
+        spec = json.load(f)
+    defaults = spec.get('defaults', {})
+    screenshots = []
+    for entry in spec['screenshots']:
+        if 'name' not in entry or 'raw' not in entry:
+            raise ValueError(f"Every screenshot needs a 'name' and a 'raw' capture: {entry}")
+        layout = merge_layout(defaults, entry)
+        for key in ('headline', 'subheadline'):
+            # "headline": "text" is short for the default style with that text
+            if isinstance(layout.get(key), str):
+                layout[key] = dict(defaults.get(key, {}), text=layout[key])
+        screenshots.append(layout)
+    return screenshots
+
+def merge_layout(defaults, entry):
+    """Apply a screenshot's overrides to the defaults (nested dicts merge key by key)"""
+    layout = dict(defaults)
+    for key, value in entry.items():
+        if isinstance(value, dict) and isinstance(layout.get(key), dict):
+            layout[key] = dict(layout[key], **value)
+        else:
+            layout[key] = value
+    return layout
+
+@lru_cache(maxsize=32)
+def load_font(candidates, size):
+    """The first of the candidate font files that loads, else Pillow's default font"""
+    for candidate in candidates:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size)
+
+@lru_cache(maxsize=8)
+def gradient_background(size, stops, angle):
+    return create_gradient(size, [hex_to_rgb(color) for color in stops], angle=angle)
+
+@lru_cache(maxsize=8)
+def device_frame(frame_width, screen_height, bezel_color):
+    """Draw a device frame around a screen of the given height (4x supersampled)"""
+    bezel = round(frame_width * BEZEL_FRACTION)
+    frame_height = screen_height + 2 * bezel
+    shadow = round(frame_width * SHADOW_FRACTION)
+    radius = frame_width * CORNER_FRACTION
+
+    ss = 4
+    outer = Image.new('L', (frame_width * ss, frame_height * ss), 0)
+    ImageDraw.Draw(outer).rounded_rectangle([0, 0, frame_width * ss - 1, frame_height * ss - 1],
+                                            radius * ss, fill=255)
+    outer = outer.reduce(ss)
+    screen = Image.new('L', ((frame_width - 2 * bezel) * ss, screen_height * ss), 0)
+    ImageDraw.Draw(screen).rounded_rectangle([0, 0, screen.width - 1, screen.height - 1],
+                                             (radius - bezel) * ss, fill=255)
+    screen = screen.reduce(ss)
+
+    image = Image.new('RGBA', (frame_width + 2 * shadow, frame_height + 2 * shadow), (0, 0, 0, 0))
+    shadow_mask = Image.new('L', image.size, 0)
+    shadow_mask.paste(outer.point(lambda value: value * 45 // 100), (shadow, shadow + shadow // 2))
+    image.putalpha(shadow_mask.filter(ImageFilter.GaussianBlur(shadow / 2)))
+    image.paste(hex_to_rgb(bezel_color), (shadow, shadow), outer)
+    return DeviceFrame(image, (shadow + bezel, shadow + bezel, shadow + frame_width - bezel,
+                               shadow + bezel + screen_height), screen, (shadow, shadow))
+
+def wrap_text(draw, text, font, max_width):
+    """Greedy word wrap to lines no wider than max_width"""
+    lines = []
+    for word in text.split():
+        if lines and draw.textlength(f'{lines[-1]} {word}', font=font) <= max_width:
+            lines[-1] = f'{lines[-1]} {word}'
+        else:
+            lines.append(word)
+    return lines
+
+def draw_text_block(draw, text, style, top, width, margin, scale):
+    """Draw centered, wrapped text starting at `top`; returns the y below it"""
+    font = load_font(tuple(style['font']), round(style['size'] * scale))
+    line_height = round(style['size'] * scale * 1.2)
+    for line in wrap_text(draw, text, font, width - 2 * margin):
+        draw.text((width / 2, top), line, font=font, fill=hex_to_rgb(style['color']), anchor='ma')
+        top += line_height
+    return top
+
+def compose_screenshot(layout, size, raw_path):
+    """Render one screenshot at a device size"""
+    width, height = size
+    scale = width / REFERENCE_WIDTH
+    background = layout['background']
+    img = gradient_background(size, tuple(background['stops']), background.get('angle', 135)).copy()
+
+    draw = ImageDraw.Draw(img)
+    margin = round(layout['side_margin'] * scale)
+    top = round(layout['text_top'] * scale)
+    top = draw_text_block(draw, layout['headline']['text'], layout['headline'], top, width, margin,
+                          scale)
+    if layout.get('subheadline'):
+        top += round(layout['subheadline']['size'] * scale * 0.6)
+        top = draw_text_block(draw, layout['subheadline']['text'], layout['subheadline'], top,
+                              width, margin, scale)
+
+    # The device sits below the text and may run off the bottom edge
+    device = layout['device']
+    frame_width = round(width * device['width'])
+    raw = Image.open(raw_path).convert('RGB')
+    screen_width = frame_width - 2 * round(frame_width * BEZEL_FRACTION)
+    screen_height = round(screen_width * raw.height / raw.width)
+    frame = device_frame(frame_width, screen_height, device['bezel'])
+    left = (width - frame_width) // 2 - frame.origin[0]
+    frame_top = top + round(device['gap'] * scale) - frame.origin[1]
+
+    img.paste(frame.image, (left, frame_top), frame.image)
+    screen_left, screen_top = left + frame.screen_box[0], frame_top + frame.screen_box[1]
+    img.paste(raw.resize(frame.screen_mask.size, Image.Resampling.LANCZOS), (screen_left, screen_top),
+              frame.screen_mask)
+    return img
+
+def _compose_task(layout, size, raw_path, output_path, preset):
+    start = time.perf_counter()
+    img = compose_screenshot(layout, size, raw_path)
+    written, encode_seconds = save_png_atomic(img, output_path, preset)
+    return IconResult(output_path, size[1], written, time.perf_counter() - start, encode_seconds)
+
+def output_path(final_dir, device, name):
+    if device == next(iter(DEVICES)):
+        return os.path.join(final_dir, f'{name}_final.png')
+    return os.path.join(final_dir, device, f'{name}_final.png')
+
+def render_screenshots(spec_path=SPEC_PATH, devices=None, preset=DEFAULT_PRESET, force=False,
+                       max_workers=None):
+    """Render every screenshot for every device, skipping outputs that are up to date"""
+    spec_dir = os.path.dirname(os.path.abspath(spec_path))
+    final_dir = os.path.join(spec_dir, 'final')
+    compositor = file_digest(os.path.abspath(__file__))
+
+    cache = BuildCache(force=force)
+    jobs, keys, missing = [], {}, []
+    for layout in load_spec(spec_path):
+        raw_path = os.path.join(spec_dir, layout['raw'])
+        if not os.path.exists(raw_path):
+            missing.append(raw_path)
+            continue
+        raw_digest = file_digest(raw_path)
+        for device in devices or DEVICES:
+            size = DEVICES[device]
+            path = output_path(final_dir, device, layout['name'])
+            keys[path] = build_key({'layout': layout, 'raw': raw_digest}, list(size),
+                                   mode='screenshot', compositor=compositor)
+            if not cache.is_fresh(path, keys[path]):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                jobs.append((layout, size, raw_path, path, preset))
+
+    for raw_path in missing:
+        print(f"⚠️  Missing capture {os.path.relpath(raw_path)}; skipped")
+    start = time.perf_counter()
+    results, workers = run_parallel(_compose_task, jobs, max_workers) if jobs else ([], 0)
+    for result in results:
+        cache.record(result.path, keys[result.path])
+    cache.save()
+    cache.print_report()
+    if results:
+        print_summary(results, time.perf_counter() - start, workers, root=final_dir,
+                      noun='screenshots')
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compose App Store screenshots from simulator captures")
+    parser.add_argument('--spec', default=SPEC_PATH, help=f"layout spec (default: {SPEC_PATH})")
+    parser.add_argument('--device', action='append', choices=list(DEVICES),
+                        help="render only this device size (repeatable; default: all)")
+    parser.add_argument('--png-preset', choices=PRESETS, default=DEFAULT_PRESET,
+                        help="PNG encoder preset: fast, balanced or smallest (default: balanced)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: all cores)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild every screenshot even if the build cache says it is up to date")
+    args = parser.parse_args()
+
+    print(f"📱 Composing App Store screenshots from {args.spec}")
+    render_screenshots(args.spec, args.device, args.png_preset, args.force, args.workers)
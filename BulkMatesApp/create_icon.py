@@ -7,22 +7,7 @@ Creates a 1024x1024px iOS app icon with "Circle of Friends" design
 from PIL import Image, ImageDraw, ImageFont
 import math
 
-def create_gradient_background(size, color_start, color_end):
-    """Create a diagonal gradient from top-left to bottom-right"""
-    base = Image.new('RGB', size, color_start)
-    top = Image.new('RGB', size, color_end)
-    mask = Image.new('L', size)
-    mask_data = []
-
-    for y in range(size[1]):
-        for x in range(size[0]):
-            # Diagonal gradient (135 degrees)
-            distance = (x + y) / (size[0] + size[1])
-            mask_data.append(int(255 * distance))
-
-    mask.putdata(mask_data)
-    base.paste(top, (0, 0), mask)
-    return base
+from icon_gradient import create_gradient_background
 
 def draw_circle_with_shadow(draw, center, radius, fill_color, shadow_offset=(0, 8), shadow_blur=24):
     """Draw a circle with a drop shadow effect"""
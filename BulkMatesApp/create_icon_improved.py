@@ -2,223 +2,258 @@
 """
 BulkMates App Icon Generator - IMPROVED VERSION
 Creates a 1024x1024px iOS app icon with clear person silhouettes
+
+The design is defined on a 1024px canvas and scales to any output size:
+    python3 create_icon_improved.py --size 180 --supersample 4
+    python3 create_icon_improved.py --size 4096 --memory-budget 512
 """
 
-from PIL import Image, ImageDraw
-import math
-
-def create_gradient_background(size, color_start, color_end):
-    """Create a diagonal gradient from top-left to bottom-right at 135 degrees"""
-    base = Image.new('RGB', size, color_start)
-    top = Image.new('RGB', size, color_end)
-    mask = Image.new('L', size)
-    mask_data = []
-
-    for y in range(size[1]):
-        for x in range(size[0]):
-            # Diagonal gradient (135 degrees)
-            distance = (x + y) / (size[0] + size[1])
-            mask_data.append(int(255 * distance))
-
-    mask.putdata(mask_data)
-    base.paste(top, (0, 0), mask)
-    return base
-
-def draw_shadow(draw, center, radius, shadow_offset=(0, 10), shadow_blur=30, shadow_opacity=0.3):
-    """Draw a soft shadow for a circle"""
-    x, y = center
-    for i in range(shadow_blur, 0, -2):
-        alpha = int(255 * shadow_opacity * (1 - i / shadow_blur))
-        shadow_x = x + shadow_offset[0]
-        shadow_y = y + shadow_offset[1]
-        shadow_color = (0, 0, 0, alpha)
-
-        # Draw on RGBA layer
-        return shadow_color, shadow_x, shadow_y, i
-
-def draw_checkmark(draw, center, width, height, color, stroke_width):
-    """Draw a bold checkmark symbol"""
-    x, y = center
-
-    # Checkmark shape - two lines forming a check
-    # Adjusted for better visibility
-
-    # Starting point (left side)
-    start_x = x - width * 0.4
-    start_y = y
-
-    # Middle point (bottom of checkmark)
-    mid_x = x - width * 0.1
-    mid_y = y + height * 0.3
-
-    # End point (top right)
-    end_x = x + width * 0.4
-    end_y = y - height * 0.3
-
-    # Draw the two lines with thick stroke
-    draw.line([(start_x, start_y), (mid_x, mid_y)], fill=color, width=stroke_width, joint='curve')
-    draw.line([(mid_x, mid_y), (end_x, end_y)], fill=color, width=stroke_width, joint='curve')
-
-def draw_person_silhouette(draw, center, circle_radius, color):
-    """
-    Draw a clear, recognizable person silhouette
-    - Circle for head
-    - Rounded trapezoid for shoulders/body
-    """
-    x, y = center
-
-    # HEAD - White circle
-    head_radius = 17.5  # 35px diameter
-    head_center_y = y - circle_radius * 0.25  # Position in upper part of circle
-
-    draw.ellipse(
-        [x - head_radius, head_center_y - head_radius,
-         x + head_radius, head_center_y + head_radius],
-        fill=color
-    )
-
-    # SHOULDERS/BODY - Rounded trapezoid shape
-    # Create a trapezoid that's wider at bottom (shoulders)
-
-    body_top_y = head_center_y + head_radius + 3  # Small gap below head
-    body_height = 45
-    body_top_width = 22.5  # 45px total width at top
-    body_bottom_width = 32.5  # 65px total width at bottom
-
-    # Create trapezoid points
-    # Top-left, top-right, bottom-right, bottom-left
-    body_points = [
-        (x - body_top_width, body_top_y),  # Top-left
-        (x + body_top_width, body_top_y),  # Top-right
-        (x + body_bottom_width, body_top_y + body_height),  # Bottom-right
-        (x - body_bottom_width, body_top_y + body_height),  # Bottom-left
-    ]
-
-    # Draw filled polygon for body
-    draw.polygon(body_points, fill=color)
-
-    # Add rounded corners by drawing circles at the corners
-    corner_radius = 8
-    # Top corners
-    draw.ellipse([x - body_top_width - corner_radius, body_top_y - corner_radius,
-                  x - body_top_width + corner_radius, body_top_y + corner_radius], fill=color)
-    draw.ellipse([x + body_top_width - corner_radius, body_top_y - corner_radius,
-                  x + body_top_width + corner_radius, body_top_y + corner_radius], fill=color)
-    # Bottom corners
-    draw.ellipse([x - body_bottom_width - corner_radius, body_top_y + body_height - corner_radius,
-                  x - body_bottom_width + corner_radius, body_top_y + body_height + corner_radius], fill=color)
-    draw.ellipse([x + body_bottom_width - corner_radius, body_top_y + body_height - corner_radius,
-                  x + body_bottom_width + corner_radius, body_top_y + body_height + corner_radius], fill=color)
+import argparse
+import multiprocessing
+
+from icon_build_cache import BuildCache, build_key
+from icon_profile import add_profile_arguments, profile_stage, profiler_from_args, report
+from icon_resize import save_master_raw
+from icon_scene import compile_scene, render_plan, scene_geometry, scene_plan
+from icon_sdf import BACKENDS
 
 def hex_to_rgb(hex_color):
     """Convert hex color to RGB tuple"""
     hex_color = hex_color.lstrip('#')
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
-def create_bulkmates_icon_improved():
-    """Create the improved BulkMates app icon with larger, clearer elements"""
-    # Canvas size
-    size = (1024, 1024)
-    center = (512, 512)
-
-    # Colors
-    gradient_start = hex_to_rgb('#4CAF50')  # Green
-    gradient_end = hex_to_rgb('#2196F3')    # Blue
-    white = (255, 255, 255)
-    checkmark_green = hex_to_rgb('#4CAF50')
-
+# Design of the improved icon, in pixels on the 1024px reference canvas
+ICON_DESIGN = {
+    'gradient_start': '#4CAF50',    # Green
+    'gradient_end': '#2196F3',      # Blue
+    'silhouette_color': '#FFFFFF',
+    'center_color': '#FFFFFF',
+    'checkmark_color': '#4CAF50',
     # Person circle colors and angles
-    person_data = [
-        (hex_to_rgb('#FF9800'), -90),   # Orange (12 o'clock)
-        (hex_to_rgb('#9C27B0'), -30),   # Purple (2 o'clock)
-        (hex_to_rgb('#FFE66D'), 30),    # Yellow (4 o'clock)
-        (hex_to_rgb('#FF6B6B'), 90),    # Coral (6 o'clock)
-        (hex_to_rgb('#4ECDC4'), 150),   # Teal (8 o'clock)
-        (hex_to_rgb('#95E1D3'), 210),   # Mint green (10 o'clock)
-    ]
-
-    # Create base image with gradient
-    img = create_gradient_background(size, gradient_start, gradient_end)
-
-    # Create RGBA layer for shadows
-    shadow_layer = Image.new('RGBA', size, (0, 0, 0, 0))
-    shadow_draw = ImageDraw.Draw(shadow_layer, 'RGBA')
-
-    # Main drawing context
-    draw = ImageDraw.Draw(img)
-
-    # DRAW PERSON CIRCLES with shadows
-    person_radius = 70  # 140px diameter
-    circle_radius = 320  # Distance from center
-
-    for color, angle in person_data:
-        # Calculate position
-        angle_rad = math.radians(angle)
-        person_x = int(center[0] + circle_radius * math.cos(angle_rad))
-        person_y = int(center[1] + circle_radius * math.sin(angle_rad))
-
-        # Draw shadow on shadow layer
-        shadow_blur = 20
-        shadow_offset_y = 6
-        for j in range(shadow_blur, 0, -1):
-            alpha = int(64 * (1 - j / shadow_blur))  # 0.25 opacity max
-            shadow_draw.ellipse(
-                [person_x - person_radius - j//2,
-                 person_y - person_radius - j//2 + shadow_offset_y,
-                 person_x + person_radius + j//2,
-                 person_y + person_radius + j//2 + shadow_offset_y],
-                fill=(0, 0, 0, alpha)
-            )
-
-        # Draw colored circle
-        draw.ellipse(
-            [person_x - person_radius, person_y - person_radius,
-             person_x + person_radius, person_y + person_radius],
-            fill=color
-        )
-
-        # Draw person silhouette inside
-        draw_person_silhouette(draw, (person_x, person_y), person_radius, white)
-
-    # Composite shadow layer
-    img = Image.alpha_composite(img.convert('RGBA'), shadow_layer).convert('RGB')
-    draw = ImageDraw.Draw(img)
-
-    # Create shadow layer for center circle
-    center_shadow_layer = Image.new('RGBA', size, (0, 0, 0, 0))
-    center_shadow_draw = ImageDraw.Draw(center_shadow_layer, 'RGBA')
-
-    # DRAW CENTER WHITE CIRCLE shadow
-    center_radius = 100  # 200px diameter
-    shadow_blur = 30
-    shadow_offset_y = 10
-    for j in range(shadow_blur, 0, -1):
-        alpha = int(77 * (1 - j / shadow_blur))  # 0.3 opacity max
-        center_shadow_draw.ellipse(
-            [center[0] - center_radius - j//2,
-             center[1] - center_radius - j//2 + shadow_offset_y,
-             center[0] + center_radius + j//2,
-             center[1] + center_radius + j//2 + shadow_offset_y],
-            fill=(0, 0, 0, alpha)
-        )
-
-    # Composite center shadow
-    img = Image.alpha_composite(img.convert('RGBA'), center_shadow_layer).convert('RGB')
-    draw = ImageDraw.Draw(img)
-
-    # Draw center white circle
-    draw.ellipse(
-        [center[0] - center_radius, center[1] - center_radius,
-         center[0] + center_radius, center[1] + center_radius],
-        fill=white
-    )
-
-    # Draw bold checkmark in center
-    draw_checkmark(draw, center, 120, 100, checkmark_green, 18)
-
-    return img
+    'person_data': [
+        ('#FF9800', -90),   # Orange (12 o'clock)
+        ('#9C27B0', -30),   # Purple (2 o'clock)
+        ('#FFE66D', 30),    # Yellow (4 o'clock)
+        ('#FF6B6B', 90),    # Coral (6 o'clock)
+        ('#4ECDC4', 150),   # Teal (8 o'clock)
+        ('#95E1D3', 210),   # Mint green (10 o'clock)
+    ],
+    'person_radius': 70,            # 140px diameter
+    'circle_radius': 320,           # Distance from center
+    'silhouette_scale': 1.0,        # Head/body size relative to the 1024px design
+    'person_shadow_blur': 20,
+    'person_shadow_offset': 6,
+    'person_shadow_opacity': 0.25,
+    'center_radius': 100,           # 200px diameter
+    'center_shadow_blur': 30,
+    'center_shadow_offset': 10,
+    'center_shadow_opacity': 0.3,
+    'checkmark_width': 120,
+    'checkmark_height': 100,
+    'checkmark_stroke': 18,
+}
+
+REFERENCE_SIZE = 1024
+
+# ICON_DESIGN entries that only change colors; every other entry (and the
+# angles in person_data) changes geometry
+COLOR_KEYS = ('gradient_start', 'gradient_end', 'silhouette_color', 'center_color', 'checkmark_color')
+
+# Per-size hinting: multipliers applied to ICON_DESIGN entries when rendering
+# at exactly that output size, to keep small icons legible
+SIZE_HINTS = {
+    76: {'checkmark_stroke': 1.4, 'silhouette_scale': 1.1},
+}
+
+def size_hints(size):
+    """Return the hinting overrides for an output size"""
+    return SIZE_HINTS.get(size, {})
+
+def design_geometry(design):
+    """The hashable, color-independent part of a design"""
+    return (tuple(sorted((key, value) for key, value in design.items()
+                         if key not in COLOR_KEYS and key != 'person_data')),
+            tuple(angle for _, angle in design['person_data']))
+
+def design_scene(design):
+    """Describe a design as an icon scene (see icon_scene.py)"""
+    paints = {key: design[key] for key in COLOR_KEYS}
+    person_paints = []
+    for index, (color, _) in enumerate(design['person_data'], start=1):
+        paints[f'person_{index}'] = color
+        person_paints.append(f'person_{index}')
+
+    center = [REFERENCE_SIZE // 2, REFERENCE_SIZE // 2]
+    ring = {'center': center, 'radius': design['circle_radius'],
+            'angles': [angle for _, angle in design['person_data']]}
+    return {
+        'name': 'improved',
+        'size': REFERENCE_SIZE,
+        'paints': paints,
+        'background': {'gradient': ['gradient_start', 'gradient_end'], 'angle': 135},
+        'nodes': [
+            # Person circles with a person silhouette inside
+            {'ring': ring, 'paints': person_paints, 'children': [
+                {'circle': {'radius': design['person_radius']}, 'fill': '$paint',
+                 'stage': 'person_circles'},
+                {'silhouette': {'radius': design['person_radius'], 'scale': design['silhouette_scale']},
+                 'fill': 'silhouette_color', 'stage': 'person_circles'},
+            ]},
+            # Person shadows, composited over the circles like the original
+            # full-canvas shadow layer
+            {'ring': ring, 'children': [
+                {'shadow': {'radius': design['person_radius'], 'blur': design['person_shadow_blur'],
+                            'offset': [0, design['person_shadow_offset']],
+                            'opacity': design['person_shadow_opacity']},
+                 'stage': 'person_shadows'},
+            ]},
+            {'shadow': {'radius': design['center_radius'], 'blur': design['center_shadow_blur'],
+                        'offset': [0, design['center_shadow_offset']],
+                        'opacity': design['center_shadow_opacity']},
+             'at': center, 'stage': 'center_shadow'},
+            {'circle': {'radius': design['center_radius']}, 'at': center, 'fill': 'center_color',
+             'stage': 'center_circle'},
+            {'checkmark': {'width': design['checkmark_width'], 'height': design['checkmark_height'],
+                           'stroke': design['checkmark_stroke']},
+             'at': center, 'fill': 'checkmark_color', 'stage': 'checkmark'},
+        ],
+    }
+
+def create_bulkmates_icon_improved(size=REFERENCE_SIZE, supersample=1, hints=None, flatten=True,
+                                   backend='pillow', design=None, rows=None, background=True):
+    """
+    Create the improved BulkMates app icon with larger, clearer elements
+
+    Every geometric parameter is scaled from the 1024px design, and the icon is
+    drawn natively at `size` x `supersample` before a box-filter reduction to
+    `size`. `hints` overrides the per-size hinting from SIZE_HINTS, and
+    `design` replaces ICON_DESIGN (e.g. with a color variant).
+
+    The design is described as a scene (design_scene) whose draw plan is
+    compiled once per geometry by scene_plan; rendering fills the plan's
+    masks with the design's colors on a single RGBA working surface, and
+    shadows are composited only inside their own bounding boxes. The surface
+    is flattened to RGB at the end unless `flatten` is False.
+
+    `backend` picks the rasterizer for circles, silhouettes and the checkmark:
+    'pillow' (ImageDraw, aliased unless supersampled) or 'sdf' (anti-aliased
+    signed distance fields, see icon_sdf.py).
+
+    With `rows`, only that (top, bottom) band of output rows is rendered:
+    gradient, shapes and shadows are clipped to the band and the result is
+    identical to the same rows of a full render (see icon_tiles.py).
+
+    With `background` False the gradient is left out and the shapes and
+    shadows are drawn on a transparent surface, which is returned as RGBA
+    (the foreground layer of an Android adaptive icon, see icon_export.py).
+    """
+    design = dict(ICON_DESIGN if design is None else design)
+    for key, factor in (size_hints(size) if hints is None else hints).items():
+        design[key] = design[key] * factor
+
+    # Canvas size, and the band of canvas rows being drawn
+    canvas = size * supersample
+    band = (rows[0] * supersample, rows[1] * supersample) if rows is not None else None
+
+    scene = design_scene(design)
+    with profile_stage('layers'):
+        if band is None:
+            plan = scene_plan(canvas, scene_geometry(scene), backend)
+        else:
+            plan = compile_scene(scene, canvas, backend, band)
+
+    # Gradient, then the person circles and silhouettes, their shadows, the
+    # center circle's shadow, the center circle and the checkmark
+    img = render_plan(plan, scene['paints'], band, background)
+
+    if supersample > 1:
+        with profile_stage('supersample_reduce'):
+            img = img.reduce(supersample)
+
+    if not flatten or not background:
+        return img
+    with profile_stage('flatten'):
+        return img.convert('RGB')
+
+def _memory_probe(queue, size, supersample, backend):
+    """Render once in a fresh process and report tracemalloc and RSS peaks"""
+    import resource
+    import tracemalloc
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    create_bulkmates_icon_improved(size, supersample, backend=backend)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux
+    queue.put({
+        'traced_peak_mb': traced_peak / 2**20,
+        'baseline_rss_mb': baseline_rss / 1024,
+        'peak_rss_mb': peak_rss / 1024,
+    })
+
+def measure_render_memory(size=REFERENCE_SIZE, supersample=1, backend='pillow'):
+    """
+    Measure the peak memory of one render in a separate process
+
+    tracemalloc only sees Python and NumPy allocations, so the report also
+    includes the child's peak RSS, which covers Pillow's image buffers.
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    probe = context.Process(target=_memory_probe, args=(queue, size, supersample, backend))
+    probe.start()
+    report = queue.get()
+    probe.join()
+    return report
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Create the improved BulkMates app icon")
+    parser.add_argument('--size', type=int, default=REFERENCE_SIZE,
+                        help="output size in pixels (default: 1024)")
+    parser.add_argument('--supersample', type=int,
+                        help="render at N times the output size and reduce (default: 1; with "
+                             "--watch, 4 with the pillow backend and 1 with sdf)")
+    parser.add_argument('--backend', choices=BACKENDS, default='pillow',
+                        help="rasterizer: pillow, or sdf for anti-aliasing without supersampling "
+                             "(default: pillow)")
+    parser.add_argument('--force', action='store_true',
+                        help="render even if the build cache says the output is up to date")
+    parser.add_argument('--raw', metavar='PATH',
+                        help="also save the icon as a memory-mappable .npy buffer for later resizes")
+    add_profile_arguments(parser)
+    parser.add_argument('--watch', nargs='?', const='icon_design.json', metavar='PARAMS',
+                        help="re-render every size into icon-preview/ whenever the design "
+                             "parameters file changes (default file: icon_design.json)")
+    parser.add_argument('--memory-report', action='store_true',
+                        help="report the peak memory of one render instead of saving the icon")
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help="fail if the peak RSS of one render exceeds this many megabytes")
+    args = parser.parse_args()
+
+    if args.watch:
+        from icon_watch import watch
+        try:
+            watch(args.watch, args.supersample, args.backend)
+        except KeyboardInterrupt:
+            print()
+        raise SystemExit(0)
+    args.supersample = args.supersample or 1
+
+    if args.memory_report or args.memory_budget:
+        memory = measure_render_memory(args.size, args.supersample, args.backend)
+        print(f"🧠 Peak memory for one {args.size}px render (supersample {args.supersample}x):")
+        print(f"   tracemalloc peak:  {memory['traced_peak_mb']:8.1f} MB")
+        print(f"   RSS before render: {memory['baseline_rss_mb']:8.1f} MB")
+        print(f"   RSS peak:          {memory['peak_rss_mb']:8.1f} MB")
+        if args.memory_budget and memory['peak_rss_mb'] > args.memory_budget:
+            print(f"❌ Peak RSS exceeds the {args.memory_budget:.0f} MB budget")
+            raise SystemExit(1)
+        if args.memory_budget:
+            print(f"✅ Within the {args.memory_budget:.0f} MB budget")
+        raise SystemExit(0)
+
     print("Creating improved BulkMates app icon...")
     print("Improvements:")
     print("  - Larger person circles (140px diameter)")
@@ -228,12 +263,33 @@ if __name__ == '__main__':
     print("  - Better shadows and spacing")
     print()
 
-    icon = create_bulkmates_icon_improved()
-
-    # Save the icon
-    output_path = 'BulkMatesIcon-1024-Improved.png'
-    icon.save(output_path, 'PNG')
+    output_path = f'BulkMatesIcon-{args.size}-Improved.png'
+    cache = BuildCache(force=args.force)
+    key = build_key(ICON_DESIGN, args.size, supersample=args.supersample, master=True,
+                    backend=args.backend)
+    if not args.raw and not args.profile and cache.is_fresh(output_path, key):
+        print(f"✅ Icon is up to date: {output_path} (use --force to re-render)")
+        raise SystemExit(0)
+
+    profiler = profiler_from_args(args)
+    if profiler:
+        with profiler:
+            with profile_stage('render', size=args.size):
+                icon = create_bulkmates_icon_improved(args.size, args.supersample, backend=args.backend)
+            with profile_stage('encode', file=output_path):
+                icon.save(output_path, 'PNG')
+        report(profiler, args)
+    else:
+        icon = create_bulkmates_icon_improved(args.size, args.supersample, backend=args.backend)
+
+        # Save the icon (no metadata, so identical renders give identical bytes)
+        icon.save(output_path, 'PNG')
+    cache.record(output_path, key)
+    cache.save()
     print(f"✅ Icon created successfully: {output_path}")
+    if args.raw:
+        save_master_raw(icon, args.raw)
+        print(f"   Raw buffer: {args.raw}")
     print(f"   Size: {icon.size}")
     print(f"   Format: PNG (no transparency)")
     print()
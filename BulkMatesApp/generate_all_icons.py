@@ -1,32 +1,23 @@
 #!/usr/bin/env python3
 """
 Generate all required iOS app icon sizes from the 1024x1024 master icon
+
+The sizes are read from AppIcon.appiconset/Contents.json.
 """
 
-from PIL import Image
+import argparse
 import os
+import time
+
+from icon_catalog import APPICON_DIR, catalog_targets, dedupe_targets
+from icon_encoder import DEFAULT_PRESET, PRESETS
+from icon_resize import copy_outputs, print_summary, resize_all
 
-def resize_icon(source_path, output_path, size):
-    """Resize icon to specified size with high-quality resampling"""
-    img = Image.open(source_path)
-    img_resized = img.resize((size, size), Image.Resampling.LANCZOS)
-    img_resized.save(output_path, 'PNG', optimize=True)
-    print(f"✅ Created {output_path} ({size}x{size})")
+DEFAULT_SOURCE = 'BulkMatesIcon-1024.png'
 
-def generate_all_icon_sizes():
+def generate_all_icon_sizes(preset=DEFAULT_PRESET, source_icon=DEFAULT_SOURCE):
     """Generate all required iOS icon sizes"""
-    source_icon = 'BulkMatesIcon-1024.png'
-    output_dir = 'BulkMatesApp/Assets.xcassets/AppIcon.appiconset'
-
-    # Icon sizes required by iOS (from Contents.json)
-    icon_sizes = {
-        'app-icon-1024.png': 1024,      # App Store
-        'app-icon-60@2x.png': 120,      # iPhone App Icon (60pt @2x)
-        'app-icon-60@3x.png': 180,      # iPhone App Icon (60pt @3x)
-        'app-icon-76.png': 76,          # iPad App Icon (76pt @1x)
-        'app-icon-76@2x.png': 152,      # iPad App Icon (76pt @2x)
-        'app-icon-83.5@2x.png': 167,    # iPad Pro App Icon (83.5pt @2x)
-    }
+    output_dir = APPICON_DIR
 
     print(f"Generating all icon sizes from {source_icon}...")
     print(f"Output directory: {output_dir}\n")
@@ -39,21 +30,29 @@ def generate_all_icon_sizes():
         print(f"❌ Error: Output directory not found: {output_dir}")
         return False
 
-    # Generate all sizes
-    for filename, size in icon_sizes.items():
-        output_path = os.path.join(output_dir, filename)
-        try:
-            resize_icon(source_icon, output_path, size)
-        except Exception as e:
-            print(f"❌ Error creating {filename}: {e}")
-            return False
-
-    print(f"\n✅ All icon sizes generated successfully!")
-    print(f"   Total icons created: {len(icon_sizes)}")
+    # Generate all sizes - the master is decoded once and shared by the workers,
+    # and slots with the same pixel size share one resize
+    targets, copies = dedupe_targets(catalog_targets(output_dir))
+    start = time.perf_counter()
+    try:
+        results, workers = resize_all(source_icon, targets, preset=preset)
+        results += copy_outputs(results, copies)
+    except Exception as e:
+        print(f"❌ Error creating icons: {e}")
+        return False
+
+    print_summary(results, time.perf_counter() - start, workers)
     return True
 
 if __name__ == '__main__':
-    success = generate_all_icon_sizes()
+    parser = argparse.ArgumentParser(description="Generate all iOS icon sizes from the master icon")
+    parser.add_argument('--png-preset', choices=PRESETS, default=DEFAULT_PRESET,
+                        help="PNG encoder preset: fast, balanced or smallest (default: balanced)")
+    parser.add_argument('--source', default=DEFAULT_SOURCE,
+                        help=f"1024x1024 master icon to resize (default: {DEFAULT_SOURCE})")
+    args = parser.parse_args()
+
+    success = generate_all_icon_sizes(args.png_preset, args.source)
     if success:
         print("\n📱 Next steps:")
         print("   1. Open Xcode")
@@ -61,3 +60,4 @@ if __name__ == '__main__':
         print("   3. The icon will appear on the home screen and in the App Store")
     else:
         print("\n❌ Icon generation failed. Please check the errors above.")
+        raise SystemExit(1)
@@ -1,82 +1,200 @@
 #!/usr/bin/env python3
 """
-Generate all required iOS app icon sizes from the improved 1024x1024 master icon
+Generate all required iOS app icon sizes for the improved icon
+
+Each size is rendered natively with supersampling by default. Pass
+--master-in-memory to render the 1024x1024 master in this process and resize
+it without a PNG round-trip, or --from-master to resize a master that is
+already on disk (PNG, or a raw .npy buffer that is memory-mapped instead of
+decoded).
+
+With --backend sdf the icons are anti-aliased analytically, so native
+rendering defaults to no supersampling.
+
+The sizes come from AppIcon.appiconset/Contents.json; --add-slot adds a slot
+there (e.g. iphone:40x40@2x) and renders it.
+
+The splash icon is rendered at @1x/@2x/@3x of the size the app displays it
+at, within a byte budget per file (see icon_splash.py).
 """
 
-from PIL import Image
+from contextlib import nullcontext
+import argparse
 import os
+import time
+
+from create_icon_improved import ICON_DESIGN, create_bulkmates_icon_improved, size_hints
+from icon_build_cache import BuildCache, build_key, file_digest
+from icon_catalog import APPICON_DIR, catalog_targets, dedupe_targets, update_catalog
+from icon_encoder import DEFAULT_PRESET, PRESETS
+from icon_profile import add_profile_arguments, profile_stage, profiler_from_args, report
+from icon_resize import (IconResult, copy_outputs, print_summary, resize_all, run_parallel,
+                         save_master_raw, save_png_atomic)
+from icon_sdf import BACKENDS
+from icon_splash import DEFAULT_BUDGET, SPLASH_POINTS, SPLASH_SCALES, print_splash_report, render_splash
+
+DEFAULT_MASTER = 'BulkMatesIcon-1024-Improved.png'
+
+
+def render_icon(output_path, size, supersample, preset=DEFAULT_PRESET, backend='pillow'):
+    """Render the icon directly at the target size and write it atomically"""
+    start = time.perf_counter()
+    with profile_stage('render', size=size):
+        icon = create_bulkmates_icon_improved(size, supersample, backend=backend)
+    written, encode_seconds = save_png_atomic(icon, output_path, preset)
+    return IconResult(output_path, size, written, time.perf_counter() - start, encode_seconds)
+
+def generate_all_icon_sizes(from_master=None, supersample=4, force=False,
+                            master_in_memory=False, raw_master_path=None, preset=DEFAULT_PRESET,
+                            backend='pillow', splash_points=SPLASH_POINTS,
+                            splash_budget=DEFAULT_BUDGET):
+    """
+    Generate all required iOS icon sizes, skipping outputs that are already up to date
+
+    The sizes are read from AppIcon.appiconset/Contents.json. Outputs with the
+    same pixel size are rendered once and copied.
+
+    `from_master` is the path of a master icon to resize instead of rendering.
+    With `master_in_memory` the master is rendered here and handed to the
+    resize stage directly; `raw_master_path` also persists it as .npy.
+    `preset` selects the PNG encoder preset (fast, balanced or smallest) and
+    `backend` the rasterizer (pillow or sdf).
 
-def resize_icon(source_path, output_path, size):
-    """Resize icon to specified size with high-quality resampling"""
-    img = Image.open(source_path)
-    img_resized = img.resize((size, size), Image.Resampling.LANCZOS)
-    img_resized.save(output_path, 'PNG', optimize=True)
-    print(f"✅ Created {os.path.basename(output_path)} ({size}x{size})")
-
-def generate_all_icon_sizes():
-    """Generate all required iOS icon sizes"""
-    source_icon = 'BulkMatesIcon-1024-Improved.png'
-    output_dir = 'BulkMatesApp/Assets.xcassets/AppIcon.appiconset'
-    splash_output_dir = 'BulkMatesApp/Assets.xcassets/SplashIcon.imageset'
-
-    # Icon sizes required by iOS
-    icon_sizes = {
-        'app-icon-1024.png': 1024,      # App Store
-        'app-icon-60@2x.png': 120,      # iPhone App Icon (60pt @2x)
-        'app-icon-60@3x.png': 180,      # iPhone App Icon (60pt @3x)
-        'app-icon-76.png': 76,          # iPad App Icon (76pt @1x)
-        'app-icon-76@2x.png': 152,      # iPad App Icon (76pt @2x)
-        'app-icon-83.5@2x.png': 167,    # iPad Pro App Icon (83.5pt @2x)
-    }
-
-    print(f"Generating all icon sizes from improved master icon...")
-    print(f"Source: {source_icon}")
+    The splash icon is rendered natively for every scale of `splash_points`,
+    and the run fails if a file cannot be brought under `splash_budget` bytes.
+    """
+    source_icon = from_master
+    output_dir = APPICON_DIR
+
+    if from_master:
+        print(f"Generating all icon sizes from improved master icon...")
+        print(f"Source: {source_icon}")
+    elif master_in_memory:
+        print(f"Rendering the 1024x1024 master in memory and resizing it...")
+    else:
+        print(f"Rendering all icon sizes natively ({supersample}x supersampling, {backend} backend)...")
     print()
 
-    if not os.path.exists(source_icon):
+    if from_master and not os.path.exists(source_icon):
         print(f"❌ Error: Source icon not found: {source_icon}")
         return False
 
-    # Generate AppIcon sizes
-    print("📱 Generating AppIcon.appiconset sizes:")
-    for filename, size in icon_sizes.items():
-        output_path = os.path.join(output_dir, filename)
-        try:
-            resize_icon(source_icon, output_path, size)
-        except Exception as e:
-            print(f"❌ Error creating {filename}: {e}")
-            return False
+    targets = catalog_targets(output_dir)
 
-    print()
+    # Only rebuild outputs whose render inputs changed
+    cache = BuildCache(force=force)
+    source_digest = file_digest(source_icon) if from_master else None
+    keys = {}
+    for path, size in targets:
+        if from_master:
+            keys[path] = build_key({'source': source_digest}, size, mode='from-master',
+                                   preset=preset)
+        elif master_in_memory:
+            keys[path] = build_key(ICON_DESIGN, size, mode='in-memory-master', preset=preset,
+                                   backend=backend)
+        else:
+            keys[path] = build_key(ICON_DESIGN, size, supersample=supersample,
+                                   hints=size_hints(size), preset=preset, backend=backend)
+    stale, copies = dedupe_targets([(path, size) for path, size in targets
+                                    if not cache.is_fresh(path, keys[path])])
 
-    # Generate SplashIcon (for displaying in app)
-    print("🖼️  Generating SplashIcon.imageset:")
-    splash_path = os.path.join(splash_output_dir, 'splash-icon.png')
+    start = time.perf_counter()
+    results, workers = [], 0
     try:
-        resize_icon(source_icon, splash_path, 1024)  # Use full resolution for splash
+        if stale and from_master:
+            results, workers = resize_all(source_icon, stale, preset=preset)
+        elif master_in_memory and (stale or raw_master_path):
+            with profile_stage('render', size=1024):
+                master = create_bulkmates_icon_improved(backend=backend)
+            if raw_master_path:
+                save_master_raw(master, raw_master_path)
+                print(f"💾 Saved raw master: {raw_master_path}")
+            if stale:
+                results, workers = resize_all(master, stale, preset=preset)
+        elif stale:
+            results, workers = run_parallel(render_icon, [(path, size, supersample, preset, backend)
+                                                          for path, size in stale])
+        results += copy_outputs(results, copies)
+        # Same cache, so the splash records land in the manifest saved below
+        splash = render_splash(cache, splash_points, SPLASH_SCALES, splash_budget,
+                               supersample=supersample, backend=backend)
     except Exception as e:
-        print(f"❌ Error creating splash icon: {e}")
+        print(f"❌ Error creating icons: {e}")
         return False
 
-    print()
-    print(f"✅ All icon sizes generated successfully!")
-    print(f"   Total icons created: {len(icon_sizes) + 1}")
+    for result in results:
+        cache.record(result.path, keys[result.path])
+    cache.save()
+
+    cache.print_report()
+    if results:
+        print_summary(results, time.perf_counter() - start, workers)
+    else:
+        print("✅ All icons are up to date")
+    print_splash_report(splash, splash_budget, splash_points)
     print()
     print("📸 Icon sizes generated:")
-    print("   - 1024x1024 (App Store)")
-    print("   - 180x180 (iPhone 3x)")
-    print("   - 120x120 (iPhone 2x)")
-    print("   - 167x167 (iPad Pro)")
-    print("   - 152x152 (iPad 2x)")
-    print("   - 76x76 (iPad 1x)")
+    for path, size in targets:
+        print(f"   - {size}x{size} ({os.path.basename(path)})")
     print()
     print("🎯 Updated locations:")
     print("   - BulkMatesApp/Assets.xcassets/AppIcon.appiconset/")
     print("   - BulkMatesApp/Assets.xcassets/SplashIcon.imageset/")
+    if not all(result.within_budget for result in splash):
+        print(f"❌ Some splash files exceed the {splash_budget:,} byte budget")
+        return False
     return True
 
 if __name__ == '__main__':
-    success = generate_all_icon_sizes()
+    parser = argparse.ArgumentParser(description="Generate all iOS icon sizes for the improved icon")
+    parser.add_argument('--from-master', nargs='?', const=DEFAULT_MASTER, metavar='PATH',
+                        help="resize a master icon (PNG or raw .npy) instead of rendering each size "
+                             f"(default: {DEFAULT_MASTER})")
+    parser.add_argument('--master-in-memory', action='store_true',
+                        help="render the 1024 master in this process and resize it without writing a PNG")
+    parser.add_argument('--save-master-raw', metavar='PATH',
+                        help="with --master-in-memory, also save the master as a memory-mappable .npy")
+    parser.add_argument('--supersample', type=int,
+                        help="supersampling factor for native rendering "
+                             "(default: 4 with the pillow backend, 1 with sdf)")
+    parser.add_argument('--backend', choices=BACKENDS, default='pillow',
+                        help="rasterizer for native rendering: pillow or sdf (default: pillow)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild every output even if the build cache says it is up to date")
+    parser.add_argument('--png-preset', choices=PRESETS, default=DEFAULT_PRESET,
+                        help="PNG encoder preset: fast, balanced or smallest (default: balanced)")
+    parser.add_argument('--add-slot', action='append', default=[], metavar='IDIOM:WxH@Nx',
+                        help="add a slot to AppIcon's Contents.json first, e.g. iphone:40x40@2x")
+    parser.add_argument('--splash-points', type=float, default=SPLASH_POINTS,
+                        help="largest size the app displays the splash icon at, in points "
+                             f"(default: {SPLASH_POINTS})")
+    parser.add_argument('--splash-budget', type=int, default=DEFAULT_BUDGET,
+                        help=f"byte budget per splash file (default: {DEFAULT_BUDGET})")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.save_master_raw and not args.master_in_memory:
+        parser.error("--save-master-raw requires --master-in-memory")
+    if args.supersample is None:
+        args.supersample = 1 if args.backend == 'sdf' else 4
+
+    # Requested slots are added and unnamed slots get a filename before generating
+    added, written = update_catalog(APPICON_DIR, args.add_slot)
+    for spec in added:
+        print(f"➕ Added slot {spec}")
+    if written:
+        print(f"💾 Updated {APPICON_DIR}/Contents.json")
+
+    # Profiled runs stay in one process and ignore the build cache so every stage is traced
+    profiler = profiler_from_args(args)
+    with profiler or nullcontext():
+        success = generate_all_icon_sizes(args.from_master, args.supersample,
+                                          args.force or profiler is not None,
+                                          args.master_in_memory, args.save_master_raw,
+                                          args.png_preset, args.backend, args.splash_points,
+                                          args.splash_budget)
+    if profiler:
+        report(profiler, args)
     if success:
         print()
         print("═" * 70)
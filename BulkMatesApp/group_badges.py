@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+BulkMates Group Badge Generator
+Renders round group badges in the icon's style: one person circle per member
+
+A badge is the app icon with 1 to 12 member circles spaced evenly around
+the center checkmark, starting at 12 o'clock, each in the member's color.
+The icon's 70px circles on its 320px ring fit up to 11 members; for 12 the
+circles, silhouettes and shadows shrink together to keep a gap between
+neighbours.
+
+Badges are read from a CSV file (an `id` and a `colors` column, colors
+separated by spaces or semicolons) or a JSONL file (one {"id", "colors"}
+object per line). Either may also set the icon's color entries
+(gradient_start, gradient_end, silhouette_color, center_color,
+checkmark_color) per badge.
+
+Rendering runs in a process pool, in batches of badges with the same member
+count. The draw plans (scene_plan), shadow sprites and gradient masks are
+cached per member count and size in each worker, so after the first badge of
+a batch every badge costs only filling the masks with its colors,
+compositing and PNG encoding.
+
+Usage:
+    python3 group_badges.py badges.csv --output group-badges
+    python3 group_badges.py --make-sample 20000 badges.jsonl
+    python3 group_badges.py badges.jsonl --size 128 --backend pillow --supersample 4
+"""
+
+from PIL import Image
+from collections import Counter, namedtuple
+from functools import lru_cache
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import re
+import time
+
+from create_icon_improved import COLOR_KEYS, ICON_DESIGN, create_bulkmates_icon_improved
+from icon_encoder import PRESETS
+from icon_resize import IconResult, run_parallel, save_png_atomic
+from icon_sdf import BACKENDS, drawing_context
+
+DEFAULT_OUTPUT = 'group-badges'
+DEFAULT_SIZE = 256
+
+MAX_MEMBERS = 12
+
+# Smallest gap between neighbouring member circles, on the 1024px design
+MEMBER_GAP = 40
+
+# Badges rendered per worker task; each batch has a single member count
+BATCH_SIZE = 250
+
+SHAPES = ('circle', 'square')
+
+# colors: one hex color per member, overrides: ICON_DESIGN color entries
+Badge = namedtuple('Badge', ['id', 'colors', 'overrides'])
+
+BADGE_ID = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+HEX_COLOR = re.compile(r'^#[0-9A-Fa-f]{6}$')
+
+def badge_layout(count):
+    """(angles, person_radius, circle_radius) for `count` members on the 1024px design"""
+    if not 1 <= count <= MAX_MEMBERS:
+        raise ValueError(f"A badge needs 1 to {MAX_MEMBERS} members, not {count}")
+    circle_radius = ICON_DESIGN['circle_radius']
+    person_radius = ICON_DESIGN['person_radius']
+    if count > 1:
+        # Distance between neighbouring centers on the ring
+        chord = 2 * circle_radius * math.sin(math.pi / count)
+        person_radius = min(person_radius, (chord - MEMBER_GAP) / 2)
+    angles = [-90 + 360 * index / count for index in range(count)]
+    return angles, person_radius, circle_radius
+
+def badge_design(colors, overrides=None):
+    """ICON_DESIGN with one person circle per member color, laid out by badge_layout"""
+    angles, person_radius, circle_radius = badge_layout(len(colors))
+    design = dict(ICON_DESIGN, **(overrides or {}))
+    shrink = person_radius / ICON_DESIGN['person_radius']
+    design.update({
+        'person_data': list(zip(colors, angles)),
+        'person_radius': person_radius,
+        'circle_radius': circle_radius,
+        'silhouette_scale': ICON_DESIGN['silhouette_scale'] * shrink,
+        'person_shadow_blur': ICON_DESIGN['person_shadow_blur'] * shrink,
+        'person_shadow_offset': ICON_DESIGN['person_shadow_offset'] * shrink,
+    })
+    return design
+
+@lru_cache(maxsize=8)
+def badge_mask(size):
+    """Anti-aliased circle covering a size x size badge (cached per size)"""
+    mask = Image.new('L', (size, size), 0)
+    drawing_context(mask, 'sdf').ellipse([0, 0, size, size], fill=255)
+    return mask
+
+def render_badge(colors, size=DEFAULT_SIZE, supersample=1, backend='sdf', shape='circle',
+                 overrides=None):
+    """Render one badge; circles are returned as RGBA, squares as RGB"""
+    img = create_bulkmates_icon_improved(size, supersample, backend=backend,
+                                         design=badge_design(colors, overrides))
+    if shape == 'circle':
+        img.putalpha(badge_mask(size))
+    return img
+
+def _parse_colors(value):
+    if isinstance(value, str):
+        value = value.replace(';', ' ').split()
+    return list(value)
+
+def _badge(row, where):
+    """Validate one input row and turn it into a Badge"""
+    if not isinstance(row, dict):
+        raise ValueError(f"{where}: expected an object with id and colors, not {type(row).__name__}")
+    badge_id = str(row.get('id') or '').strip()
+    if not BADGE_ID.match(badge_id):
+        raise ValueError(f"{where}: badge id must be letters, digits, '.', '_' or '-': {badge_id!r}")
+    colors = _parse_colors(row.get('colors') or [])
+    overrides = {}
+    for key, value in row.items():
+        if key in ('id', 'colors') or value in (None, ''):
+            continue
+        if key not in COLOR_KEYS:
+            raise ValueError(f"{where}: unknown column '{key}' (expected id, colors or one of "
+                             f"{', '.join(COLOR_KEYS)})")
+        overrides[key] = value
+    for color in colors + list(overrides.values()):
+        if not isinstance(color, str) or not HEX_COLOR.match(color):
+            raise ValueError(f"{where}: colors must look like #RRGGBB: {color!r}")
+    if not 1 <= len(colors) <= MAX_MEMBERS:
+        raise ValueError(f"{where}: a badge needs 1 to {MAX_MEMBERS} member colors, not {len(colors)}")
+    return Badge(badge_id, tuple(colors), overrides)
+
+def load_badges(path):
+    """Read badges from a .csv or .jsonl file"""
+    badges = []
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                badges.append(_badge(row, f'{path}:{line}'))
+        else:
+            for line, text in enumerate(f, start=1):
+                if text.strip():
+                    badges.append(_badge(json.loads(text), f'{path}:{line}'))
+    ids = Counter(badge.id for badge in badges)
+    duplicates = [badge_id for badge_id, seen in ids.items() if seen > 1]
+    if duplicates:
+        raise ValueError(f"{path}: duplicate badge ids: {', '.join(sorted(duplicates)[:5])}")
+    return badges
+
+def write_sample_badges(path, count, seed=0):
+    """Write `count` random badges as JSONL (member colors drawn from the icon's palette)"""
+    palette = [color for color, _ in ICON_DESIGN['person_data']]
+    rng = random.Random(seed)
+    with open(path, 'w') as f:
+        for index in range(count):
+            members = rng.randint(1, MAX_MEMBERS)
+            colors = [rng.choice(palette) for _ in range(members)]
+            f.write(json.dumps({'id': f'group-{index:06d}', 'colors': colors}) + '\n')
+
+def _render_batch(badges, size, supersample, backend, shape, output_dir, preset):
+    results = []
+    for badge in badges:
+        start = time.perf_counter()
+        img = render_badge(badge.colors, size, supersample, backend, shape, badge.overrides)
+        path = os.path.join(output_dir, f'{badge.id}.png')
+        written, encode_seconds = save_png_atomic(img, path, preset)
+        results.append(IconResult(path, size, written, time.perf_counter() - start, encode_seconds))
+    return results
+
+def batches(badges, batch_size=BATCH_SIZE):
+    """Split badges into batches that each hold a single member count"""
+    by_count = {}
+    for badge in badges:
+        by_count.setdefault(len(badge.colors), []).append(badge)
+    jobs = []
+    for count in sorted(by_count):
+        group = by_count[count]
+        jobs += [group[start:start + batch_size] for start in range(0, len(group), batch_size)]
+    return jobs
+
+def render_badges(badges, output_dir=DEFAULT_OUTPUT, size=DEFAULT_SIZE, supersample=1,
+                  backend='sdf', shape='circle', preset='fast', max_workers=None):
+    """Render every badge across worker processes; returns (results, workers)"""
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(batch, size, supersample, backend, shape, output_dir, preset)
+            for batch in batches(badges)]
+    if not jobs:
+        return [], 0
+    batch_results, workers = run_parallel(_render_batch, jobs, max_workers)
+    return [result for batch in batch_results for result in batch], workers
+
+def print_badge_summary(results, elapsed, workers):
+    total_bytes = sum(result.bytes for result in results)
+    rate = len(results) / elapsed if elapsed else 0.0
+    print(f"✅ Wrote {len(results)} badges in {elapsed:.2f}s using {workers} "
+          f"worker{'s' if workers != 1 else ''} ({rate:.0f} badges/s, "
+          f"{total_bytes / 1024:.1f} KB total)")
+    if results:
+        encode = sum(result.encode_seconds for result in results)
+        render = sum(result.seconds for result in results) - encode
+        print(f"   per badge: render {render / len(results) * 1000:.2f}ms, "
+              f"encode {encode / len(results) * 1000:.2f}ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render group badges from a CSV or JSONL file")
+    parser.add_argument('input', help="badges file (.csv with id,colors columns, or .jsonl)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help=f"folder for the badge PNGs (default: {DEFAULT_OUTPUT})")
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE,
+                        help=f"badge size in pixels (default: {DEFAULT_SIZE})")
+    parser.add_argument('--shape', choices=SHAPES, default='circle',
+                        help="circle (transparent corners) or square (default: circle)")
+    parser.add_argument('--backend', choices=BACKENDS, default='sdf',
+                        help="rasterizer: sdf or pillow (default: sdf)")
+    parser.add_argument('--supersample', type=int,
+                        help="supersampling factor (default: 1 with the sdf backend, 4 with pillow)")
+    parser.add_argument('--png-preset', choices=PRESETS, default='fast',
+                        help="PNG encoder preset: fast, balanced or smallest (default: fast)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: all cores)")
+    parser.add_argument('--make-sample', type=int, metavar='COUNT',
+                        help="write COUNT random badges to the input file instead of rendering")
+    args = parser.parse_args()
+
+    if args.make_sample:
+        write_sample_badges(args.input, args.make_sample)
+        print(f"📝 Wrote {args.make_sample} sample badges to {args.input}")
+        raise SystemExit(0)
+
+    try:
+        badges = load_badges(args.input)
+    except ValueError as e:
+        parser.error(str(e))
+    supersample = args.supersample or (1 if args.backend == 'sdf' else 4)
+    print(f"🏷️  Rendering {len(badges)} group badges at {args.size}px into {args.output}/")
+    start = time.perf_counter()
+    results, workers = render_badges(badges, args.output, args.size, supersample, args.backend,
+                                     args.shape, args.png_preset, args.workers)
+    print_badge_summary(results, time.perf_counter() - start, workers)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+BulkMates Icon Pipeline Benchmarks
+Times every stage of both icon generators at several canvas sizes
+
+Stages are benchmarked for the original design (create_icon.py) and the
+improved design (create_icon_improved.py) so the two can be compared.
+Results are written as JSON; --compare fails when any stage got slower than
+a stored baseline by more than the threshold.
+
+Usage:
+    python3 icon_benchmarks.py --output bench.json
+    python3 icon_benchmarks.py --save-baseline icon-bench-baseline.json
+    python3 icon_benchmarks.py --compare icon-bench-baseline.json --threshold 0.2
+"""
+
+from PIL import Image, ImageDraw
+import PIL
+import argparse
+import datetime
+import json
+import math
+import numpy as np
+import platform
+import statistics
+import sys
+import time
+
+import create_icon
+import create_icon_improved
+from icon_encoder import encode_png
+from icon_gradient import cached_gradient_mask, create_gradient_background
+from icon_resize import pyramid_resize
+from icon_scene import scene_plan
+from icon_shadow import ShadowSpec, shadow_sprite, stamp_shadow
+from icon_shapes import draw_checkmark, draw_person_silhouette
+
+DEFAULT_SIZES = [1024, 2048, 4096]
+
+# Output sizes produced from the master by the resize stage
+RESIZE_TARGETS = [1024, 180, 167, 152, 120, 76]
+
+GREEN = (0x4C, 0xAF, 0x50)
+BLUE = (0x21, 0x96, 0xF3)
+WHITE = (255, 255, 255)
+
+def _person_centers(size, scale):
+    """Person circle centers of the improved layout on a size x size canvas"""
+    center = size / 2
+    radius = create_icon_improved.ICON_DESIGN['circle_radius'] * scale
+    return [(int(center + radius * math.cos(math.radians(angle))),
+             int(center + radius * math.sin(math.radians(angle))))
+            for _, angle in create_icon_improved.ICON_DESIGN['person_data']]
+
+# Each stage is set up outside the timed region: setup(size) returns the callable to time.
+
+def _improved_gradient(size):
+    return lambda: create_gradient_background((size, size), GREEN, BLUE, image_mode='RGBA')
+
+def _improved_shadow_sprites(size):
+    scale = size / 1024
+    specs = [ShadowSpec(70 * scale, 20 * scale, (0, 6 * scale), 0.25),
+             ShadowSpec(100 * scale, 30 * scale, (0, 10 * scale), 0.3)]
+
+    def build():
+        shadow_sprite.cache_clear()
+        for spec in specs:
+            shadow_sprite(spec)
+    return build
+
+def _improved_shadow_composite(size):
+    scale = size / 1024
+    surface = Image.new('RGBA', (size, size), GREEN + (255,))
+    person_shadow = ShadowSpec(70 * scale, 20 * scale, (0, 6 * scale), 0.25)
+    center_shadow = ShadowSpec(100 * scale, 30 * scale, (0, 10 * scale), 0.3)
+    centers = _person_centers(size, scale)
+    shadow_sprite(person_shadow)
+    shadow_sprite(center_shadow)
+
+    def composite():
+        for center in centers:
+            stamp_shadow(surface, center, person_shadow)
+        stamp_shadow(surface, (size / 2, size / 2), center_shadow)
+    return composite
+
+def _improved_silhouettes(size):
+    scale = size / 1024
+    surface = Image.new('RGBA', (size, size), GREEN + (255,))
+    draw = ImageDraw.Draw(surface)
+    centers = _person_centers(size, scale)
+
+    def silhouettes():
+        for center in centers:
+            draw_person_silhouette(draw, center, 70 * scale, WHITE, scale)
+    return silhouettes
+
+def _improved_checkmark(size):
+    scale = size / 1024
+    surface = Image.new('RGBA', (size, size), WHITE + (255,))
+    draw = ImageDraw.Draw(surface)
+    stroke = max(1, round(18 * scale))
+    return lambda: draw_checkmark(draw, (size / 2, size / 2), 120 * scale, 100 * scale, GREEN, stroke)
+
+def _cold_render(size, backend):
+    def render():
+        # Draw plans, shadow sprites and gradient masks are cached across renders;
+        # clearing them times plan compilation and rasterization, not just the fill
+        scene_plan.cache_clear()
+        shadow_sprite.cache_clear()
+        cached_gradient_mask.cache_clear()
+        create_icon_improved.create_bulkmates_icon_improved(size, backend=backend)
+    return render
+
+def _improved_render(size):
+    return _cold_render(size, 'pillow')
+
+def _improved_render_sdf(size):
+    return _cold_render(size, 'sdf')
+
+def _improved_render_warm(size):
+    # Repeat renders of one geometry (variants, badges) only fill and composite
+    return lambda: create_icon_improved.create_bulkmates_icon_improved(size)
+
+def _improved_resize(size):
+    master = create_icon_improved.create_bulkmates_icon_improved(size)
+    return lambda: [master.resize((target, target), Image.Resampling.LANCZOS)
+                    for target in RESIZE_TARGETS]
+
+def _improved_resize_pyramid(size):
+    master = create_icon_improved.create_bulkmates_icon_improved(size)
+    return lambda: [pyramid_resize(master, target) for target in RESIZE_TARGETS]
+
+def _improved_encode(size):
+    master = create_icon_improved.create_bulkmates_icon_improved(size)
+    return lambda: encode_png(master, 'balanced')
+
+def _original_gradient(size):
+    return lambda: create_icon.create_gradient_background((size, size), GREEN, BLUE)
+
+def _original_person_icons(size):
+    scale = size / 1024
+    surface = Image.new('RGB', (size, size), GREEN)
+    draw = ImageDraw.Draw(surface)
+    centers = _person_centers(size, scale)
+    return lambda: [create_icon.draw_person_icon(draw, center, 60 * scale * 1.2, WHITE)
+                    for center in centers]
+
+def _original_checkmark(size):
+    scale = size / 1024
+    surface = Image.new('RGB', (size, size), WHITE)
+    draw = ImageDraw.Draw(surface)
+    stroke = max(1, round(16 * scale))
+    return lambda: create_icon.draw_checkmark(draw, (size / 2, size / 2), 100 * scale, GREEN, stroke)
+
+def _original_render(size):
+    # The original generator only draws at 1024 px
+    if size != 1024:
+        return None
+    return create_icon.create_bulkmates_icon
+
+STAGES = [
+    ('improved', 'gradient', _improved_gradient),
+    ('improved', 'shadow_sprites', _improved_shadow_sprites),
+    ('improved', 'shadow_composite', _improved_shadow_composite),
+    ('improved', 'silhouettes', _improved_silhouettes),
+    ('improved', 'checkmark', _improved_checkmark),
+    ('improved', 'render', _improved_render),
+    ('improved', 'render_sdf', _improved_render_sdf),
+    ('improved', 'render_warm', _improved_render_warm),
+    ('improved', 'resize', _improved_resize),
+    ('improved', 'resize_pyramid', _improved_resize_pyramid),
+    ('improved', 'encode', _improved_encode),
+    ('original', 'gradient', _original_gradient),
+    ('original', 'person_icons', _original_person_icons),
+    ('original', 'checkmark', _original_checkmark),
+    ('original', 'render', _original_render),
+]
+
+def time_stage(func, repeat):
+    """Run `func` once to warm up, then `repeat` timed runs; returns timings in ms"""
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=3, stage_filter=None):
+    """Benchmark every stage at every size and return the results document"""
+    results = {}
+    for size in sizes:
+        for variant, stage, setup in STAGES:
+            name = f"{variant}/{stage}@{size}"
+            if stage_filter and not any(pattern in name for pattern in stage_filter):
+                continue
+            func = setup(size)
+            if func is None:
+                continue
+            timings = time_stage(func, repeat)
+            results[name] = {
+                'min_ms': round(min(timings), 3),
+                'median_ms': round(statistics.median(timings), 3),
+                'repeat': repeat,
+            }
+            print(f"   {name:<36} min {min(timings):9.2f}ms   "
+                  f"median {statistics.median(timings):9.2f}ms")
+
+    return {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+def compare_results(current, baseline, threshold):
+    """Print the change per stage; return the names of stages slower than the threshold allows"""
+    regressions = []
+    print()
+    print(f"📊 Comparison against baseline (threshold +{threshold:.0%})")
+    for name, result in current['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            print(f"   {name:<36} (new stage, no baseline)")
+            continue
+        change = result['min_ms'] / reference['min_ms'] - 1 if reference['min_ms'] else 0.0
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"   {name:<36} {reference['min_ms']:9.2f}ms → {result['min_ms']:9.2f}ms "
+              f"({change:+6.1%}) {'❌' if regressed else '✅'}")
+    return regressions
+
+def _write_json(document, path):
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the icon pipeline")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="canvas sizes to benchmark (default: 1024 2048 4096)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per stage (default: 3)")
+    parser.add_argument('--stage', action='append', metavar='PATTERN',
+                        help="only run stages whose name contains PATTERN (repeatable)")
+    parser.add_argument('--output', metavar='PATH', help="write the results as JSON")
+    parser.add_argument('--save-baseline', metavar='PATH', help="write the results as the new baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare against a stored baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="allowed slowdown before --compare fails (default: 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    print(f"⏱️  Benchmarking icon pipeline at {', '.join(f'{s}px' for s in args.sizes)}")
+    document = run_benchmarks(args.sizes, args.repeat, args.stage)
+
+    if args.output:
+        _write_json(document, args.output)
+        print(f"\n💾 Results written to {args.output}")
+    if args.save_baseline:
+        _write_json(document, args.save_baseline)
+        print(f"\n💾 Baseline written to {args.save_baseline}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(document, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} stage(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ No regressions")
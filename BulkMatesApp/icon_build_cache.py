@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+BulkMates Icon Build Cache
+Skips icon outputs whose render inputs have not changed since the last build
+
+Every output is keyed by a hash of its render parameters (design constants,
+size, supersampling, ...) and of the generator code itself. The manifest
+remembers the key and the hash of the file that was written; an output is
+only rebuilt when its key changes or the file on disk no longer matches.
+"""
+
+from collections import OrderedDict
+import PIL
+import hashlib
+import json
+import os
+
+MANIFEST_PATH = '.icon-build-manifest.json'
+
+# Modules whose source affects the rendered pixels or the encoded bytes
+GENERATOR_MODULES = [
+    'create_icon.py',
+    'create_icon_improved.py',
+    'icon_scene.py',
+    'icon_shapes.py',
+    'icon_gradient.py',
+    'icon_shadow.py',
+    'icon_resize.py',
+    'icon_encoder.py',
+    'icon_sdf.py',
+    'icon_splash.py',
+    'image_optimizer.py',
+]
+
+_code_version = None
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def code_version():
+    """Hash of the generator sources and the Pillow version (computed once per process)"""
+    global _code_version
+    if _code_version is None:
+        here = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256(PIL.__version__.encode())
+        for module in GENERATOR_MODULES:
+            digest.update(module.encode())
+            with open(os.path.join(here, module), 'rb') as f:
+                digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+def build_key(params, size, **extra):
+    """Content address of one output: render parameters + code version + output size"""
+    payload = {'params': params, 'size': size, 'code': code_version(), **extra}
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class BuildCache:
+    """Manifest of previously built outputs with hit/miss bookkeeping"""
+
+    def __init__(self, manifest_path=MANIFEST_PATH, force=False):
+        self.manifest_path = manifest_path
+        self.force = force
+        self.hits = []
+        self.misses = []
+        self.entries = {}
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path) as f:
+                    self.entries = json.load(f).get('outputs', {})
+            except (OSError, ValueError):
+                # A corrupt manifest only costs a full rebuild
+                self.entries = {}
+
+    def is_fresh(self, output_path, key):
+        """True if `output_path` was built from `key` and is unchanged on disk"""
+        entry = self.entries.get(output_path)
+        fresh = (not self.force
+                 and entry is not None
+                 and entry['key'] == key
+                 and os.path.exists(output_path)
+                 and file_digest(output_path) == entry['digest'])
+        (self.hits if fresh else self.misses).append(output_path)
+        return fresh
+
+    def record(self, output_path, key):
+        """Remember that `output_path` now holds the output for `key`"""
+        self.entries[output_path] = {'key': key, 'digest': file_digest(output_path)}
+
+    def save(self):
+        """Write the manifest (sorted, so it diffs cleanly)"""
+        manifest = {'version': 1, 'outputs': OrderedDict(sorted(self.entries.items()))}
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.write('\n')
+        os.replace(temp_path, self.manifest_path)
+
+    def print_report(self):
+        """Print the cache hit/miss summary"""
+        total = len(self.hits) + len(self.misses)
+        if self.force:
+            print(f"🔁 Build cache: forced rebuild of {total} output{'s' if total != 1 else ''}")
+            return
+        print(f"🗃️  Build cache: {len(self.hits)} hit{'s' if len(self.hits) != 1 else ''}, "
+              f"{len(self.misses)} miss{'es' if len(self.misses) != 1 else ''}")
+        for path in self.misses:
+            folder = os.path.basename(os.path.dirname(path))
+            print(f"   rebuilt {os.path.join(folder, os.path.basename(path))}")
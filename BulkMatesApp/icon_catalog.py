@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+BulkMates Asset Catalog
+Reads the icon slots from an .appiconset's Contents.json
+
+Each entry's idiom, size (in points) and scale give its pixel target, so the
+generators no longer keep their own size tables. New slots can be added and
+are written back to Contents.json in Xcode's formatting; entries without a
+filename get one (reusing the file of an existing slot with the same pixel
+size, since Xcode allows one image to fill several slots).
+
+Usage:
+    python3 icon_catalog.py
+    python3 icon_catalog.py --add iphone:40x40@2x --add iphone:40x40@3x
+"""
+
+from collections import OrderedDict, namedtuple
+import argparse
+import json
+import os
+
+from icon_resize import write_atomic
+
+APPICON_DIR = 'BulkMatesApp/Assets.xcassets/AppIcon.appiconset'
+
+# idiom/size/scale as written in Contents.json, plus the computed pixel size
+Slot = namedtuple('Slot', ['idiom', 'size', 'scale', 'pixels', 'filename'])
+
+def parse_points(size):
+    """'83.5x83.5' -> 83.5"""
+    width, _, height = size.partition('x')
+    if width != height:
+        raise ValueError(f"App icon slots must be square, got '{size}'")
+    return float(width)
+
+def parse_scale(scale):
+    """'2x' -> 2 (single-size entries have no scale and count as 1x)"""
+    return int(scale.rstrip('x')) if scale else 1
+
+def slot_pixels(entry):
+    """Pixel edge length of a Contents.json image entry"""
+    if 'size' not in entry:
+        raise ValueError(f"Contents.json entry has no size: {entry}")
+    return round(parse_points(entry['size']) * parse_scale(entry.get('scale')))
+
+def default_filename(entry):
+    """File name for a new slot, following the existing app-icon-<points>[@<scale>].png scheme"""
+    points = entry['size'].partition('x')[0]
+    scale = entry.get('scale')
+    suffix = f"@{scale}" if scale and scale != '1x' else ''
+    return f"app-icon-{points}{suffix}.png"
+
+def contents_path(directory):
+    return os.path.join(directory, 'Contents.json')
+
+def load_contents(directory=APPICON_DIR):
+    """Read an asset set's Contents.json"""
+    with open(contents_path(directory)) as f:
+        return json.load(f)
+
+def format_contents(contents):
+    """Serialize Contents.json the way Xcode writes it (keys sorted, ' : ' separators)"""
+    return json.dumps(contents, indent=2, separators=(',', ' : '), sort_keys=True) + '\n'
+
+def write_contents(directory, contents):
+    """Write Contents.json if it changed; returns True when the file was written"""
+    data = format_contents(contents).encode()
+    path = contents_path(directory)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    write_atomic(data, path)
+    return True
+
+def catalog_slots(contents):
+    """List the Slots of a Contents.json document"""
+    return [Slot(entry.get('idiom'), entry.get('size'), entry.get('scale'), slot_pixels(entry),
+                 entry.get('filename')) for entry in contents['images']]
+
+def parse_slot_spec(spec):
+    """'iphone:40x40@2x' -> {'idiom': 'iphone', 'size': '40x40', 'scale': '2x'}"""
+    idiom, _, rest = spec.partition(':')
+    size, _, scale = rest.partition('@')
+    if not idiom or not size:
+        raise ValueError(f"Slot must look like idiom:WxH[@Nx], got '{spec}'")
+    parse_points(size)
+    entry = {'idiom': idiom, 'size': size}
+    if scale:
+        parse_scale(scale)
+        entry['scale'] = scale
+    return entry
+
+def add_slot(contents, entry):
+    """Append a slot unless one with the same idiom, size and scale exists; returns True if added"""
+    for existing in contents['images']:
+        if all(existing.get(key) == entry.get(key) for key in ('idiom', 'size', 'scale')):
+            return False
+    contents['images'].append(dict(entry))
+    return True
+
+def assign_filenames(contents):
+    """Give every entry without a filename one; returns True if any entry changed"""
+    by_pixels = {}
+    for entry in contents['images']:
+        if entry.get('filename'):
+            by_pixels.setdefault(slot_pixels(entry), entry['filename'])
+
+    changed = False
+    for entry in contents['images']:
+        if not entry.get('filename'):
+            entry['filename'] = by_pixels.setdefault(slot_pixels(entry), default_filename(entry))
+            changed = True
+    return changed
+
+def catalog_targets(directory=APPICON_DIR):
+    """(path, pixels) for every file named in an .appiconset, in Contents.json order"""
+    targets = OrderedDict()
+    for slot in catalog_slots(load_contents(directory)):
+        if slot.filename:
+            targets.setdefault(os.path.join(directory, slot.filename), slot.pixels)
+    return list(targets.items())
+
+def dedupe_targets(targets):
+    """
+    Split (path, pixels) targets into one render per pixel size plus copies
+
+    Returns (unique targets, {rendered path: [paths that get the same bytes]}).
+    """
+    primary = OrderedDict()
+    copies = OrderedDict()
+    for path, pixels in targets:
+        if pixels in primary:
+            copies.setdefault(primary[pixels], []).append(path)
+        else:
+            primary[pixels] = path
+    return [(path, pixels) for pixels, path in primary.items()], copies
+
+def update_catalog(directory=APPICON_DIR, add=()):
+    """Add the requested slots, fill in missing filenames and write Contents.json back"""
+    contents = load_contents(directory)
+    added = [spec for spec in add if add_slot(contents, parse_slot_spec(spec))]
+    assign_filenames(contents)
+    written = write_contents(directory, contents)
+    return added, written
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="List (and add) the slots of an app icon set")
+    parser.add_argument('--appiconset', default=APPICON_DIR,
+                        help=f"the .appiconset folder (default: {APPICON_DIR})")
+    parser.add_argument('--add', action='append', default=[], metavar='IDIOM:WxH@Nx',
+                        help="add a slot, e.g. iphone:40x40@2x (repeatable)")
+    args = parser.parse_args()
+
+    added, written = update_catalog(args.appiconset, args.add)
+    for spec in added:
+        print(f"➕ Added slot {spec}")
+    if written:
+        print(f"💾 Updated {contents_path(args.appiconset)}")
+
+    contents = load_contents(args.appiconset)
+    print(f"📱 {len(contents['images'])} slots in {args.appiconset}")
+    print(f"   {'Idiom':<12} {'Size':<12} {'Scale':<6} {'Pixels':>6}  File")
+    for slot in catalog_slots(contents):
+        present = os.path.exists(os.path.join(args.appiconset, slot.filename))
+        print(f"   {slot.idiom:<12} {slot.size:<12} {slot.scale or '-':<6} {slot.pixels:>6}  "
+              f"{slot.filename}{'' if present else '  (missing)'}")
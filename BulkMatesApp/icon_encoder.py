@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+BulkMates PNG Encoder
+Encodes icons with a choice of speed/size presets
+
+Presets:
+    fast      - zlib level 1, for iterating on the design
+    balanced  - optimize=True, the encoding the generators have always used
+    smallest  - tries several compress levels, zlib strategies and (when the
+                image has few enough colors) an exact palette in parallel, and
+                keeps the smallest result. Every candidate is lossless.
+
+Usage:
+    python3 icon_encoder.py BulkMatesApp/Assets.xcassets/AppIcon.appiconset/*.png
+"""
+
+from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import io
+import numpy as np
+import os
+import time
+import zlib
+
+PRESETS = ('fast', 'balanced', 'smallest')
+DEFAULT_PRESET = 'balanced'
+
+# (name, save options) tried by the 'smallest' preset, in tie-break order
+SMALLEST_CANDIDATES = [
+    ('optimize', {'optimize': True}),
+    ('level9-filtered', {'compress_level': 9, 'compress_type': zlib.Z_FILTERED}),
+    ('level9-rle', {'compress_level': 9, 'compress_type': zlib.Z_RLE}),
+]
+
+def _encode(img, options):
+    """Encode one candidate (no metadata chunks, so the bytes are deterministic)"""
+    buffer = io.BytesIO()
+    img.save(buffer, 'PNG', icc_profile=None, **options)
+    return buffer.getvalue()
+
+def exact_palette(img):
+    """Return a 'P' copy of an RGB image if it has at most 256 colors, else None"""
+    if img.mode != 'RGB':
+        return None
+    pixels = np.asarray(img).reshape(-1, 3)
+    colors, indices = np.unique(pixels, axis=0, return_inverse=True)
+    if len(colors) > 256:
+        return None
+
+    paletted = Image.frombytes('P', img.size, indices.astype(np.uint8).tobytes())
+    paletted.putpalette(colors.astype(np.uint8).tobytes())
+    return paletted
+
+def _candidates(img, preset):
+    """List the (name, image, options) encodings a preset tries"""
+    if preset == 'fast':
+        return [('level1', img, {'compress_level': 1})]
+    if preset == 'balanced':
+        return [('optimize', img, {'optimize': True})]
+    if preset == 'smallest':
+        candidates = [(name, img, options) for name, options in SMALLEST_CANDIDATES]
+        paletted = exact_palette(img)
+        if paletted is not None:
+            candidates.append(('palette', paletted, {'optimize': True}))
+        return candidates
+    raise ValueError(f"Unknown PNG preset: {preset} (expected one of {', '.join(PRESETS)})")
+
+def encode_png(img, preset=DEFAULT_PRESET):
+    """
+    Encode `img` with a preset and return (png_bytes, candidate_name)
+
+    Candidates run on threads; Pillow releases the GIL while compressing.
+    """
+    candidates = _candidates(img, preset)
+    if len(candidates) == 1:
+        name, candidate, options = candidates[0]
+        return _encode(candidate, options), name
+
+    with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+        encoded = list(pool.map(lambda candidate: _encode(candidate[1], candidate[2]), candidates))
+    best = min(range(len(candidates)), key=lambda i: len(encoded[i]))
+    return encoded[best], candidates[best][0]
+
+def compare_presets(paths):
+    """Print bytes and milliseconds per file for every preset"""
+    print("🗜️  PNG encoder presets")
+    print(f"   {'File':<24} {'Preset':<9} {'Bytes':>9} {'Time':>9}  Winner")
+    for path in paths:
+        img = Image.open(path)
+        img.load()
+        for preset in PRESETS:
+            start = time.perf_counter()
+            data, name = encode_png(img, preset)
+            elapsed = time.perf_counter() - start
+            print(f"   {os.path.basename(path):<24} {preset:<9} {len(data):>9,} "
+                  f"{elapsed * 1000:>7.1f}ms  {name}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the PNG encoder presets on existing images")
+    parser.add_argument('paths', nargs='+', help="PNG files to re-encode (they are not modified)")
+    args = parser.parse_args()
+    compare_presets(args.paths)
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+BulkMates Icon Export
+Exports the icon for iOS, Android and the web in one pass
+
+The master is rendered (or decoded) once. Every output size is then resized
+from the smallest image already made that is at least twice its size, so
+512 → 192 → 48 share their intermediate downscales instead of resampling
+the 1024px master for every file. Android's adaptive icon layers get chains
+of their own: the foreground (shapes and shadows on transparency, inset to
+the 66dp safe zone) and the background (the gradient alone).
+
+The PNGs are encoded and written on a thread pool (Pillow releases the GIL
+while compressing). favicon.ico bundles frames taken from the same chain.
+
+Targets:
+    ios      - every slot of AppIcon.appiconset, with its Contents.json
+    android  - res/mipmap-*dpi launcher icons (square and round), adaptive
+               foreground/background layers with their mipmap-anydpi-v26
+               XML, and the 512px Play Store icon
+    web      - favicon.ico (16/32/48), favicon PNGs, apple-touch-icon and
+               the android-chrome icons listed in site.webmanifest
+
+Usage:
+    python3 icon_export.py --output icon-export
+    python3 icon_export.py --source BulkMatesIcon-1024.png --target android --target web
+"""
+
+from PIL import Image
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import io
+import json
+import os
+import time
+
+from create_icon_improved import ICON_DESIGN, REFERENCE_SIZE, create_bulkmates_icon_improved, hex_to_rgb
+from icon_catalog import APPICON_DIR, catalog_targets, load_contents, write_contents
+from icon_encoder import DEFAULT_PRESET, PRESETS
+from icon_gradient import create_gradient_background
+from icon_profile import is_profiling
+from icon_resize import (IconResult, available_cores, copy_outputs, load_master, print_summary,
+                         save_png_atomic, write_atomic)
+from icon_sdf import BACKENDS, drawing_context
+
+TARGETS = ('ios', 'android', 'web')
+DEFAULT_OUTPUT = 'icon-export'
+
+# Android density buckets and their scale from dp to pixels
+ANDROID_DENSITIES = [('mdpi', 1), ('hdpi', 1.5), ('xhdpi', 2), ('xxhdpi', 3), ('xxxhdpi', 4)]
+LAUNCHER_DP = 48
+ADAPTIVE_DP = 108
+
+# Size of the design on the adaptive foreground layer, relative to the layer:
+# keeps the person circles inside the 66dp safe zone of the 108dp layer
+ADAPTIVE_DESIGN_SCALE = 0.75
+
+ICO_SIZES = (16, 32, 48)
+
+# path: output file, sizes: edge lengths (several for .ico), layer: which
+# chain the pixels come from ('icon', 'foreground' or 'background'),
+# round: clipped to a circle
+ExportFile = namedtuple('ExportFile', ['path', 'sizes', 'layer', 'round'])
+
+ADAPTIVE_ICON_XML = '''<?xml version="1.0" encoding="utf-8"?>
+<adaptive-icon xmlns:android="http://schemas.android.com/apk/res/android">
+    <background android:drawable="@mipmap/ic_launcher_background" />
+    <foreground android:drawable="@mipmap/ic_launcher_foreground" />
+</adaptive-icon>
+'''
+
+def ios_files(output, catalog=APPICON_DIR):
+    """The slots of the catalog's AppIcon set, written to <output>/ios/<set name>"""
+    directory = os.path.join(output, 'ios', os.path.basename(catalog))
+    return [ExportFile(os.path.join(directory, os.path.basename(path)), (pixels,), 'icon', False)
+            for path, pixels in catalog_targets(catalog)]
+
+def android_files(output, adaptive=True):
+    """Launcher icons for every density bucket, plus the Play Store icon"""
+    files = []
+    for density, scale in ANDROID_DENSITIES:
+        directory = os.path.join(output, 'android', 'res', f'mipmap-{density}')
+        launcher = round(LAUNCHER_DP * scale)
+        files.append(ExportFile(os.path.join(directory, 'ic_launcher.png'), (launcher,), 'icon', False))
+        files.append(ExportFile(os.path.join(directory, 'ic_launcher_round.png'), (launcher,), 'icon', True))
+        if adaptive:
+            layer = round(ADAPTIVE_DP * scale)
+            for name in ('foreground', 'background'):
+                files.append(ExportFile(os.path.join(directory, f'ic_launcher_{name}.png'), (layer,),
+                                        name, False))
+    files.append(ExportFile(os.path.join(output, 'android', 'play-store-icon.png'), (512,), 'icon', False))
+    return files
+
+def web_files(output):
+    """Favicons and touch icons"""
+    directory = os.path.join(output, 'web')
+    return [
+        ExportFile(os.path.join(directory, 'favicon.ico'), ICO_SIZES, 'icon', False),
+        ExportFile(os.path.join(directory, 'favicon-16x16.png'), (16,), 'icon', False),
+        ExportFile(os.path.join(directory, 'favicon-32x32.png'), (32,), 'icon', False),
+        ExportFile(os.path.join(directory, 'apple-touch-icon.png'), (180,), 'icon', False),
+        ExportFile(os.path.join(directory, 'android-chrome-192x192.png'), (192,), 'icon', False),
+        ExportFile(os.path.join(directory, 'android-chrome-512x512.png'), (512,), 'icon', False),
+    ]
+
+def downscale_chain(master, sizes):
+    """
+    Resize `master` to every size, largest first, each from the smallest image
+    already made that is at least twice as large (or the master)
+
+    Returns ({size: image}, source pixels resampled).
+    """
+    images = {master.width: master}
+    resampled = 0
+    for size in sorted(set(sizes), reverse=True):
+        if size in images:
+            continue
+        source = min([made for made in images if made >= 2 * size], default=master.width)
+        images[size] = images[source].resize((size, size), Image.Resampling.LANCZOS)
+        resampled += source * source
+    return images, resampled
+
+def round_icon(img):
+    """Clip an icon to a circle with an anti-aliased edge (Android's round launcher icon)"""
+    mask = Image.new('L', img.size, 0)
+    drawing_context(mask, 'sdf').ellipse([0, 0, img.width, img.height], fill=255)
+    rounded = img.convert('RGBA')
+    rounded.putalpha(mask)
+    return rounded
+
+def render_masters(layers, supersample, backend, design=None, source=None):
+    """
+    Render (or decode) the master image of each layer chain that is needed
+
+    The foreground master is the design at ADAPTIVE_DESIGN_SCALE on a
+    transparent 108dp xxxhdpi layer; the background master is its gradient.
+    """
+    design = ICON_DESIGN if design is None else design
+    masters = {}
+    if 'icon' in layers:
+        if source is not None:
+            master = load_master(source)
+            if master.width != master.height:
+                raise ValueError(f"The master icon must be square, got {master.width}x{master.height}")
+            masters['icon'] = master if master.mode in ('RGB', 'RGBA') else master.convert('RGBA')
+        else:
+            masters['icon'] = create_bulkmates_icon_improved(REFERENCE_SIZE, supersample,
+                                                             backend=backend, design=design)
+
+    layer_size = round(ADAPTIVE_DP * ANDROID_DENSITIES[-1][1])
+    if 'foreground' in layers:
+        design_size = round(layer_size * ADAPTIVE_DESIGN_SCALE)
+        foreground = Image.new('RGBA', (layer_size, layer_size), (0, 0, 0, 0))
+        inset = (layer_size - design_size) // 2
+        foreground.alpha_composite(create_bulkmates_icon_improved(
+            design_size, supersample, backend=backend, design=design, background=False), (inset, inset))
+        masters['foreground'] = foreground
+    if 'background' in layers:
+        masters['background'] = create_gradient_background(
+            (layer_size, layer_size), hex_to_rgb(design['gradient_start']),
+            hex_to_rgb(design['gradient_end']))
+    return masters
+
+def web_manifest(design=None):
+    """site.webmanifest listing the android-chrome icons"""
+    design = ICON_DESIGN if design is None else design
+    manifest = {
+        'name': 'BulkMates',
+        'short_name': 'BulkMates',
+        'icons': [{'src': f'/android-chrome-{size}x{size}.png', 'sizes': f'{size}x{size}',
+                   'type': 'image/png'} for size in (192, 512)],
+        'theme_color': design['gradient_start'],
+        'background_color': '#FFFFFF',
+        'display': 'standalone',
+    }
+    return json.dumps(manifest, indent=2) + '\n'
+
+def _write_file(export_file, chain, preset):
+    """Encode one exported file from its chain and write it atomically"""
+    start = time.perf_counter()
+    if export_file.path.endswith('.ico'):
+        frames = [chain[size] for size in sorted(export_file.sizes, reverse=True)]
+        encode_start = time.perf_counter()
+        buffer = io.BytesIO()
+        frames[0].save(buffer, 'ICO', sizes=[frame.size for frame in frames],
+                       append_images=frames[1:])
+        encode_seconds = time.perf_counter() - encode_start
+        write_atomic(buffer.getvalue(), export_file.path)
+        written = len(buffer.getvalue())
+    else:
+        img = chain[export_file.sizes[0]]
+        if export_file.round:
+            img = round_icon(img)
+        written, encode_seconds = save_png_atomic(img, export_file.path, preset)
+    return IconResult(export_file.path, max(export_file.sizes), written,
+                      time.perf_counter() - start, encode_seconds)
+
+def _write_text(text, path):
+    write_atomic(text.encode(), path)
+
+def export_icons(output=DEFAULT_OUTPUT, targets=TARGETS, supersample=4, backend='pillow',
+                 preset=DEFAULT_PRESET, source=None, catalog=APPICON_DIR, max_workers=None):
+    """
+    Export the icon for every target into `output`
+
+    With `source`, that master is decoded (or memory-mapped, for .npy) instead
+    of rendering one; the adaptive layers need the separate foreground and
+    background renders and are left out. Returns (results, workers).
+    """
+    adaptive = source is None
+    files = []
+    if 'ios' in targets:
+        files += ios_files(output, catalog)
+    if 'android' in targets:
+        files += android_files(output, adaptive)
+    if 'web' in targets:
+        files += web_files(output)
+
+    # Files with the same pixels (iOS slots sharing a size) are encoded once and copied
+    keys = OrderedDict()
+    copies = {}
+    for export_file in files:
+        key = export_file[1:]
+        if key in keys:
+            copies.setdefault(keys[key].path, []).append(export_file.path)
+        else:
+            keys[key] = export_file
+    unique = list(keys.values())
+
+    layers = OrderedDict()
+    for export_file in unique:
+        layers.setdefault(export_file.layer, set()).update(export_file.sizes)
+
+    masters = render_masters(layers, supersample, backend, source=source)
+    chains = {}
+    resampled = direct = 0
+    for layer, sizes in layers.items():
+        chains[layer], pixels = downscale_chain(masters[layer], sizes)
+        resampled += pixels
+        direct += masters[layer].width ** 2 * len(sizes - {masters[layer].width})
+    print(f"🔗 {sum(len(sizes) for sizes in layers.values())} sizes from {len(masters)} "
+          f"master{'s' if len(masters) != 1 else ''}: resampled {resampled / 1e6:.1f} MP "
+          f"instead of {direct / 1e6:.1f} MP from the masters")
+
+    for directory in sorted({os.path.dirname(export_file.path) for export_file in files}):
+        os.makedirs(directory, exist_ok=True)
+
+    workers = 1 if is_profiling() else max(1, min(max_workers or available_cores(), len(unique)))
+    if workers == 1:
+        results = [_write_file(export_file, chains[export_file.layer], preset) for export_file in unique]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda export_file: _write_file(
+                export_file, chains[export_file.layer], preset), unique))
+    results += copy_outputs(results, copies)
+
+    if 'ios' in targets:
+        write_contents(os.path.dirname(ios_files(output, catalog)[0].path), load_contents(catalog))
+    if 'android' in targets and adaptive:
+        directory = os.path.join(output, 'android', 'res', 'mipmap-anydpi-v26')
+        os.makedirs(directory, exist_ok=True)
+        for name in ('ic_launcher.xml', 'ic_launcher_round.xml'):
+            _write_text(ADAPTIVE_ICON_XML, os.path.join(directory, name))
+    if 'web' in targets:
+        _write_text(web_manifest(), os.path.join(output, 'web', 'site.webmanifest'))
+    return results, workers
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the icon for iOS, Android and the web")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help=f"folder to export into (default: {DEFAULT_OUTPUT})")
+    parser.add_argument('--target', action='append', choices=TARGETS,
+                        help="export only this target (repeatable; default: all)")
+    parser.add_argument('--source', metavar='PATH',
+                        help="resize this master (PNG or .npy) instead of rendering one; "
+                             "Android adaptive layers are skipped")
+    parser.add_argument('--catalog', default=APPICON_DIR,
+                        help=f"AppIcon set whose slots the iOS target exports (default: {APPICON_DIR})")
+    parser.add_argument('--supersample', type=int,
+                        help="supersampling factor (default: 4 with the pillow backend, 1 with sdf)")
+    parser.add_argument('--backend', choices=BACKENDS, default='pillow',
+                        help="rasterizer: pillow or sdf (default: pillow)")
+    parser.add_argument('--png-preset', choices=PRESETS, default=DEFAULT_PRESET,
+                        help="PNG encoder preset: fast, balanced or smallest (default: balanced)")
+    parser.add_argument('--workers', type=int, help="encoder threads (default: all cores)")
+    args = parser.parse_args()
+
+    targets = args.target or TARGETS
+    supersample = args.supersample or (1 if args.backend == 'sdf' else 4)
+    print(f"📦 Exporting {', '.join(targets)} icons to {args.output}/")
+    if args.source:
+        print(f"   from {args.source} (adaptive icon layers need a render and are skipped)")
+    start = time.perf_counter()
+    try:
+        results, workers = export_icons(args.output, targets, supersample, args.backend,
+                                        args.png_preset, args.source, args.catalog, args.workers)
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
+        raise SystemExit(1)
+    print_summary(results, time.perf_counter() - start, workers, root=args.output)
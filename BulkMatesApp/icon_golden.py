@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+BulkMates Golden Icon Check
+Compares fresh renders of every size and theme against stored golden images
+
+--update renders the main icon and every variant in icon_variants.json at
+every size in AppIcon.appiconset and stores them as PNGs in icon-golden/,
+with a manifest holding the render settings and a hash of each image's
+pixels. A check renders the same cases and compares them:
+
+- renders whose pixel hash matches the manifest pass without decoding the
+  golden at all;
+- otherwise the images are diffed with NumPy in bands of TILE rows, stopping
+  at the first tile whose error exceeds the tolerance; passing images also
+  get mean error and SSIM.
+
+A diff heatmap is written to icon-golden-diffs/ for every failure, and the
+script exits with status 1.
+
+Usage:
+    python3 icon_golden.py --update
+    python3 icon_golden.py
+    python3 icon_golden.py --theme Dark --size 180 --tolerance 0
+"""
+
+from PIL import Image
+from collections import namedtuple
+import argparse
+import hashlib
+import json
+import numpy as np
+import os
+import time
+
+from create_icon_improved import ICON_DESIGN, create_bulkmates_icon_improved
+from icon_catalog import APPICON_DIR, catalog_targets
+from icon_resize import save_png_atomic, ssim, write_atomic
+from icon_sdf import BACKENDS
+from icon_variants import load_variants, variant_design
+
+GOLDEN_DIR = 'icon-golden'
+DIFF_DIR = 'icon-golden-diffs'
+VARIANTS_PATH = 'icon_variants.json'
+MAIN_THEME = 'AppIcon'
+
+# Rows per tile of the early-exit diff
+TILE = 64
+
+# Default tolerances: largest per-channel difference, and lowest SSIM
+DEFAULT_TOLERANCE = 2
+DEFAULT_MIN_SSIM = 0.999
+
+# max_error/mean_error in 8-bit levels; ssim is None when the diff stopped early
+GoldenResult = namedtuple('GoldenResult', ['theme', 'size', 'max_error', 'mean_error', 'ssim',
+                                           'passed', 'note'])
+
+def themes(variants_path=VARIANTS_PATH):
+    """(name, design) of the main icon and every variant"""
+    found = [(MAIN_THEME, ICON_DESIGN)]
+    if variants_path and os.path.exists(variants_path):
+        found += [(variant['name'], variant_design(variant)) for variant in load_variants(variants_path)]
+    return found
+
+def catalog_sizes(catalog=APPICON_DIR):
+    """Every distinct pixel size of the AppIcon set, largest first"""
+    return sorted({size for _, size in catalog_targets(catalog)}, reverse=True)
+
+def golden_path(theme, size, golden_dir=GOLDEN_DIR):
+    return os.path.join(golden_dir, theme, f'{size}.png')
+
+def manifest_path(golden_dir=GOLDEN_DIR):
+    return os.path.join(golden_dir, 'manifest.json')
+
+def pixel_digest(img):
+    """Hash of an image's mode, size and pixels (independent of PNG encoding)"""
+    return hashlib.sha256(f"{img.mode}{img.size}".encode() + img.tobytes()).hexdigest()
+
+def render_case(design, size, settings):
+    return create_bulkmates_icon_improved(size, settings['supersample'], backend=settings['backend'],
+                                          design=design)
+
+def update_goldens(cases, settings, golden_dir=GOLDEN_DIR):
+    """Render every (theme, design, size) case and store it as the new golden"""
+    digests = {}
+    for theme, design, size in cases:
+        img = render_case(design, size, settings)
+        path = golden_path(theme, size, golden_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        save_png_atomic(img, path)
+        digests[f'{theme}/{size}'] = pixel_digest(img)
+        print(f"   💾 {path}")
+
+    manifest = dict(settings, digests=digests)
+    if os.path.exists(manifest_path(golden_dir)):
+        # Keep the goldens of cases that were not re-rendered this time
+        with open(manifest_path(golden_dir)) as f:
+            previous = json.load(f)
+        if {key: previous.get(key) for key in settings} == settings:
+            manifest['digests'] = dict(previous['digests'], **digests)
+    write_atomic((json.dumps(manifest, indent=2, sort_keys=True) + '\n').encode(),
+                 manifest_path(golden_dir))
+
+def load_manifest(golden_dir=GOLDEN_DIR):
+    with open(manifest_path(golden_dir)) as f:
+        return json.load(f)
+
+def first_failing_tile(new, golden, tolerance):
+    """
+    Diff two (rows, width, channels) arrays TILE rows at a time
+
+    Returns (max error, mean error, None) when every tile is within
+    `tolerance`, or (tile max error, None, (x, y)) for the first tile that is
+    not, with (x, y) the top-left of the TILE x TILE tile holding its worst
+    pixel.
+    """
+    total = 0
+    worst = 0
+    for top in range(0, new.shape[0], TILE):
+        diff = np.abs(new[top:top + TILE].astype(np.int16) - golden[top:top + TILE])
+        tile_max = int(diff.max())
+        if tile_max > tolerance:
+            row, column = np.unravel_index(np.argmax(diff.max(axis=2)), diff.shape[:2])
+            return tile_max, None, ((column // TILE) * TILE, top + (row // TILE) * TILE)
+        worst = max(worst, tile_max)
+        total += int(diff.sum())
+    return worst, total / new.size, None
+
+def write_heatmap(new, golden, path):
+    """Save the per-pixel error as a heatmap: black (equal) through red to yellow"""
+    error = np.abs(new.astype(np.int16) - golden).max(axis=2).astype(np.float64)
+    scaled = np.clip(error / max(error.max(), 1), 0, 1)
+    heat = np.zeros(error.shape + (3,), dtype=np.uint8)
+    heat[..., 0] = np.clip(scaled * 2, 0, 1) * 255
+    heat[..., 1] = np.clip(scaled * 2 - 1, 0, 1) * 255
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(heat).save(path)
+
+def check_case(theme, design, size, manifest, tolerance, min_ssim, golden_dir=GOLDEN_DIR,
+               diff_dir=DIFF_DIR):
+    """Render one case and compare it against its golden; returns a GoldenResult"""
+    img = render_case(design, size, manifest)
+    if manifest['digests'].get(f'{theme}/{size}') == pixel_digest(img):
+        return GoldenResult(theme, size, 0, 0.0, 1.0, True, 'identical')
+
+    path = golden_path(theme, size, golden_dir)
+    if not os.path.exists(path):
+        return GoldenResult(theme, size, None, None, None, False, 'no golden (run --update)')
+    golden_img = Image.open(path).convert(img.mode)
+    if golden_img.size != img.size:
+        return GoldenResult(theme, size, None, None, None, False,
+                            f'golden is {golden_img.width}x{golden_img.height}')
+
+    new, golden = np.asarray(img), np.asarray(golden_img)
+    max_error, mean_error, tile = first_failing_tile(new, golden, tolerance)
+    if tile is None:
+        similarity = ssim(img, golden_img)
+        if similarity >= min_ssim:
+            return GoldenResult(theme, size, max_error, mean_error, similarity, True, '')
+        note = f'SSIM below {min_ssim}'
+    else:
+        similarity = None
+        note = f'tile at {tile[0]},{tile[1]} exceeds tolerance'
+
+    heatmap = os.path.join(diff_dir, f'{theme}-{size}.png')
+    write_heatmap(new, golden, heatmap)
+    return GoldenResult(theme, size, max_error, mean_error, similarity, False,
+                        f'{note}; heatmap {heatmap}')
+
+def check_goldens(cases, tolerance=DEFAULT_TOLERANCE, min_ssim=DEFAULT_MIN_SSIM,
+                  golden_dir=GOLDEN_DIR, fail_fast=False):
+    """Check every (theme, design, size) case; returns the GoldenResults"""
+    manifest = load_manifest(golden_dir)
+    results = []
+    for theme, design, size in cases:
+        result = check_case(theme, design, size, manifest, tolerance, min_ssim, golden_dir)
+        results.append(result)
+        print_result(result)
+        if fail_fast and not result.passed:
+            break
+    return results
+
+def print_result(result):
+    status = '✅' if result.passed else '❌'
+    max_error = '-' if result.max_error is None else f'{result.max_error:>3}'
+    mean_error = '-' if result.mean_error is None else f'{result.mean_error:.4f}'
+    similarity = '-' if result.ssim is None else f'{result.ssim:.5f}'
+    print(f"   {status} {result.theme:<10} {result.size:>5}px  max {max_error:>3}  "
+          f"mean {mean_error:>6}  SSIM {similarity:>7}  {result.note}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check icon renders against stored golden images")
+    parser.add_argument('--update', action='store_true', help="render and store new golden images")
+    parser.add_argument('--theme', action='append', metavar='NAME',
+                        help=f"only this theme: {MAIN_THEME} or a variant name (repeatable)")
+    parser.add_argument('--size', type=int, action='append', help="only this size (repeatable)")
+    parser.add_argument('--variants', default=VARIANTS_PATH,
+                        help=f"variants file with the themes to check (default: {VARIANTS_PATH})")
+    parser.add_argument('--golden-dir', default=GOLDEN_DIR,
+                        help=f"folder of the golden images (default: {GOLDEN_DIR})")
+    parser.add_argument('--tolerance', type=int, default=DEFAULT_TOLERANCE,
+                        help=f"largest allowed per-channel difference (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument('--min-ssim', type=float, default=DEFAULT_MIN_SSIM,
+                        help=f"lowest allowed SSIM (default: {DEFAULT_MIN_SSIM})")
+    parser.add_argument('--fail-fast', action='store_true', help="stop at the first failing case")
+    parser.add_argument('--supersample', type=int, default=4,
+                        help="supersampling factor of new goldens (default: 4)")
+    parser.add_argument('--backend', choices=BACKENDS, default='pillow',
+                        help="rasterizer of new goldens (default: pillow)")
+    args = parser.parse_args()
+
+    available = themes(args.variants)
+    if args.theme:
+        unknown = set(args.theme) - {name for name, _ in available}
+        if unknown:
+            parser.error(f"unknown theme(s): {', '.join(sorted(unknown))}")
+        available = [(name, design) for name, design in available if name in args.theme]
+    sizes = args.size or catalog_sizes()
+    # Sizes outermost, so the themes of one size share their shape layers
+    cases = [(name, design, size) for size in sizes for name, design in available]
+
+    start = time.perf_counter()
+    if args.update:
+        settings = {'supersample': args.supersample, 'backend': args.backend}
+        print(f"📸 Storing {len(cases)} golden images in {args.golden_dir}/")
+        update_goldens(cases, settings, args.golden_dir)
+        print(f"✅ Done in {time.perf_counter() - start:.2f}s")
+        raise SystemExit(0)
+
+    if not os.path.exists(manifest_path(args.golden_dir)):
+        print(f"❌ No golden images in {args.golden_dir}/ (run with --update first)")
+        raise SystemExit(1)
+    print(f"🔍 Checking {len(cases)} renders against {args.golden_dir}/ "
+          f"(tolerance {args.tolerance}, SSIM ≥ {args.min_ssim})")
+    results = check_goldens(cases, args.tolerance, args.min_ssim, args.golden_dir, args.fail_fast)
+    failed = [result for result in results if not result.passed]
+    elapsed = time.perf_counter() - start
+    if failed:
+        print(f"❌ {len(failed)} of {len(results)} checked renders differ from the goldens "
+              f"({elapsed:.2f}s)")
+        raise SystemExit(1)
+    print(f"✅ All {len(results)} renders match the goldens ({elapsed:.2f}s)")
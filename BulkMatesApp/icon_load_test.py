@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+BulkMates Icon Server Load Test
+Fires a mix of icon and badge requests at icon_server.py and reports latency
+
+Requests are drawn from a fixed pool of distinct URLs (icon sizes and
+variants, random badge palettes) with popular URLs picked more often, so one
+run covers cold renders, coalesced concurrent requests and warm cache hits.
+With --revalidate, that share of the requests repeat a URL with the ETag of
+an earlier response and should come back 304 Not Modified.
+
+With --spawn, a server is started on a free port with an empty disk cache
+for the duration of the run; otherwise --url must point at a running one.
+After the run the server's own /metrics are printed next to the client's
+numbers.
+
+Usage:
+    python3 icon_load_test.py --spawn
+    python3 icon_server.py & python3 icon_load_test.py --url http://127.0.0.1:8765
+    python3 icon_load_test.py --spawn --requests 5000 --concurrency 32 --distinct 200
+"""
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+import argparse
+import json
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from create_icon_improved import ICON_DESIGN
+from group_badges import MAX_MEMBERS
+from icon_server import DEFAULT_HOST, DEFAULT_PORT, percentile
+from icon_variants import load_variants
+
+ICON_SIZES = (40, 58, 60, 76, 80, 87, 120, 152, 167, 180, 1024)
+
+# Seconds to wait for a spawned server to accept connections
+SPAWN_TIMEOUT = 30
+
+def build_paths(distinct, seed=0, variants_path='icon_variants.json'):
+    """`distinct` request paths: every icon size per variant first, then random badges"""
+    try:
+        variants = [variant['name'] for variant in load_variants(variants_path)]
+    except FileNotFoundError:
+        variants = []
+    paths = []
+    for variant in [None] + variants:
+        for size in ICON_SIZES:
+            paths.append(f'/icon?size={size}' + (f'&variant={variant}' if variant else ''))
+    palette = [color.lstrip('#') for color, _ in ICON_DESIGN['person_data']]
+    rng = random.Random(seed)
+    while len(paths) < distinct:
+        colors = [rng.choice(palette) for _ in range(rng.randint(1, MAX_MEMBERS))]
+        paths.append(f"/badge?size=256&colors={','.join(colors)}")
+    rng.shuffle(paths)
+    return paths[:distinct]
+
+def fetch(url, etag=None, timeout=60):
+    """GET `url`; returns (status, seconds, bytes, etag, X-Cache)"""
+    headers = {'If-None-Match': etag} if etag else {}
+    start = time.perf_counter()
+    try:
+        with urlopen(Request(url, headers=headers), timeout=timeout) as response:
+            body = response.read()
+            return (response.status, time.perf_counter() - start, len(body),
+                    response.headers.get('ETag'), response.headers.get('X-Cache'))
+    except HTTPError as e:
+        e.read()
+        return (e.code, time.perf_counter() - start, 0, e.headers.get('ETag'),
+                'not_modified' if e.code == 304 else None)
+    except (URLError, OSError) as e:
+        return ('error', time.perf_counter() - start, 0, None, type(e).__name__)
+
+def run_load(base_url, paths, requests, concurrency, revalidate=0.0, seed=0):
+    """Send `requests` requests over `concurrency` threads; returns (results, seconds)"""
+    rng = random.Random(seed)
+    # Zipf-like popularity: the n-th path is picked in proportion to 1/n
+    picks = rng.choices(paths, weights=[1 / (rank + 1) for rank in range(len(paths))], k=requests)
+    conditional = [rng.random() < revalidate for _ in picks]
+    etags = {}
+    lock = threading.Lock()
+
+    def one(index):
+        path = picks[index]
+        with lock:
+            etag = etags.get(path) if conditional[index] else None
+        result = fetch(base_url + path, etag)
+        if result[3]:
+            with lock:
+                etags[path] = result[3]
+        return result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    return results, time.perf_counter() - start
+
+def print_load_report(results, elapsed, concurrency):
+    statuses = Counter(str(result[0]) for result in results)
+    sources = Counter(result[4] for result in results if result[4])
+    latencies = sorted(result[1] for result in results)
+    total_bytes = sum(result[2] for result in results)
+    print(f"📊 {len(results)} requests in {elapsed:.2f}s with {concurrency} clients "
+          f"({len(results) / elapsed:.1f} req/s, {total_bytes / 1024 / 1024:.1f} MB received)")
+    print(f"   status: {', '.join(f'{status} x{count}' for status, count in sorted(statuses.items()))}")
+    print(f"   served from: {', '.join(f'{source} x{count}' for source, count in sources.most_common())}")
+    print("   latency: " + ', '.join(f"{name} {percentile(latencies, fraction) * 1000:.1f}ms"
+                                     for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99),
+                                                            ('max', 1.0))))
+
+def print_server_metrics(base_url):
+    """Print the server's /metrics per endpoint"""
+    try:
+        with urlopen(base_url + '/metrics', timeout=10) as response:
+            metrics = json.load(response)
+    except (URLError, OSError) as e:
+        print(f"⚠️  Could not read {base_url}/metrics: {e}")
+        return
+    cache = metrics['memory_cache']
+    print(f"🖥️  Server: memory cache {cache['entries']} entries, {cache['bytes'] / 1024 / 1024:.1f} "
+          f"of {cache['max_bytes'] / 1024 / 1024:.0f} MB, {cache['evictions']} evictions")
+    for endpoint, stats in sorted(metrics['endpoints'].items()):
+        latency = stats['latency_ms']
+        hit_rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else 'n/a'
+        print(f"   {endpoint:<7} {stats['requests']:>6} requests, hit rate {hit_rate}, "
+              f"p50 {latency['p50']}ms, p95 {latency['p95']}ms, p99 {latency['p99']}ms  "
+              f"{json.dumps(stats['sources'], sort_keys=True)}")
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind((DEFAULT_HOST, 0))
+        return sock.getsockname()[1]
+
+def spawn_server(cache_dir, memory_mb):
+    """Start icon_server.py on a free localhost port; returns (process, base url)"""
+    port = _free_port()
+    process = subprocess.Popen([sys.executable, 'icon_server.py', '--port', str(port),
+                                '--cache-dir', cache_dir, '--memory-mb', str(memory_mb)],
+                               stdout=subprocess.DEVNULL)
+    base_url = f'http://{DEFAULT_HOST}:{port}'
+    deadline = time.monotonic() + SPAWN_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"icon_server.py exited with status {process.returncode}")
+        try:
+            with socket.create_connection((DEFAULT_HOST, port), timeout=1):
+                return process, base_url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"icon_server.py did not accept connections within {SPAWN_TIMEOUT}s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load test icon_server.py on localhost")
+    parser.add_argument('--url', default=f'http://{DEFAULT_HOST}:{DEFAULT_PORT}',
+                        help=f"server base URL (default: http://{DEFAULT_HOST}:{DEFAULT_PORT})")
+    parser.add_argument('--spawn', action='store_true',
+                        help="start a server with an empty disk cache for the run instead of using --url")
+    parser.add_argument('--memory-mb', type=float, default=64,
+                        help="memory cache of a spawned server, in MB (default: 64)")
+    parser.add_argument('--requests', type=int, default=1000, help="requests to send (default: 1000)")
+    parser.add_argument('--concurrency', type=int, default=16, help="concurrent clients (default: 16)")
+    parser.add_argument('--distinct', type=int, default=100,
+                        help="distinct URLs in the request pool (default: 100)")
+    parser.add_argument('--revalidate', type=float, default=0.2,
+                        help="share of requests sent with If-None-Match once an ETag is known "
+                             "(default: 0.2)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args()
+
+    process, results = None, []
+    base_url = args.url.rstrip('/')
+    with tempfile.TemporaryDirectory(prefix='icon-server-cache-') as cache_dir:
+        try:
+            if args.spawn:
+                process, base_url = spawn_server(cache_dir, args.memory_mb)
+            paths = build_paths(args.distinct, args.seed)
+            print(f"🔥 {args.requests} requests over {len(paths)} distinct URLs to {base_url}")
+            results, elapsed = run_load(base_url, paths, args.requests, args.concurrency,
+                                        args.revalidate, args.seed)
+            print_load_report(results, elapsed, args.concurrency)
+            print_server_metrics(base_url)
+        finally:
+            if process:
+                process.terminate()
+                process.wait()
+
+    failed = sum(1 for result in results if result[0] not in (200, 304))
+    if failed:
+        print(f"❌ {failed} requests failed")
+        raise SystemExit(1)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+BulkMates Icon Pipeline Profiler
+Per-stage wall time, CPU time and memory for the icon generators
+
+The renderer and the resize engine mark their stages with
+`with profile_stage('name'):`. Nothing is recorded unless a Profiler has been
+activated (the --profile options of the generator scripts do that), so the
+markers cost next to nothing in normal runs.
+
+Memory is the tracemalloc peak above the level at the start of the stage.
+tracemalloc sees Python and NumPy allocations but not Pillow's image buffers.
+"""
+
+from contextlib import contextmanager, nullcontext
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+
+_active = None
+_inactive = nullcontext()
+
+def profile_stage(name, **args):
+    """Context manager timing one stage if profiling is active, a no-op otherwise"""
+    if _active is None:
+        return _inactive
+    return _active.stage(name, **args)
+
+def is_profiling():
+    """True while a Profiler is active"""
+    return _active is not None
+
+class Profiler:
+    """Collects a trace of nested pipeline stages"""
+
+    def __init__(self, cprofile_stage=None):
+        self.events = []
+        self.cprofile_stage = cprofile_stage
+        self.cprofile = cProfile.Profile() if cprofile_stage else None
+        self._stack = []
+        self._origin = None
+
+    def __enter__(self):
+        global _active
+        self._origin = time.perf_counter()
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start()
+        _active = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active
+        _active = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        return False
+
+    def _fold_peak(self):
+        """Credit the peak since the last reset to every open stage, then reset it"""
+        _, peak = tracemalloc.get_traced_memory()
+        for frame in self._stack:
+            frame['peak'] = max(frame['peak'], peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name, **args):
+        self._fold_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        frame = {'peak': current}
+        self._stack.append(frame)
+
+        profiling = self.cprofile is not None and name == self.cprofile_stage
+        if profiling:
+            self.cprofile.enable()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            if profiling:
+                self.cprofile.disable()
+            self._fold_peak()
+            self._stack.pop()
+            self.events.append({
+                'name': name,
+                'start': wall_start - self._origin,
+                'wall': wall,
+                'cpu': cpu,
+                'peak_bytes': frame['peak'] - current,
+                'depth': len(self._stack),
+                'args': args,
+            })
+
+    def print_table(self):
+        """Print the stages in start order, indented by nesting depth"""
+        print()
+        print("🔬 Stage profile")
+        print(f"   {'Stage':<40} {'Wall':>10} {'CPU':>10} {'Py peak':>10}")
+        for event in sorted(self.events, key=lambda e: e['start']):
+            label = '  ' * event['depth'] + event['name']
+            if event['args']:
+                label += ' ' + ' '.join(f"{value}" for value in event['args'].values())
+            print(f"   {label:<40} {event['wall'] * 1000:>8.2f}ms {event['cpu'] * 1000:>8.2f}ms "
+                  f"{event['peak_bytes'] / 1024:>8.0f}KB")
+
+    def write_chrome_trace(self, path):
+        """Write the stages as Chrome trace-event JSON (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        trace = [{
+            'name': event['name'],
+            'ph': 'X',
+            'ts': round(event['start'] * 1e6, 3),
+            'dur': round(event['wall'] * 1e6, 3),
+            'pid': pid,
+            'tid': 0,
+            'args': dict(event['args'],
+                         cpu_ms=round(event['cpu'] * 1000, 3),
+                         tracemalloc_peak_kb=round(event['peak_bytes'] / 1024, 1)),
+        } for event in self.events]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f, indent=1)
+            f.write('\n')
+
+    def dump_cprofile(self, path):
+        """Write the cProfile statistics of the chosen stage (pstats format)"""
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(path)
+
+def add_profile_arguments(parser):
+    """Add the shared --profile options to a generator's argument parser"""
+    parser.add_argument('--profile', action='store_true',
+                        help="trace every stage (wall time, CPU time, tracemalloc peak)")
+    parser.add_argument('--profile-trace', metavar='PATH',
+                        help="also write the trace as Chrome trace-event JSON (implies --profile)")
+    parser.add_argument('--profile-stage', metavar='NAME',
+                        help="run cProfile on every occurrence of this stage and dump NAME.prof "
+                             "(implies --profile)")
+
+def profiler_from_args(args):
+    """Return a Profiler for the parsed arguments, or None when profiling is off"""
+    if args.profile or args.profile_trace or args.profile_stage:
+        return Profiler(args.profile_stage)
+    return None
+
+def report(profiler, args):
+    """Print the table and write the files requested on the command line"""
+    profiler.print_table()
+    if args.profile_trace:
+        profiler.write_chrome_trace(args.profile_trace)
+        print(f"   Chrome trace: {args.profile_trace}")
+    if args.profile_stage:
+        path = f"{args.profile_stage}.prof"
+        profiler.dump_cprofile(path)
+        print(f"   cProfile dump for '{args.profile_stage}': {path}")
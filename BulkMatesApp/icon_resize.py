@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+BulkMates Icon Resize Engine
+Decodes the master icon once and fans the resizes out across CPU cores
+
+The decoded master is handed to each worker process once, when the pool
+starts (inherited copy-on-write where the platform forks). A master saved as
+a raw .npy buffer is memory-mapped by every worker instead, so standalone
+resizes need no PNG decode at all. Resizing and PNG encoding run in the
+workers; every file is written to a temporary file and renamed into place so
+a failed run never leaves a half-written PNG.
+
+Resizes go through a pyramid: Image.reduce halves the master by whole
+powers of two while it stays at least twice the target, and one LANCZOS
+step finishes the job (a target the size of the master is not resampled
+at all). A quality guard compares each pyramid size against the direct
+LANCZOS resize the first time it is made from a master and falls back to
+the direct resize if PSNR or SSIM drop below the thresholds; the verdicts
+are remembered per master and code version, so later runs skip the check.
+"""
+
+from PIL import Image
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import numpy as np
+import os
+import tempfile
+import time
+
+from icon_build_cache import code_version, file_digest
+from icon_encoder import DEFAULT_PRESET, encode_png
+from icon_profile import is_profiling, profile_stage
+
+# path: written file, size: edge length in px, bytes: file size,
+# seconds: total time for the file, encode_seconds: the PNG encoding part of it
+IconResult = namedtuple('IconResult', ['path', 'size', 'bytes', 'seconds', 'encode_seconds'])
+
+# Outcome of the pyramid quality guard for one size, against the direct resize
+GuardCheck = namedtuple('GuardCheck', ['size', 'psnr', 'ssim', 'passed'])
+
+# Minimum quality of a pyramid resize, or the direct LANCZOS resize is used
+GUARD_MIN_PSNR = 40.0
+GUARD_MIN_SSIM = 0.99
+
+# Remembered guard verdicts, keyed by master and code version
+GUARD_PATH = '.icon-resize-guard.json'
+
+_master = None
+
+def available_cores():
+    """Number of CPU cores this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def write_atomic(data, output_path):
+    """Write `data` to a temporary file next to `output_path` and rename it into place"""
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        # mkstemp creates the file owner-only; give it normal asset permissions
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def save_png_atomic(img, output_path, preset=DEFAULT_PRESET):
+    """
+    Encode `img` with a PNG preset and write it atomically
+
+    No metadata chunks are written (not even an ICC profile inherited from
+    the master), so identical pixels always produce identical bytes.
+    Returns (bytes written, encode seconds).
+    """
+    start = time.perf_counter()
+    with profile_stage('encode', file=os.path.basename(output_path)):
+        data, _ = encode_png(img, preset)
+    encode_seconds = time.perf_counter() - start
+    with profile_stage('write', file=os.path.basename(output_path)):
+        write_atomic(data, output_path)
+    return len(data), encode_seconds
+
+def save_master_raw(img, path):
+    """Persist a rendered master as a memory-mappable .npy buffer"""
+    np.save(path, np.asarray(img))
+
+def load_master(path):
+    """
+    Open a master icon for resizing
+
+    .npy masters are memory-mapped and wrapped without copying; anything else
+    is decoded with Image.open.
+    """
+    if path.endswith('.npy'):
+        pixels = np.load(path, mmap_mode='r')
+        mode = {3: 'RGB', 4: 'RGBA'}[pixels.shape[2]]
+        size = (pixels.shape[1], pixels.shape[0])
+        return Image.frombuffer(mode, size, pixels, 'raw', mode, 0, 1)
+
+    img = Image.open(path)
+    img.load()
+    return img
+
+def pyramid_factor(source, size):
+    """Largest power-of-two reduction that keeps `source` at least twice `size`"""
+    factor = 1
+    while source // (factor * 2) >= 2 * size:
+        factor *= 2
+    return factor
+
+def pyramid_resize(img, size):
+    """Reduce by integer halvings, then one LANCZOS step to `size` (no-op at the same size)"""
+    if img.size == (size, size):
+        return img
+    factor = pyramid_factor(img.width, size)
+    if factor > 1:
+        img = img.reduce(factor)
+    return img.resize((size, size), Image.Resampling.LANCZOS)
+
+def psnr(a, b):
+    """Peak signal-to-noise ratio in dB between two images of the same size"""
+    difference = np.asarray(a, dtype=np.float64) - np.asarray(b, dtype=np.float64)
+    mse = np.mean(difference * difference)
+    return float('inf') if mse == 0 else float(10 * np.log10(255 ** 2 / mse))
+
+def _box_mean(values, window):
+    """Mean over every window x window block (valid positions only)"""
+    total = np.pad(values, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    return (total[window:, window:] - total[:-window, window:]
+            - total[window:, :-window] + total[:-window, :-window]) / (window * window)
+
+def _plane_ssim(x, y, window):
+    window = min(window, x.shape[0], x.shape[1])
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mean_x, mean_y = _box_mean(x, window), _box_mean(y, window)
+    var_x = _box_mean(x * x, window) - mean_x * mean_x
+    var_y = _box_mean(y * y, window) - mean_y * mean_y
+    covariance = _box_mean(x * y, window) - mean_x * mean_y
+    similarity = (((2 * mean_x * mean_y + c1) * (2 * covariance + c2))
+                  / ((mean_x * mean_x + mean_y * mean_y + c1) * (var_x + var_y + c2)))
+    return float(similarity.mean())
+
+def ssim(a, b, window=7):
+    """Mean structural similarity of the luminance of two images (7x7 uniform windows)"""
+    return _plane_ssim(np.asarray(a.convert('L'), dtype=np.float64),
+                       np.asarray(b.convert('L'), dtype=np.float64), window)
+
+def _has_alpha(img):
+    return 'A' in img.getbands() or 'transparency' in img.info
+
+def _ssim_planes(img, alpha):
+    if not alpha:
+        return np.asarray(img.convert('RGB'), dtype=np.float64).transpose(2, 0, 1)
+    planes = np.asarray(img.convert('RGBA'), dtype=np.float64).transpose(2, 0, 1)
+    # Premultiplied, so colors under transparent pixels do not count
+    planes[:3] *= planes[3] / 255
+    return planes
+
+def channel_ssim(a, b, window=7):
+    """
+    Lowest SSIM over the R, G, B (and alpha) planes of two images
+
+    Unlike ssim(), this sees chroma loss (JPEG 4:2:0 subsampling, palette
+    banding) and damaged alpha edges. Color planes are premultiplied by
+    alpha when either image has one.
+    """
+    alpha = _has_alpha(a) or _has_alpha(b)
+    return min(_plane_ssim(x, y, window) for x, y in zip(_ssim_planes(a, alpha), _ssim_planes(b, alpha)))
+
+def resize_icon(img, size, verdict=None):
+    """
+    Resize `img` to `size` through the pyramid, guarded against the direct resize
+
+    `verdict` is a remembered guard result for this master and size (True:
+    use the pyramid, False: resize directly); when it is None both resizes
+    are made and compared. Returns (image, GuardCheck or None).
+    """
+    if img.size == (size, size) or pyramid_factor(img.width, size) == 1:
+        # Nothing to reduce: the pyramid is the direct resize
+        return pyramid_resize(img, size), None
+    if verdict is not None:
+        if verdict:
+            return pyramid_resize(img, size), None
+        return img.resize((size, size), Image.Resampling.LANCZOS), None
+
+    with profile_stage('resize_guard', size=size):
+        pyramid = pyramid_resize(img, size)
+        direct = img.resize((size, size), Image.Resampling.LANCZOS)
+        check = GuardCheck(size, psnr(pyramid, direct), ssim(pyramid, direct), False)
+        check = check._replace(passed=check.psnr >= GUARD_MIN_PSNR and check.ssim >= GUARD_MIN_SSIM)
+    return (pyramid if check.passed else direct), check
+
+def master_key(master):
+    """Guard key of a master (an Image or a file path) under the current code version"""
+    if isinstance(master, str):
+        digest = file_digest(master)
+    else:
+        digest = hashlib.sha256(f"{master.mode}{master.size}".encode() + master.tobytes()).hexdigest()
+    return hashlib.sha256((code_version() + digest).encode()).hexdigest()
+
+def load_guard_verdicts(key, path=GUARD_PATH):
+    """{size: passed} remembered for a master key"""
+    try:
+        with open(path) as f:
+            entries = json.load(f).get(key, {})
+    except (OSError, ValueError):
+        return {}
+    return {int(size): entry['passed'] for size, entry in entries.items()}
+
+def save_guard_verdicts(key, checks, path=GUARD_PATH):
+    """Remember new guard checks for a master key"""
+    try:
+        with open(path) as f:
+            document = json.load(f)
+    except (OSError, ValueError):
+        document = {}
+    entries = document.setdefault(key, {})
+    for check in checks:
+        entries[str(check.size)] = {'psnr': round(check.psnr, 2), 'ssim': round(check.ssim, 5),
+                                    'passed': check.passed}
+    write_atomic((json.dumps(document, indent=2, sort_keys=True) + '\n').encode(), path)
+
+def _share_master(master):
+    """Pool initializer: keep the master (or map the .npy master) for this worker"""
+    global _master
+    _master = load_master(master) if isinstance(master, str) else master
+
+def _resize_task(output_path, size, preset, verdict=None):
+    """Resize the shared master and write it atomically; returns (IconResult, GuardCheck or None)"""
+    start = time.perf_counter()
+    with profile_stage('resize', size=size):
+        img_resized, check = resize_icon(_master, size, verdict)
+    written, encode_seconds = save_png_atomic(img_resized, output_path, preset)
+    return (IconResult(output_path, size, written, time.perf_counter() - start, encode_seconds),
+            check)
+
+def run_parallel(task, jobs, max_workers=None, initializer=None, initargs=()):
+    """
+    Run `task(*job)` for every job, in a process pool sized to the available cores
+
+    Falls back to running in-process when only one worker would be used, and
+    while profiling so every stage lands in the same trace.
+    Returns the results in job order; the first failure is re-raised.
+    """
+    jobs = list(jobs)
+    workers = max(1, min(max_workers or available_cores(), len(jobs)))
+    if is_profiling():
+        workers = 1
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return [task(*job) for job in jobs], workers
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer,
+                             initargs=initargs) as pool:
+        futures = [pool.submit(task, *job) for job in jobs]
+        return [future.result() for future in futures], workers
+
+def resize_all(source, targets, max_workers=None, preset=DEFAULT_PRESET):
+    """
+    Resize one master icon to every (output_path, size) target in parallel
+
+    `source` is an Image already in memory, a .npy master (mapped by each
+    worker) or an encoded image path (decoded once here). Returns
+    (results, workers) where results is a list of IconResult.
+
+    Sizes without a remembered guard verdict for this master are checked
+    (see resize_icon) and their verdicts saved; a size that falls back to
+    the direct resize is reported.
+    """
+    key = master_key(source)
+    if isinstance(source, str) and not source.endswith('.npy'):
+        source = load_master(source)
+    verdicts = load_guard_verdicts(key)
+    jobs = [(output_path, size, preset, verdicts.get(size)) for output_path, size in targets]
+    outcomes, workers = run_parallel(_resize_task, jobs, max_workers, _share_master, (source,))
+
+    checks = [check for _, check in outcomes if check is not None]
+    if checks:
+        save_guard_verdicts(key, checks)
+    for check in checks:
+        if not check.passed:
+            print(f"⚠️  Pyramid resize to {check.size}px failed the quality guard "
+                  f"(PSNR {check.psnr:.1f} dB, SSIM {check.ssim:.4f}); used a direct resize")
+    return [result for result, _ in outcomes], workers
+
+def copy_outputs(results, copies):
+    """
+    Write each rendered file's bytes to the paths that need the same pixels
+
+    `copies` maps a rendered path to its duplicates (see
+    icon_catalog.dedupe_targets). Returns IconResults for the copies.
+    """
+    copied = []
+    for result in results:
+        for path in copies.get(result.path, []):
+            start = time.perf_counter()
+            with open(result.path, 'rb') as f:
+                data = f.read()
+            write_atomic(data, path)
+            copied.append(IconResult(path, result.size, len(data), time.perf_counter() - start, 0.0))
+    return copied
+
+def print_summary(results, elapsed, workers, root=None, noun='icons'):
+    """
+    Print one summary line plus bytes and encode time per file for a batch of icons
+
+    Files are listed by name, or by their path relative to `root` when given.
+    """
+    total_bytes = sum(result.bytes for result in results)
+    print(f"✅ Wrote {len(results)} {noun} in {elapsed:.2f}s "
+          f"using {workers} worker{'s' if workers != 1 else ''} "
+          f"({total_bytes / 1024:.1f} KB total)")
+    names = {result.path: os.path.relpath(result.path, root) if root else os.path.basename(result.path)
+             for result in results}
+    width = max([24] + [len(name) for name in names.values()])
+    for result in sorted(results, key=lambda r: (-r.size, r.path)):
+        print(f"   {names[result.path]:<{width}} {result.size:>5}px "
+              f"{result.bytes:>9,} bytes  encode {result.encode_seconds * 1000:7.1f}ms  "
+              f"total {result.seconds * 1000:7.1f}ms")
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+BulkMates Icon Scenes
+Declarative icon descriptions compiled into cached draw plans
+
+A scene is JSON: named paints, an optional gradient background, and a list
+of nodes in z-order (later nodes are drawn on top). Sizes and positions are
+in pixels on the scene's reference canvas (`size`) and scale to any output:
+
+    {
+      "name": "improved",
+      "size": 1024,
+      "paints": {"gradient_start": "#4CAF50", "gradient_end": "#2196F3",
+                 "white": "#FFFFFF", "person_1": "#FF9800"},
+      "background": {"gradient": ["gradient_start", "gradient_end"], "angle": 135},
+      "nodes": [
+        {"ring": {"center": [512, 512], "radius": 320, "angles": [-90]},
+         "paints": ["person_1"],
+         "children": [
+           {"circle": {"radius": 70}, "fill": "$paint"},
+           {"silhouette": {"radius": 70, "scale": 1.0}, "fill": "white"}]},
+        {"shadow": {"radius": 100, "blur": 30, "offset": [0, 10], "opacity": 0.3},
+         "at": [512, 512]},
+        {"circle": {"radius": 100}, "at": [512, 512], "fill": "white"}
+      ]
+    }
+
+A node draws one shape from icon_shapes.SHAPES, stamps a shadow, or holds
+children: a `group` offsets them by `at`, and a `ring` repeats them at each
+angle around its center (snapped to whole canvas pixels), with `$paint`
+standing for the instance's entry of the ring's `paints`. `stage` labels a
+node in profiles.
+
+compile_scene turns the nodes into a draw plan, which only depends on the
+geometry, so a plan is shared by every scene that differs in paint colors:
+- Shapes with the same paint are merged into one mask pass when they
+  overlap, or when one paste over their combined box is cheaper than one
+  paste each, as long as nothing drawn between them overlaps.
+- Passes that are the same shapes at another whole-pixel offset (the
+  instances of a ring) are rasterized once and reused.
+- Every pass is cropped to the box it covers, so compositing only touches
+  those dirty regions; shadows are stamped from cached sprites.
+
+Usage:
+    python3 icon_scene.py icon-scenes/original.json --size 1024 --supersample 4
+    python3 icon_scene.py icon-scenes/improved.json --plan
+    python3 icon_scene.py --export-design icon-scenes/improved.json
+"""
+
+from PIL import Image, ImageColor
+from collections import namedtuple
+from functools import lru_cache
+import argparse
+import json
+import math
+
+from icon_gradient import create_gradient
+from icon_profile import profile_stage
+from icon_sdf import BACKENDS, drawing_context
+from icon_shadow import ShadowSpec, shadow_sprite, stamp_shadow
+from icon_shapes import SHAPES
+
+# Cost of one mask paste, in pasted pixels; shapes that share a paint merge
+# when the combined box costs less than pasting them one by one
+PASTE_CALL_PIXELS = 256
+
+# A coverage mask cropped to its bounding box on the canvas
+MaskLayer = namedtuple('MaskLayer', ['box', 'mask'])
+
+# One leaf of a flattened scene: a shape (kind, params, center in canvas px,
+# padded integer region) with a paint, or a shadow (spec, center)
+SceneOp = namedtuple('SceneOp', ['stage', 'paint', 'shape', 'params', 'center', 'region',
+                                 'clipped', 'shadow'])
+
+# A compiled step: 'fill' pastes `layer` in `paint`, 'shadow' stamps `shadow` at `centers`
+DrawStep = namedtuple('DrawStep', ['kind', 'stage', 'paint', 'layer', 'shadow', 'centers'])
+
+# shapes: shape nodes after flattening, passes: fill steps after merging,
+# rasterized: passes drawn (the rest reused a translated twin), dirty_pixels:
+# pixels touched by fills and shadows
+PlanStats = namedtuple('PlanStats', ['shapes', 'passes', 'rasterized', 'dirty_pixels'])
+
+# background: (paint names, angle) of the gradient, or None for transparent
+DrawPlan = namedtuple('DrawPlan', ['canvas', 'background', 'steps', 'stats'])
+
+NODE_KINDS = tuple(SHAPES) + ('shadow', 'group', 'ring')
+
+def load_scene(path):
+    """Read and validate a scene file"""
+    with open(path) as f:
+        scene = json.load(f)
+    validate_scene(scene)
+    return scene
+
+def validate_scene(scene):
+    """Raise ValueError if a scene uses unknown node kinds, parameters or paints"""
+    name = scene.get('name', 'scene')
+    paints = scene.get('paints', {})
+    for paint, color in paints.items():
+        try:
+            ImageColor.getrgb(color)
+        except (ValueError, AttributeError):
+            raise ValueError(f"Scene '{name}': paint '{paint}' is not a color: {color!r}")
+    background = scene.get('background')
+    if background is not None:
+        for paint in background['gradient']:
+            if paint not in paints:
+                raise ValueError(f"Scene '{name}': unknown background paint '{paint}'")
+
+    def check(nodes, ring_paints):
+        for node in nodes:
+            kinds = [key for key in NODE_KINDS if key in node]
+            if len(kinds) != 1:
+                raise ValueError(f"Scene '{name}': every node needs exactly one of "
+                                 f"{', '.join(NODE_KINDS)}: {node}")
+            kind = kinds[0]
+            if kind == 'group':
+                check(node['group'], ring_paints)
+            elif kind == 'ring':
+                ring = node['ring']
+                instance_paints = node.get('paints')
+                if instance_paints is not None and len(instance_paints) != len(ring['angles']):
+                    raise ValueError(f"Scene '{name}': a ring needs one paint per angle")
+                check(node['children'], instance_paints)
+            elif kind in SHAPES:
+                missing = [key for key in SHAPES[kind][2] if key not in node[kind]]
+                if missing:
+                    raise ValueError(f"Scene '{name}': {kind} needs {', '.join(missing)}")
+                fill = node.get('fill')
+                if fill == '$paint':
+                    if ring_paints is None:
+                        raise ValueError(f"Scene '{name}': '$paint' is only defined inside a "
+                                         f"ring with paints")
+                    fill_paints = ring_paints
+                else:
+                    fill_paints = [fill]
+                for paint in fill_paints:
+                    if paint not in paints:
+                        raise ValueError(f"Scene '{name}': unknown paint '{paint}'")
+
+    check(scene['nodes'], None)
+
+def scene_geometry(scene):
+    """The color-independent part of a scene as a string (the scene_plan cache key)"""
+    return json.dumps({key: value for key, value in scene.items() if key not in ('name', 'paints')},
+                      sort_keys=True)
+
+def _region(canvas, bounds):
+    """Integer box around float bounds, padded for anti-aliasing; also whether it was clipped"""
+    left, top, right, bottom = bounds
+    region = (int(left) - 2, int(top) - 2, int(right) + 3, int(bottom) + 3)
+    clipped = (max(region[0], 0), max(region[1], 0), min(region[2], canvas), min(region[3], canvas))
+    return clipped, clipped != region
+
+def flatten_scene(scene, canvas):
+    """Expand groups and rings into a z-ordered list of SceneOps in canvas pixels"""
+    scale = canvas / scene['size']
+    ops = []
+
+    def visit(nodes, origin, instance_paint):
+        for node in nodes:
+            at = node.get('at', (0, 0))
+            center = (origin[0] + at[0] * scale, origin[1] + at[1] * scale)
+            if 'group' in node:
+                visit(node['group'], center, instance_paint)
+            elif 'ring' in node:
+                ring = node['ring']
+                ring_x = origin[0] + ring['center'][0] * scale
+                ring_y = origin[1] + ring['center'][1] * scale
+                radius = ring['radius'] * scale
+                for index, angle in enumerate(ring['angles']):
+                    angle_rad = math.radians(angle)
+                    instance = (int(ring_x + radius * math.cos(angle_rad)),
+                                int(ring_y + radius * math.sin(angle_rad)))
+                    paints = node.get('paints')
+                    visit(node['children'], instance, paints[index] if paints else None)
+            elif 'shadow' in node:
+                shadow = node['shadow']
+                offset_x, offset_y = shadow.get('offset', (0, 0))
+                spec = ShadowSpec(radius=shadow['radius'] * scale, blur=shadow['blur'] * scale,
+                                  offset=(offset_x * scale, offset_y * scale),
+                                  opacity=shadow['opacity'])
+                ops.append(SceneOp(node.get('stage', 'shadow'), None, None, None, center, None,
+                                   False, spec))
+            else:
+                kind = next(key for key in SHAPES if key in node)
+                params = node[kind]
+                paint = instance_paint if node['fill'] == '$paint' else node['fill']
+                region, clipped = _region(canvas, SHAPES[kind][1](center, params, scale))
+                ops.append(SceneOp(node.get('stage', kind), paint, kind, params, center, region,
+                                   clipped, None))
+
+    visit(scene['nodes'], (0, 0), None)
+    return ops
+
+def _shadow_box(op):
+    sprite = shadow_sprite(op.shadow)
+    left = int(round(op.center[0])) + sprite.origin[0]
+    top = int(round(op.center[1])) + sprite.origin[1]
+    return (left, top, left + sprite.image.width, top + sprite.image.height)
+
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def _union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def _paste_cost(box):
+    return (box[2] - box[0]) * (box[3] - box[1]) + PASTE_CALL_PIXELS
+
+def plan_passes(ops):
+    """
+    Group ops into passes: [kind, stage, paint or spec, ops, box]
+
+    An op joins an earlier pass of the same paint (or shadow spec) if no pass
+    drawn in between overlaps it, and the merge pays off: the boxes overlap,
+    or one paste over their union costs less than two pastes. Shadows only
+    share a pass to be stamped in one loop; each is still composited inside
+    its own box.
+    """
+    passes = []
+    for op in ops:
+        kind = 'shadow' if op.shadow is not None else 'fill'
+        box = _shadow_box(op) if kind == 'shadow' else op.region
+        key = op.shadow if kind == 'shadow' else op.paint
+        target = None
+        for candidate in reversed(passes):
+            overlaps = _overlaps(candidate[4], box)
+            if candidate[0] == kind and candidate[2] == key and (
+                    kind == 'shadow' or overlaps or _paste_cost(_union(candidate[4], box)) <
+                    _paste_cost(candidate[4]) + _paste_cost(box)):
+                target = candidate
+                break
+            if overlaps:
+                break
+        if target is None:
+            passes.append([kind, op.stage, key, [op], box])
+        else:
+            target[3].append(op)
+            target[4] = _union(target[4], box)
+    return passes
+
+def _pass_key(ops, box):
+    """Shape of a pass relative to its box, so translated twins compare equal"""
+    left, top = box[0], box[1]
+    return tuple((op.shape, json.dumps(op.params, sort_keys=True),
+                  op.center[0] - left, op.center[1] - top,
+                  op.region[0] - left, op.region[1] - top, op.region[2] - left, op.region[3] - top)
+                 for op in ops)
+
+def _rasterize(ops, box, backend, scale):
+    """Draw every shape of a pass onto one mask covering `box`; returns a MaskLayer or None"""
+    left, top, right, bottom = box
+    scratch = Image.new('L', (right - left, bottom - top), 0)
+    draw = drawing_context(scratch, backend, origin=(left, top))
+    for op in ops:
+        SHAPES[op.shape][0](draw, op.center, op.params, scale)
+    bbox = scratch.getbbox()
+    if bbox is None:
+        return None
+    return MaskLayer((left + bbox[0], top + bbox[1], left + bbox[2], top + bbox[3]), scratch.crop(bbox))
+
+def _band_layer(layer, rows):
+    """Crop a layer to a (top, bottom) band of canvas rows"""
+    if layer is None or rows is None:
+        return layer
+    left, top, right, bottom = layer.box
+    band_top, band_bottom = max(top, rows[0]), min(bottom, rows[1])
+    if band_bottom <= band_top:
+        return None
+    crop = layer.mask.crop((0, band_top - top, right - left, band_bottom - top))
+    bbox = crop.getbbox()
+    if bbox is None:
+        return None
+    return MaskLayer((left + bbox[0], band_top + bbox[1], left + bbox[2], band_top + bbox[3]),
+                     crop.crop(bbox))
+
+def compile_scene(scene, canvas, backend='pillow', rows=None):
+    """
+    Compile a scene into a DrawPlan for a canvas size
+
+    Shapes are rasterized whole and, with `rows`, cropped to that (top,
+    bottom) band of canvas rows; passes outside the band are skipped.
+    """
+    scale = canvas / scene['size']
+    twins = {}
+    steps = []
+    shapes = rasterized = dirty = 0
+    for kind, stage, key, ops, box in plan_passes(flatten_scene(scene, canvas)):
+        if kind == 'shadow':
+            steps.append(DrawStep('shadow', stage, None, None, key, [op.center for op in ops]))
+            dirty += sum(_paste_cost(_shadow_box(op)) - PASTE_CALL_PIXELS for op in ops)
+            continue
+        shapes += len(ops)
+        if rows is not None and (box[3] <= rows[0] or box[1] >= rows[1]):
+            continue
+        # Shapes clipped by the canvas edge differ from their twins
+        twin_key = None if any(op.clipped for op in ops) else _pass_key(ops, box)
+        if twin_key in twins:
+            twin_box, layer = twins[twin_key]
+            if layer is not None:
+                dx, dy = box[0] - twin_box[0], box[1] - twin_box[1]
+                left, top, right, bottom = layer.box
+                layer = MaskLayer((left + dx, top + dy, right + dx, bottom + dy), layer.mask)
+        else:
+            layer = _rasterize(ops, box, backend, scale)
+            rasterized += 1
+            if twin_key is not None:
+                twins[twin_key] = (box, layer)
+        layer = _band_layer(layer, rows)
+        if layer is not None:
+            steps.append(DrawStep('fill', stage, key, layer, None, None))
+            dirty += _paste_cost(layer.box) - PASTE_CALL_PIXELS
+    background = scene.get('background')
+    if background is not None:
+        background = (tuple(background['gradient']), background.get('angle', 135))
+    fills = sum(1 for step in steps if step.kind == 'fill')
+    return DrawPlan(canvas, background, steps, PlanStats(shapes, fills, rasterized, dirty))
+
+@lru_cache(maxsize=16)
+def scene_plan(canvas, geometry, backend='pillow'):
+    """
+    Compiled plan for a canvas size and scene geometry (see scene_geometry)
+
+    Colors are applied when the plan is rendered, so scenes that only differ
+    in their paints share one plan (and one set of shadow sprites).
+    """
+    return compile_scene(json.loads(geometry), canvas, backend)
+
+def _paste_layer(img, color, layer, top=0, over=False):
+    """
+    Fill a mask layer with a solid color (on a band starting at canvas row `top`)
+
+    With `over`, the fill is alpha-composited instead of pasted, so
+    anti-aliased edges drawn onto transparent pixels keep their color rather
+    than fading to black.
+    """
+    left, upper, right, lower = layer.box
+    if over:
+        fill = Image.new('RGBA', layer.mask.size, color)
+        fill.putalpha(layer.mask)
+        img.alpha_composite(fill, (left, upper - top))
+    else:
+        img.paste(color, (left, upper - top, right, lower - top), layer.mask)
+
+def render_plan(plan, paints, rows=None, background=True):
+    """
+    Render a plan with the given paints (name -> '#RRGGBB') onto a new RGBA surface
+
+    With `rows` (for a plan compiled with the same rows) only that band is
+    returned. With `background` False, or a plan without one, the surface
+    starts transparent and fills are alpha-composited onto it.
+    """
+    colors = {name: ImageColor.getrgb(color) for name, color in paints.items()}
+    canvas = plan.canvas
+    top, bottom = rows if rows is not None else (0, canvas)
+    with profile_stage('gradient'):
+        if background and plan.background is not None:
+            stops, angle = plan.background
+            img = create_gradient((canvas, canvas), [colors[paint] for paint in stops], angle=angle,
+                                  image_mode='RGBA', rows=rows)
+        else:
+            img = Image.new('RGBA', (canvas, bottom - top), (0, 0, 0, 0))
+    over = not background or plan.background is None
+
+    index = 0
+    while index < len(plan.steps):
+        # Consecutive steps of one stage are profiled together
+        stage = plan.steps[index].stage
+        with profile_stage(stage):
+            while index < len(plan.steps) and plan.steps[index].stage == stage:
+                step = plan.steps[index]
+                if step.kind == 'fill':
+                    _paste_layer(img, colors[step.paint], step.layer, top, over)
+                else:
+                    for center in step.centers:
+                        stamp_shadow(img, center, step.shadow, origin=(0, top))
+                index += 1
+    return img
+
+def render_scene(scene, size, supersample=1, backend='pillow', flatten=True):
+    """Render a scene at `size`, drawn at `size` x `supersample` and box-filtered down"""
+    canvas = size * supersample
+    with profile_stage('layers'):
+        plan = scene_plan(canvas, scene_geometry(scene), backend)
+    img = render_plan(plan, scene['paints'])
+    if supersample > 1:
+        with profile_stage('supersample_reduce'):
+            img = img.reduce(supersample)
+    if flatten and plan.background is not None:
+        return img.convert('RGB')
+    return img
+
+def print_plan(plan):
+    stats = plan.stats
+    print(f"🧭 Draw plan for a {plan.canvas}px canvas: {stats.shapes} shapes in {stats.passes} "
+          f"mask passes ({stats.rasterized} rasterized, {stats.passes - stats.rasterized} reused); "
+          f"{stats.dirty_pixels / plan.canvas ** 2:.0%} of the canvas composited")
+    for step in plan.steps:
+        if step.kind == 'fill':
+            left, top, right, bottom = step.layer.box
+            print(f"   {step.stage:<16} fill   {step.paint:<18} {right - left:>5}x{bottom - top:<5} "
+                  f"at ({left}, {top})")
+        else:
+            print(f"   {step.stage:<16} shadow {'blur ' + format(step.shadow.blur, '.1f'):<18} "
+                  f"x{len(step.centers)}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render an icon scene file")
+    parser.add_argument('scene', nargs='?', help="scene file (.json)")
+    parser.add_argument('--size', type=int, help="output size in pixels (default: the scene's size)")
+    parser.add_argument('--supersample', type=int, default=1,
+                        help="render at N times the output size and reduce (default: 1)")
+    parser.add_argument('--backend', choices=BACKENDS, default='pillow',
+                        help="rasterizer: pillow or sdf (default: pillow)")
+    parser.add_argument('--output', help="PNG to write (default: <scene name>-<size>.png)")
+    parser.add_argument('--plan', action='store_true',
+                        help="print the compiled draw plan instead of rendering")
+    parser.add_argument('--export-design', metavar='PATH',
+                        help="write the scene of ICON_DESIGN (create_icon_improved.py) and exit")
+    args = parser.parse_args()
+
+    if args.export_design:
+        from create_icon_improved import ICON_DESIGN, design_scene
+        with open(args.export_design, 'w') as f:
+            json.dump(design_scene(ICON_DESIGN), f, indent=2)
+            f.write('\n')
+        print(f"📝 Wrote the ICON_DESIGN scene to {args.export_design}")
+        raise SystemExit(0)
+    if not args.scene:
+        parser.error("a scene file is required")
+
+    scene = load_scene(args.scene)
+    size = args.size or scene['size']
+    if args.plan:
+        print_plan(scene_plan(size * args.supersample, scene_geometry(scene), args.backend))
+        raise SystemExit(0)
+    icon = render_scene(scene, size, args.supersample, args.backend)
+    output_path = args.output or f"{scene.get('name', 'scene')}-{size}.png"
+    icon.save(output_path, 'PNG')
+    print(f"✅ Rendered {args.scene} at {size}px: {output_path}")
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+BulkMates SDF Rasterizer
+Anti-aliased icon primitives rendered from signed distance fields
+
+SDFDraw implements the parts of ImageDraw the icon uses (ellipse, polygon,
+line) plus rounded_polygon. Each shape evaluates its signed distance field
+with NumPy over its own bounding box only and turns the distance into
+coverage analytically, so edges are smooth without supersampling the
+whole canvas.
+
+Coverage is sampled at pixel centers, so the result converges with what
+Pillow produces when the canvas is supersampled and reduced (the look of the
+shipped icons), not with Pillow's aliased 1x output.
+
+Usage:
+    python3 icon_sdf.py --benchmark
+"""
+
+from PIL import Image, ImageChops, ImageDraw
+import argparse
+import math
+import numpy as np
+import time
+
+# Rasterizers accepted by the renderers' `backend` option
+BACKENDS = ('pillow', 'sdf')
+
+def _grid(box):
+    """Pixel-center coordinates for a (left, top, right, bottom) box"""
+    left, top, right, bottom = box
+    xs = (np.arange(left, right, dtype=np.float32) + 0.5)[np.newaxis, :]
+    ys = (np.arange(top, bottom, dtype=np.float32) + 0.5)[:, np.newaxis]
+    return xs, ys
+
+def sd_circle(xs, ys, cx, cy, radius):
+    """Signed distance to a circle"""
+    return np.hypot(xs - cx, ys - cy) - radius
+
+def sd_ellipse(xs, ys, cx, cy, rx, ry):
+    """Approximate signed distance to an axis-aligned ellipse (exact for circles)"""
+    if rx == ry:
+        return sd_circle(xs, ys, cx, cy, rx)
+    return (np.hypot((xs - cx) / rx, (ys - cy) / ry) - 1) * min(rx, ry)
+
+def sd_polygon(xs, ys, points):
+    """Signed distance to a simple polygon (negative inside)"""
+    distance = None
+    inside = np.zeros(np.broadcast(xs, ys).shape, dtype=bool)
+    count = len(points)
+    for i in range(count):
+        ax, ay = points[i]
+        bx, by = points[i - 1]
+        ex, ey = bx - ax, by - ay
+        wx, wy = xs - ax, ys - ay
+        length_sq = ex * ex + ey * ey
+        t = np.clip((wx * ex + wy * ey) / length_sq, 0, 1) if length_sq else 0
+        edge = (wx - ex * t) ** 2 + (wy - ey * t) ** 2
+        distance = edge if distance is None else np.minimum(distance, edge)
+
+        # Even-odd crossing test for the sign
+        crosses = (ay > ys) != (by > ys)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = ax + (ys - ay) * (bx - ax) / (by - ay)
+        inside ^= crosses & (xs < x_cross)
+    return np.where(inside, -1, 1) * np.sqrt(distance)
+
+def sd_segment(xs, ys, start, end, half_width):
+    """Signed distance to a straight stroke with flat caps (like ImageDraw.line)"""
+    (ax, ay), (bx, by) = start, end
+    length = math.hypot(bx - ax, by - ay)
+    if length == 0:
+        return sd_circle(xs, ys, ax, ay, half_width)
+    ux, uy = (bx - ax) / length, (by - ay) / length
+    wx, wy = xs - (ax + bx) / 2, ys - (ay + by) / 2
+    along = np.abs(wx * ux + wy * uy) - length / 2
+    across = np.abs(wx * -uy + wy * ux) - half_width
+    outside = np.hypot(np.maximum(along, 0), np.maximum(across, 0))
+    return outside + np.minimum(np.maximum(along, across), 0)
+
+def _bounds(img_size, left, top, right, bottom):
+    """Integer pixel box covering the float bounds plus the anti-aliasing fringe"""
+    box = (max(int(math.floor(left)) - 1, 0), max(int(math.floor(top)) - 1, 0),
+           min(int(math.ceil(right)) + 2, img_size[0]), min(int(math.ceil(bottom)) + 2, img_size[1]))
+    return box if box[2] > box[0] and box[3] > box[1] else None
+
+class SDFDraw:
+    """Drop-in replacement for the ImageDraw calls used by the icon renderers"""
+
+    def __init__(self, img):
+        self.img = img
+
+    def _fill(self, box, distance, fill):
+        """Composite `fill` through the coverage of a distance field"""
+        # A one-pixel linear ramp across the edge approximates the pixel's area coverage
+        coverage = np.clip(0.5 - distance, 0.0, 1.0)
+        mask = Image.fromarray(np.rint(coverage * 255).astype(np.uint8), 'L')
+        self.img.paste(fill, box, mask)
+
+    def ellipse(self, xy, fill=None):
+        (left, top), (right, bottom) = _corners(xy)
+        box = _bounds(self.img.size, left, top, right, bottom)
+        if box is None or fill is None:
+            return
+        xs, ys = _grid(box)
+        distance = sd_ellipse(xs, ys, (left + right) / 2, (top + bottom) / 2,
+                              (right - left) / 2, (bottom - top) / 2)
+        self._fill(box, distance, fill)
+
+    def polygon(self, xy, fill=None):
+        self.rounded_polygon(xy, 0, fill)
+
+    def rounded_polygon(self, xy, corner_radius, fill=None):
+        """A polygon with a disk of `corner_radius` unioned onto every vertex"""
+        points = [tuple(point) for point in xy]
+        box = _bounds(self.img.size,
+                      min(x for x, _ in points) - corner_radius,
+                      min(y for _, y in points) - corner_radius,
+                      max(x for x, _ in points) + corner_radius,
+                      max(y for _, y in points) + corner_radius)
+        if box is None or fill is None:
+            return
+        xs, ys = _grid(box)
+        distance = sd_polygon(xs, ys, points)
+        if corner_radius > 0:
+            for x, y in points:
+                distance = np.minimum(distance, sd_circle(xs, ys, x, y, corner_radius))
+        self._fill(box, distance, fill)
+
+    def line(self, xy, fill=None, width=1, joint=None):
+        """Stroke a polyline with flat caps; joint='curve' rounds the inner vertices"""
+        points = [tuple(point) for point in xy]
+        half_width = width / 2
+        box = _bounds(self.img.size,
+                      min(x for x, _ in points) - half_width,
+                      min(y for _, y in points) - half_width,
+                      max(x for x, _ in points) + half_width,
+                      max(y for _, y in points) + half_width)
+        if box is None or fill is None:
+            return
+        xs, ys = _grid(box)
+        distance = None
+        for start, end in zip(points, points[1:]):
+            segment = sd_segment(xs, ys, start, end, half_width)
+            distance = segment if distance is None else np.minimum(distance, segment)
+        if joint == 'curve':
+            for x, y in points[1:-1]:
+                distance = np.minimum(distance, sd_circle(xs, ys, x, y, half_width))
+        self._fill(box, distance, fill)
+
+def _corners(xy):
+    """Normalize [x0, y0, x1, y1] or [(x0, y0), (x1, y1)] to two corner points"""
+    if len(xy) == 2:
+        return tuple(xy[0]), tuple(xy[1])
+    return (xy[0], xy[1]), (xy[2], xy[3])
+
+class OffsetDraw:
+    """Draws shapes given in canvas coordinates onto a tile whose top-left is `origin`"""
+
+    def __init__(self, draw, origin):
+        self.draw = draw
+        self.origin = origin
+
+    def _shift(self, xy):
+        ox, oy = self.origin
+        if len(xy) == 4 and not isinstance(xy[0], (tuple, list)):
+            return [xy[0] - ox, xy[1] - oy, xy[2] - ox, xy[3] - oy]
+        return [(x - ox, y - oy) for x, y in xy]
+
+    def ellipse(self, xy, **options):
+        self.draw.ellipse(self._shift(xy), **options)
+
+    def polygon(self, xy, **options):
+        self.draw.polygon(self._shift(xy), **options)
+
+    def line(self, xy, **options):
+        self.draw.line(self._shift(xy), **options)
+
+    def __getattr__(self, name):
+        # Only offer rounded_polygon when the wrapped backend has it
+        if name == 'rounded_polygon' and hasattr(self.draw, name):
+            return lambda xy, *args, **options: self.draw.rounded_polygon(self._shift(xy), *args,
+                                                                          **options)
+        raise AttributeError(name)
+
+def drawing_context(img, backend='pillow', origin=(0, 0)):
+    """Return the drawing object for a rasterizer backend (offset for tiles at `origin`)"""
+    if backend == 'pillow':
+        draw = ImageDraw.Draw(img)
+    elif backend == 'sdf':
+        draw = SDFDraw(img)
+    else:
+        raise ValueError(f"Unknown backend: {backend} (expected one of {', '.join(BACKENDS)})")
+    return OffsetDraw(draw, origin) if origin != (0, 0) else draw
+
+def _benchmark_scene(draw, scale):
+    """Circles, rounded trapezoids and a stroked polyline at fractional positions"""
+    for i in range(6):
+        x, y = (10.3 + i * 10.7) * scale, (12.6 + i * 3.1) * scale
+        radius = (3.2 + i * 0.9) * scale
+        draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=(255, 152, 0))
+        body = [(x - 2.1 * scale, y + 6.3 * scale), (x + 2.1 * scale, y + 6.3 * scale),
+                (x + 3.4 * scale, y + 10.9 * scale), (x - 3.4 * scale, y + 10.9 * scale)]
+        draw.polygon(body, fill=(255, 255, 255))
+    draw.line([(8.4 * scale, 50.2 * scale), (24.7 * scale, 63.5 * scale), (66.1 * scale, 41.8 * scale)],
+              fill=(76, 175, 80), width=max(1, round(3.6 * scale)), joint='curve')
+
+def _render_scene(size, backend, supersample):
+    canvas = size * supersample
+    img = Image.new('RGB', (canvas, canvas), (33, 150, 243))
+    _benchmark_scene(drawing_context(img, backend), canvas / 80)
+    return img.reduce(supersample) if supersample > 1 else img
+
+def _timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+def run_benchmark(sizes=(76, 180, 1024), repeat=3):
+    """
+    Compare the SDF backend with Pillow at several supersampling levels
+
+    Quality is measured on a scene of the icon's primitives against Pillow at
+    16x supersampling; the full icon is timed at the settings the generators use.
+    """
+    from create_icon_improved import create_bulkmates_icon_improved
+
+    print("⏱️  Primitive scene (error against Pillow at 16x supersampling)")
+    print(f"   {'Size':>5}  {'Renderer':<12} {'Time':>10}  {'Mean err':>9}  {'Max err':>8}")
+    for size in sizes:
+        reference = _render_scene(size, 'pillow', 16)
+        for backend, supersample in (('pillow', 1), ('pillow', 2), ('pillow', 4),
+                                     ('pillow', 8), ('sdf', 1)):
+            img, seconds = _timed(lambda: _render_scene(size, backend, supersample), repeat)
+            diff = np.asarray(ImageChops.difference(img, reference), dtype=np.float64)
+            label = f"{backend} {supersample}x"
+            print(f"   {size:>5}  {label:<12} {seconds * 1000:>8.1f}ms  {diff.mean():>9.3f}  "
+                  f"{diff.max():>8.0f}")
+
+    print()
+    print("⏱️  Full icon render")
+    for size in sizes:
+        for backend, supersample in (('pillow', 4), ('sdf', 1)):
+            _, seconds = _timed(lambda: create_bulkmates_icon_improved(size, supersample,
+                                                                       backend=backend), repeat)
+            label = f"{backend} {supersample}x"
+            print(f"   {size:>5}  {label:<12} {seconds * 1000:>8.1f}ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="BulkMates SDF rasterizer")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="compare the SDF backend with Pillow at several supersampling levels")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[76, 180, 1024],
+                        help="icon sizes to benchmark")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.sizes)
+    else:
+        parser.print_help()
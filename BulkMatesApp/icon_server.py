@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+BulkMates Icon Server
+Serves icon and group badge renders over local HTTP, cached and revalidatable
+
+Endpoints:
+
+    GET /icon?size=180&variant=Dark
+    GET /icon?size=180&palette=E65100,6A1B9A,F9A825,C62828,00897B,4DB6AC&gradient_start=1B5E20
+    GET /badge?size=256&colors=FF9800,9C27B0,4ECDC4&shape=circle
+    GET /metrics
+
+`palette` sets the six person colors, `variant` starts from an entry of the
+variants file, and any of the icon's color entries (gradient_start,
+gradient_end, silhouette_color, center_color, checkmark_color) can be set
+per request; colors are hex without the '#'. `size`, `supersample` and
+`backend` work as in the generators.
+
+Every request is reduced to a content key: build_key over the full render
+parameters, which includes the generator code version. The key is also the
+response's ETag, so a request with a matching If-None-Match is answered 304
+before anything is looked up. Otherwise the PNG comes from an in-memory LRU
+bounded in bytes, then from the on-disk cache, and only then from a render.
+Concurrent requests for a key that is being rendered wait for that render
+instead of starting their own. /metrics reports requests, hit rates per
+layer and latency percentiles as JSON, per endpoint (unknown paths count
+under "other"). A request is counted once its response is ready, before
+it is written, so latencies do not include sending the body.
+
+The server binds to localhost by default and is meant for development and
+internal tools, not for the open internet.
+
+Usage:
+    python3 icon_server.py
+    python3 icon_server.py --port 8765 --memory-mb 128 --cache-dir .icon-server-cache
+    python3 icon_load_test.py --url http://127.0.0.1:8765
+"""
+
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import json
+import math
+import os
+import re
+import threading
+import time
+
+from create_icon_improved import COLOR_KEYS, ICON_DESIGN, create_bulkmates_icon_improved
+from group_badges import MAX_MEMBERS, SHAPES, render_badge
+from icon_build_cache import build_key, file_digest
+from icon_encoder import DEFAULT_PRESET, PRESETS, encode_png
+from icon_resize import write_atomic
+from icon_sdf import BACKENDS
+from icon_variants import load_variants, variant_design
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_DIR = '.icon-server-cache'
+DEFAULT_MEMORY_MB = 64
+DEFAULT_VARIANTS = 'icon_variants.json'
+
+MIN_SIZE = 16
+MAX_SIZE = 2048
+MAX_SUPERSAMPLE = 8
+
+# Largest canvas a request may make the renderer allocate (size * supersample)
+MAX_CANVAS = 4096
+
+# Latencies kept per endpoint for the percentiles in /metrics
+LATENCY_SAMPLES = 10000
+
+HEX = re.compile(r'^#?([0-9A-Fa-f]{6})$')
+
+class BadRequest(ValueError):
+    """A query the server refuses with 400"""
+
+def _one(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+def _int(query, name, default, low, high):
+    value = _one(query, name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise BadRequest(f"'{name}' must be an integer: {value!r}")
+    if not low <= number <= high:
+        raise BadRequest(f"'{name}' must be between {low} and {high}, not {number}")
+    return number
+
+def _choice(query, name, default, choices):
+    value = _one(query, name, default)
+    if value not in choices:
+        raise BadRequest(f"'{name}' must be one of {', '.join(choices)}, not {value!r}")
+    return value
+
+def _color(value, name):
+    match = HEX.match(value.strip())
+    if not match:
+        raise BadRequest(f"'{name}' colors must be RRGGBB hex: {value!r}")
+    return '#' + match.group(1).upper()
+
+def _colors(query, name):
+    value = _one(query, name)
+    if value is None:
+        return None
+    return [_color(color, name) for color in value.replace(';', ',').split(',') if color.strip()]
+
+def _render_options(query, default_size, default_backend):
+    """(size, supersample, backend) of a request, with the canvas bounded by MAX_CANVAS"""
+    size = _int(query, 'size', default_size, MIN_SIZE, MAX_SIZE)
+    backend = _choice(query, 'backend', default_backend, BACKENDS)
+    supersample = _int(query, 'supersample', 1 if backend == 'sdf' else 4, 1, MAX_SUPERSAMPLE)
+    if size * supersample > MAX_CANVAS:
+        raise BadRequest(f"size * supersample must be at most {MAX_CANVAS}, not {size * supersample}")
+    return size, supersample, backend
+
+def _color_overrides(query):
+    return {key: _color(_one(query, key), key) for key in COLOR_KEYS if key in query}
+
+@lru_cache(maxsize=1)
+def _badge_code_version():
+    # group_badges lays out the members, and build_key's code version does not cover it
+    return file_digest(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'group_badges.py'))
+
+def icon_request(query, variants, preset):
+    """(key, render) of an /icon query; render() returns the image"""
+    size, supersample, backend = _render_options(query, 1024, 'pillow')
+    overrides = {}
+    name = _one(query, 'variant')
+    if name is not None:
+        if name not in variants:
+            raise BadRequest(f"Unknown variant {name!r} (available: {', '.join(sorted(variants)) or 'none'})")
+        overrides.update(variants[name])
+    palette = _colors(query, 'palette')
+    if palette is not None:
+        if len(palette) != len(ICON_DESIGN['person_data']):
+            raise BadRequest(f"'palette' needs {len(ICON_DESIGN['person_data'])} colors, not {len(palette)}")
+        overrides['person_colors'] = palette
+    overrides.update(_color_overrides(query))
+    overrides['name'] = name or 'request'
+    try:
+        design = variant_design(overrides)
+    except ValueError as e:
+        raise BadRequest(str(e))
+    if design == ICON_DESIGN:
+        design = None
+
+    key = build_key(design or ICON_DESIGN, size, supersample=supersample, backend=backend,
+                    preset=preset, mode='server-icon')
+    return key, lambda: create_bulkmates_icon_improved(size, supersample, backend=backend,
+                                                       design=design)
+
+def badge_request(query, variants, preset):
+    """(key, render) of a /badge query; render() returns the image"""
+    size, supersample, backend = _render_options(query, 256, 'sdf')
+    shape = _choice(query, 'shape', 'circle', SHAPES)
+    colors = _colors(query, 'colors')
+    if not colors or len(colors) > MAX_MEMBERS:
+        raise BadRequest(f"'colors' needs 1 to {MAX_MEMBERS} member colors")
+    overrides = _color_overrides(query)
+
+    key = build_key({'colors': colors, 'overrides': overrides}, size, supersample=supersample,
+                    backend=backend, shape=shape, preset=preset, mode='server-badge',
+                    layout=_badge_code_version())
+    return key, lambda: render_badge(colors, size, supersample, backend, shape, overrides)
+
+ENDPOINTS = {
+    '/icon': icon_request,
+    '/badge': badge_request,
+}
+
+def etag_matches(header, etag):
+    """Whether an If-None-Match header names `etag` (weak validators compare equal)"""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or etag in [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+
+class RenderCache:
+    """Encoded PNGs in a byte-bounded LRU over an on-disk cache, with request coalescing"""
+
+    def __init__(self, max_bytes, cache_dir=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.evictions = 0
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.png')
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _remember(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = data
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def get(self, key, produce):
+        """
+        Return (png, source) for `key`, calling produce() only on a full miss
+
+        source is 'memory', 'disk', 'render', or 'coalesced' when the request
+        waited for another thread's render of the same key.
+        """
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                return data, 'memory'
+            future = self.in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self.in_flight[key] = Future()
+        if not owner:
+            return future.result(), 'coalesced'
+
+        try:
+            data, source = self._read_disk(key), 'disk'
+            if data is None:
+                data, source = produce(), 'render'
+                if self.cache_dir:
+                    write_atomic(data, self._path(key))
+            self._remember(key, data)
+            future.set_result(data)
+            return data, source
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def info(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                    'evictions': self.evictions}
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))]
+
+class Metrics:
+    """Request counts, cache sources and latencies per endpoint"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.statuses = Counter()
+        self.sources = Counter()
+        self.latencies = {}
+
+    def record(self, endpoint, status, source, seconds):
+        with self.lock:
+            self.statuses[(endpoint, status)] += 1
+            if source:
+                self.sources[(endpoint, source)] += 1
+            self.latencies.setdefault(endpoint, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+
+    def snapshot(self, cache):
+        """Everything /metrics reports, as a JSON-ready dict"""
+        with self.lock:
+            endpoints = {}
+            for endpoint, samples in self.latencies.items():
+                sources = {source: count for (name, source), count in self.sources.items()
+                           if name == endpoint}
+                served = sum(sources.values())
+                cached = served - sources.get('render', 0)
+                ordered = sorted(samples)
+                endpoints[endpoint] = {
+                    'requests': sum(count for (name, _), count in self.statuses.items()
+                                    if name == endpoint),
+                    'status': {str(status): count for (name, status), count
+                               in sorted(self.statuses.items()) if name == endpoint},
+                    'sources': sources,
+                    'hit_rate': cached / served if served else None,
+                    'latency_ms': {
+                        'p50': _ms(percentile(ordered, 0.50)),
+                        'p95': _ms(percentile(ordered, 0.95)),
+                        'p99': _ms(percentile(ordered, 0.99)),
+                        'max': _ms(ordered[-1] if ordered else None),
+                        'samples': len(ordered),
+                    },
+                }
+        return {'uptime_seconds': round(time.time() - self.started, 1),
+                'memory_cache': cache.info(),
+                'endpoints': endpoints}
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+def _json(status, document):
+    return status, json.dumps(document, indent=2).encode() + b'\n', 'application/json', ()
+
+class IconRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'BulkMatesIconServer/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status, body=b'', content_type=None, headers=()):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _respond(self, url):
+        """(status, body, content type, headers, cache source) for one request"""
+        server = self.server
+        if url.path == '/metrics':
+            return _json(200, server.metrics.snapshot(server.cache)) + (None,)
+        endpoint = ENDPOINTS.get(url.path)
+        if endpoint is None:
+            return _json(404, {'error': f"Unknown path {url.path} (try /icon, /badge or /metrics)"}) + (None,)
+
+        try:
+            key, render = endpoint(parse_qs(url.query), server.variants, server.preset)
+        except BadRequest as e:
+            return _json(400, {'error': str(e)}) + (None,)
+        etag = f'"{key}"'
+        headers = [('ETag', etag), ('Cache-Control', 'no-cache')]
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            return 304, b'', None, headers, 'not_modified'
+        try:
+            data, source = server.cache.get(key, lambda: encode_png(render(), server.preset)[0])
+        except Exception as e:
+            return _json(500, {'error': f"Render failed: {e}"}) + (None,)
+        return 200, data, 'image/png', headers + [('X-Cache', source)], source
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        status, body, content_type, headers, source = self._respond(url)
+        # Recorded before the response goes out, so a client that reads /metrics
+        # after its last response sees that response counted
+        endpoint = url.path if url.path in ENDPOINTS or url.path == '/metrics' else 'other'
+        self.server.metrics.record(endpoint, status, source, time.perf_counter() - start)
+        self._send(status, body, content_type, headers)
+
+    do_HEAD = do_GET
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class IconServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, cache, variants, preset=DEFAULT_PRESET, verbose=False):
+        super().__init__(address, IconRequestHandler)
+        self.cache = cache
+        self.variants = variants
+        self.preset = preset
+        self.verbose = verbose
+        self.metrics = Metrics()
+
+def load_server_variants(path):
+    """Variants file entries by name, or none when the file does not exist"""
+    if not path or not os.path.exists(path):
+        return {}
+    return {variant['name']: {key: value for key, value in variant.items() if key != 'appiconset'}
+            for variant in load_variants(path)}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve icon and group badge renders over local HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"address to bind (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"on-disk cache folder, '' to disable (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--memory-mb', type=float, default=DEFAULT_MEMORY_MB,
+                        help=f"in-memory cache size in MB (default: {DEFAULT_MEMORY_MB})")
+    parser.add_argument('--variants', default=DEFAULT_VARIANTS,
+                        help=f"variants file for ?variant= (default: {DEFAULT_VARIANTS})")
+    parser.add_argument('--png-preset', choices=PRESETS, default=DEFAULT_PRESET,
+                        help=f"PNG encoder preset (default: {DEFAULT_PRESET})")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    cache = RenderCache(int(args.memory_mb * 1024 * 1024), args.cache_dir or None)
+    server = IconServer((args.host, args.port), cache, load_server_variants(args.variants),
+                        args.png_preset, args.verbose)
+    host, port = server.server_address[:2]
+    print(f"🌐 Serving icons on http://{host}:{port}/icon (badges on /badge, metrics on /metrics)")
+    print(f"   memory cache {args.memory_mb:g} MB, disk cache {args.cache_dir or 'off'}, "
+          f"{len(server.variants)} variants")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    finally:
+        server.server_close()
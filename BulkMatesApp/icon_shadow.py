@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+BulkMates Shadow Sprites
+Renders each drop shadow once as a Gaussian-blurred sprite and stamps it
+
+A shadow is described by a ShadowSpec (radius, blur, offset, opacity). The
+first request for a spec rasterizes and blurs a single disk; every later
+circle with the same spec reuses the cached sprite and is composited only
+inside its own bounding box.
+
+Usage:
+    python3 icon_shadow.py --benchmark
+"""
+
+from PIL import Image, ImageChops, ImageDraw, ImageFilter
+from collections import namedtuple
+from functools import lru_cache
+import argparse
+import math
+import time
+
+from icon_profile import profile_stage
+
+# radius: circle radius in px, blur: soft edge length in px (same meaning as the
+# old stacked-ellipse `shadow_blur`), offset: (dx, dy) in px, opacity: 0.0 - 1.0
+ShadowSpec = namedtuple('ShadowSpec', ['radius', 'blur', 'offset', 'opacity'])
+
+# image: black RGBA sprite, mask: its alpha channel,
+# origin: top-left corner relative to the center of the circle casting it
+ShadowSprite = namedtuple('ShadowSprite', ['image', 'mask', 'origin'])
+
+@lru_cache(maxsize=64)
+def shadow_sprite(spec):
+    """Rasterize and blur the shadow for `spec` (cached per spec)"""
+    with profile_stage('shadow_sprite', radius=round(spec.radius, 1)):
+        return _build_shadow_sprite(spec)
+
+def _build_shadow_sprite(spec):
+    """Rasterize and blur one shadow sprite"""
+    radius, blur, (offset_x, offset_y), opacity = spec
+
+    # The old shadows faded linearly over blur / 2 px outside the circle.
+    # A Gaussian with sigma = blur / 5 has the same 10-90% edge width, and
+    # growing the disk by blur / 4 puts the half-way point in the same place.
+    sigma = blur / 5
+    disk_radius = radius + blur / 4
+    padding = math.ceil(3 * sigma) + 1
+    half = math.ceil(disk_radius) + padding
+    extent = 2 * half + 1
+
+    mask = Image.new('L', (extent, extent), 0)
+    ImageDraw.Draw(mask).ellipse(
+        [half - disk_radius, half - disk_radius, half + disk_radius, half + disk_radius],
+        fill=255
+    )
+    if sigma > 0:
+        mask = mask.filter(ImageFilter.GaussianBlur(sigma))
+    peak = round(255 * opacity)
+    mask = mask.point(lambda value: (value * peak + 127) // 255)
+
+    image = Image.new('RGBA', mask.size, (0, 0, 0, 0))
+    image.putalpha(mask)
+    origin = (round(offset_x) - half, round(offset_y) - half)
+    return ShadowSprite(image, mask, origin)
+
+def _clip(img_size, left, top, width, height):
+    """Clip a sprite placed at (left, top) to the image, returning (dest box, source box)"""
+    dest_left, dest_top = max(left, 0), max(top, 0)
+    dest_right = min(left + width, img_size[0])
+    dest_bottom = min(top + height, img_size[1])
+    if dest_right <= dest_left or dest_bottom <= dest_top:
+        return None, None
+
+    source = (dest_left - left, dest_top - top, dest_right - left, dest_bottom - top)
+    return (dest_left, dest_top, dest_right, dest_bottom), source
+
+def stamp_shadow(img, center, spec, origin=(0, 0)):
+    """
+    Composite the cached shadow for `spec` under a circle centered at `center`
+
+    `origin` is the canvas position of the image's top-left pixel, for
+    stamping onto one tile of a larger canvas.
+    """
+    sprite = shadow_sprite(spec)
+    left = int(round(center[0])) + sprite.origin[0] - origin[0]
+    top = int(round(center[1])) + sprite.origin[1] - origin[1]
+    dest, source = _clip(img.size, left, top, *sprite.image.size)
+    if dest is None:
+        return
+
+    if img.mode == 'RGBA':
+        with profile_stage('shadow_composite'):
+            img.alpha_composite(sprite.image, dest=dest[:2], source=source)
+    else:
+        # Opaque canvas: darkening through the alpha mask is the same composite
+        # and needs no RGBA copy of the canvas.
+        mask = sprite.mask if source == (0, 0) + sprite.mask.size else sprite.mask.crop(source)
+        img.paste((0, 0, 0), dest, mask)
+
+def _reference_shadow_passes(img, person_centers, person_radius, center, center_radius):
+    """Original stacked-ellipse shadows on full-canvas layers, kept for benchmarks"""
+    size = img.size
+    shadow_layer = Image.new('RGBA', size, (0, 0, 0, 0))
+    shadow_draw = ImageDraw.Draw(shadow_layer, 'RGBA')
+    for person_x, person_y in person_centers:
+        shadow_blur = 20
+        shadow_offset_y = 6
+        for j in range(shadow_blur, 0, -1):
+            alpha = int(64 * (1 - j / shadow_blur))
+            shadow_draw.ellipse(
+                [person_x - person_radius - j//2,
+                 person_y - person_radius - j//2 + shadow_offset_y,
+                 person_x + person_radius + j//2,
+                 person_y + person_radius + j//2 + shadow_offset_y],
+                fill=(0, 0, 0, alpha)
+            )
+    img = Image.alpha_composite(img.convert('RGBA'), shadow_layer).convert('RGB')
+
+    center_shadow_layer = Image.new('RGBA', size, (0, 0, 0, 0))
+    center_shadow_draw = ImageDraw.Draw(center_shadow_layer, 'RGBA')
+    shadow_blur = 30
+    shadow_offset_y = 10
+    for j in range(shadow_blur, 0, -1):
+        alpha = int(77 * (1 - j / shadow_blur))
+        center_shadow_draw.ellipse(
+            [center[0] - center_radius - j//2,
+             center[1] - center_radius - j//2 + shadow_offset_y,
+             center[0] + center_radius + j//2,
+             center[1] + center_radius + j//2 + shadow_offset_y],
+            fill=(0, 0, 0, alpha)
+        )
+    return Image.alpha_composite(img.convert('RGBA'), center_shadow_layer).convert('RGB')
+
+def _sprite_shadow_passes(img, person_centers, person_radius, center, center_radius):
+    """The same shadows drawn through the sprite cache"""
+    img = img.copy()
+    person_shadow = ShadowSpec(person_radius, 20, (0, 6), 0.25)
+    for person_center in person_centers:
+        stamp_shadow(img, person_center, person_shadow)
+    stamp_shadow(img, center, ShadowSpec(center_radius, 30, (0, 10), 0.3))
+    return img
+
+def run_benchmark(repeat=5):
+    """Compare stacked-ellipse shadows with cached sprites on the improved icon layout"""
+    from icon_gradient import create_gradient_background
+
+    size = (1024, 1024)
+    center = (512, 512)
+    person_radius = 70
+    center_radius = 100
+    person_centers = []
+    for angle in (-90, -30, 30, 90, 150, 210):
+        angle_rad = math.radians(angle)
+        person_centers.append((int(center[0] + 320 * math.cos(angle_rad)),
+                               int(center[1] + 320 * math.sin(angle_rad))))
+
+    base = create_gradient_background(size, (0x4C, 0xAF, 0x50), (0x21, 0x96, 0xF3))
+    draw = ImageDraw.Draw(base)
+    for x, y in person_centers:
+        draw.ellipse([x - person_radius, y - person_radius,
+                      x + person_radius, y + person_radius], fill=(0xFF, 0x98, 0x00))
+
+    def best_of(passes):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = passes(base, person_centers, person_radius, center, center_radius)
+            timings.append(time.perf_counter() - start)
+        return result, min(timings)
+
+    reference, reference_time = best_of(_reference_shadow_passes)
+    shadow_sprite.cache_clear()
+    start = time.perf_counter()
+    _sprite_shadow_passes(base, person_centers, person_radius, center, center_radius)
+    cold_time = time.perf_counter() - start
+    result, sprite_time = best_of(_sprite_shadow_passes)
+
+    deviation = max(high for _, high in ImageChops.difference(reference, result).getextrema())
+
+    print("⏱️  Shadow benchmark (6 person shadows + center shadow, 1024 px)")
+    print(f"   Stacked ellipses:  {reference_time * 1000:8.1f}ms")
+    print(f"   Sprites (cold):    {cold_time * 1000:8.1f}ms")
+    print(f"   Sprites (cached):  {sprite_time * 1000:8.1f}ms  "
+          f"({reference_time / sprite_time:.1f}x faster)")
+    print(f"   Max pixel deviation: {deviation}/255")
+    return deviation
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="BulkMates shadow sprites")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="compare cached sprites against the stacked-ellipse shadows")
+    parser.add_argument('--repeat', type=int, default=5, help="timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.repeat)
+    else:
+        parser.print_help()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+BulkMates Icon Shapes
+The shapes icon scenes are built from
+
+Every shape kind a scene node can use is listed in SHAPES with two
+functions: `draw(draw, center, params, scale)` fills the shape with 255 on a
+mask, and `bounds(center, params, scale)` returns the (left, top, right,
+bottom) box it stays inside. `center` is in canvas pixels; `params` are the
+node's parameters in pixels on the scene's reference canvas and are
+multiplied by `scale`.
+
+The improved design's person silhouette and checkmark live here; the
+original design's person icon and checkmark are the ones in create_icon.py.
+"""
+
+from create_icon import draw_checkmark as draw_classic_checkmark, draw_person_icon
+
+def draw_checkmark(draw, center, width, height, color, stroke_width):
+    """Draw a bold checkmark symbol"""
+    x, y = center
+
+    # Checkmark shape - two lines forming a check
+    # Adjusted for better visibility
+
+    # Starting point (left side)
+    start_x = x - width * 0.4
+    start_y = y
+
+    # Middle point (bottom of checkmark)
+    mid_x = x - width * 0.1
+    mid_y = y + height * 0.3
+
+    # End point (top right)
+    end_x = x + width * 0.4
+    end_y = y - height * 0.3
+
+    # Draw the two lines with thick stroke
+    draw.line([(start_x, start_y), (mid_x, mid_y)], fill=color, width=stroke_width, joint='curve')
+    draw.line([(mid_x, mid_y), (end_x, end_y)], fill=color, width=stroke_width, joint='curve')
+
+def draw_person_silhouette(draw, center, circle_radius, color, scale=1.0):
+    """
+    Draw a clear, recognizable person silhouette
+    - Circle for head
+    - Rounded trapezoid for shoulders/body
+
+    Sizes are in pixels on the 1024px canvas and multiplied by `scale`.
+    The SDF backend draws the body as one rounded trapezoid.
+    """
+    x, y = center
+
+    # HEAD - White circle
+    head_radius = 17.5 * scale  # 35px diameter
+    head_center_y = y - circle_radius * 0.25  # Position in upper part of circle
+
+    draw.ellipse(
+        [x - head_radius, head_center_y - head_radius,
+         x + head_radius, head_center_y + head_radius],
+        fill=color
+    )
+
+    # SHOULDERS/BODY - Rounded trapezoid shape
+    # Create a trapezoid that's wider at bottom (shoulders)
+
+    body_top_y = head_center_y + head_radius + 3 * scale  # Small gap below head
+    body_height = 45 * scale
+    body_top_width = 22.5 * scale  # 45px total width at top
+    body_bottom_width = 32.5 * scale  # 65px total width at bottom
+
+    # Create trapezoid points
+    # Top-left, top-right, bottom-right, bottom-left
+    body_points = [
+        (x - body_top_width, body_top_y),  # Top-left
+        (x + body_top_width, body_top_y),  # Top-right
+        (x + body_bottom_width, body_top_y + body_height),  # Bottom-right
+        (x - body_bottom_width, body_top_y + body_height),  # Bottom-left
+    ]
+
+    corner_radius = 8 * scale
+    if hasattr(draw, 'rounded_polygon'):
+        draw.rounded_polygon(body_points, corner_radius, fill=color)
+        return
+
+    # Draw filled polygon for body
+    draw.polygon(body_points, fill=color)
+
+    # Add rounded corners by drawing circles at the corners
+    # Top corners
+    draw.ellipse([x - body_top_width - corner_radius, body_top_y - corner_radius,
+                  x - body_top_width + corner_radius, body_top_y + corner_radius], fill=color)
+    draw.ellipse([x + body_top_width - corner_radius, body_top_y - corner_radius,
+                  x + body_top_width + corner_radius, body_top_y + corner_radius], fill=color)
+    # Bottom corners
+    draw.ellipse([x - body_bottom_width - corner_radius, body_top_y + body_height - corner_radius,
+                  x - body_bottom_width + corner_radius, body_top_y + body_height + corner_radius], fill=color)
+    draw.ellipse([x + body_bottom_width - corner_radius, body_top_y + body_height - corner_radius,
+                  x + body_bottom_width + corner_radius, body_top_y + body_height + corner_radius], fill=color)
+
+def _circle(draw, center, params, scale):
+    x, y = center
+    radius = params['radius'] * scale
+    draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=255)
+
+def _circle_bounds(center, params, scale):
+    x, y = center
+    radius = params['radius'] * scale
+    return (x - radius, y - radius, x + radius, y + radius)
+
+def _silhouette(draw, center, params, scale):
+    draw_person_silhouette(draw, center, params['radius'] * scale, 255, scale * params['scale'])
+
+def _silhouette_bounds(center, params, scale):
+    x, y = center
+    size = scale * params['scale']
+    head_y = y - params['radius'] * scale * 0.25
+    # Head top to body bottom, with the body's rounded corners
+    return (x - 40.5 * size, head_y - 17.5 * size, x + 40.5 * size, head_y + 73.5 * size)
+
+def _checkmark(draw, center, params, scale):
+    draw_checkmark(draw, center, params['width'] * scale, params['height'] * scale, 255,
+                   max(1, round(params['stroke'] * scale)))
+
+def _checkmark_bounds(center, params, scale):
+    x, y = center
+    stroke = max(1, round(params['stroke'] * scale))
+    width, height = params['width'] * scale, params['height'] * scale
+    return (x - width * 0.4 - stroke, y - height * 0.3 - stroke,
+            x + width * 0.4 + stroke, y + height * 0.3 + stroke)
+
+def _person_icon(draw, center, params, scale):
+    draw_person_icon(draw, center, params['size'] * scale, 255)
+
+def _person_icon_bounds(center, params, scale):
+    x, y = center
+    size = params['size'] * scale
+    return (x - size * 0.35, y - size * 0.33, x + size * 0.35, y + size * 0.475)
+
+def _classic_checkmark(draw, center, params, scale):
+    draw_classic_checkmark(draw, center, params['size'] * scale, 255,
+                           max(1, round(params['stroke'] * scale)))
+
+def _classic_checkmark_bounds(center, params, scale):
+    x, y = center
+    stroke = max(1, round(params['stroke'] * scale))
+    size = params['size'] * scale
+    return (x - size * 0.35 - stroke, y - size * 0.25 - stroke,
+            x + size * 0.35 + stroke, y + size * 0.25 + stroke)
+
+# Shape kind -> (draw, bounds, required parameters)
+SHAPES = {
+    'circle': (_circle, _circle_bounds, ('radius',)),
+    'silhouette': (_silhouette, _silhouette_bounds, ('radius', 'scale')),
+    'checkmark': (_checkmark, _checkmark_bounds, ('width', 'height', 'stroke')),
+    'person_icon': (_person_icon, _person_icon_bounds, ('size',)),
+    'classic_checkmark': (_classic_checkmark, _classic_checkmark_bounds, ('size', 'stroke')),
+}
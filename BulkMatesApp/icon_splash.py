@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+BulkMates Splash Icon
+Renders SplashIcon.imageset at the size the app displays it, per scale
+
+The app shows the SplashIcon asset at up to 180pt (ContentView; the login
+and sign-up screens use 120pt and 90pt), so the image set gets @1x, @2x and
+@3x files of 180, 360 and 540px instead of one 1024px image that every
+device decodes in full at launch. Each file is rendered natively and its
+Contents.json entry is updated.
+
+Every file must fit a byte budget. The lossless PNG is used when it fits;
+otherwise palette quantization is tried at decreasing color counts and the
+first candidate that fits and stays at or above the SSIM floor (the lowest
+per-channel SSIM, so palette banding in color counts) wins. If none does,
+the run fails. The report lists the decoded size of each variant (4
+bytes per pixel, as iOS holds it in memory) next to its file size.
+
+Usage:
+    python3 icon_splash.py
+    python3 icon_splash.py --points 180 --budget 24000 --min-ssim 0.995
+"""
+
+from PIL import Image
+from collections import namedtuple
+import argparse
+import io
+import os
+import time
+
+from create_icon_improved import ICON_DESIGN, create_bulkmates_icon_improved
+from icon_build_cache import BuildCache, build_key
+from icon_catalog import load_contents, write_contents
+from icon_encoder import encode_png
+from icon_resize import channel_ssim, write_atomic
+from icon_sdf import BACKENDS
+from image_optimizer import PNG_COLORS
+
+SPLASH_DIR = 'BulkMatesApp/Assets.xcassets/SplashIcon.imageset'
+
+# Largest frame the app shows SplashIcon in, in points
+SPLASH_POINTS = 180
+SPLASH_SCALES = (1, 2, 3)
+
+# Per-file byte budget, and the lowest SSIM a quantized file may have
+DEFAULT_BUDGET = 32 * 1024
+DEFAULT_MIN_SSIM = 0.995
+
+# Bytes per decoded pixel (8-bit RGBA)
+DECODED_BYTES_PER_PIXEL = 4
+
+# setting: 'lossless', 'N colors' or 'up to date'; ssim: None when lossless
+# or skipped; decoded: bytes of the decoded image in memory
+SplashResult = namedtuple('SplashResult', ['path', 'scale', 'pixels', 'bytes', 'setting', 'ssim',
+                                           'decoded', 'seconds', 'within_budget'])
+
+def splash_filename(scale):
+    """splash-icon.png, splash-icon@2x.png, ..."""
+    return 'splash-icon.png' if scale == 1 else f'splash-icon@{scale}x.png'
+
+def splash_targets(points=SPLASH_POINTS, scales=SPLASH_SCALES, directory=SPLASH_DIR):
+    """(path, scale, pixels) of every splash file"""
+    return [(os.path.join(directory, splash_filename(scale)), scale, round(points * scale))
+            for scale in scales]
+
+def update_splash_contents(scales=SPLASH_SCALES, directory=SPLASH_DIR):
+    """Point each scale's Contents.json entry at its file; returns True if it was written"""
+    contents = load_contents(directory)
+    entries = {entry.get('scale'): entry for entry in contents['images']}
+    images = []
+    for scale in scales:
+        entry = dict(entries.get(f'{scale}x', {'idiom': 'universal', 'scale': f'{scale}x'}))
+        entry['filename'] = splash_filename(scale)
+        images.append(entry)
+    contents['images'] = images
+    return write_contents(directory, contents)
+
+def encode_within_budget(img, budget=DEFAULT_BUDGET, min_ssim=DEFAULT_MIN_SSIM):
+    """
+    Encode the least lossy PNG that fits the budget; returns (data, setting, ssim, fits)
+
+    Without a fitting candidate, the smallest one that meets the SSIM floor
+    is returned with `fits` False.
+    """
+    data, _ = encode_png(img, 'smallest')
+    if len(data) <= budget:
+        return data, 'lossless', None, True
+
+    best = (data, 'lossless', None)
+    for colors in PNG_COLORS:
+        candidate, _ = encode_png(img.quantize(colors, method=Image.Quantize.MEDIANCUT), 'smallest')
+        similarity = channel_ssim(img, Image.open(io.BytesIO(candidate)).convert(img.mode))
+        if similarity < min_ssim:
+            break
+        if len(candidate) <= budget:
+            return candidate, f'{colors} colors', similarity, True
+        if len(candidate) < len(best[0]):
+            best = (candidate, f'{colors} colors', similarity)
+    return best + (False,)
+
+def render_splash(cache, points=SPLASH_POINTS, scales=SPLASH_SCALES, budget=DEFAULT_BUDGET,
+                  min_ssim=DEFAULT_MIN_SSIM, supersample=4, backend='pillow', directory=SPLASH_DIR):
+    """
+    Render every splash scale within the byte budget and update Contents.json
+
+    Fresh files are skipped and rendered ones recorded in `cache`, a
+    BuildCache the caller saves (shared with the app icon build, so one
+    manifest holds both).
+    """
+    results = []
+    for path, scale, pixels in splash_targets(points, scales, directory):
+        decoded = pixels * pixels * DECODED_BYTES_PER_PIXEL
+        key = build_key(ICON_DESIGN, pixels, supersample=supersample, backend=backend,
+                        mode='splash', budget=budget, min_ssim=min_ssim)
+        if cache.is_fresh(path, key):
+            size = os.path.getsize(path)
+            results.append(SplashResult(path, scale, pixels, size, 'up to date', None, decoded, 0.0,
+                                        size <= budget))
+            continue
+        start = time.perf_counter()
+        icon = create_bulkmates_icon_improved(pixels, supersample, backend=backend)
+        data, setting, similarity, fits = encode_within_budget(icon, budget, min_ssim)
+        write_atomic(data, path)
+        cache.record(path, key)
+        results.append(SplashResult(path, scale, pixels, len(data), setting, similarity, decoded,
+                                    time.perf_counter() - start, fits))
+
+    # The single 1024px file of the old image set is replaced by the scales
+    if update_splash_contents(scales, directory):
+        print(f"💾 Updated {directory}/Contents.json")
+    return results
+
+def print_splash_report(results, budget, points=SPLASH_POINTS):
+    """Print bytes, encoder setting and decoded memory per scale"""
+    full = 1024 * 1024 * DECODED_BYTES_PER_PIXEL
+    print(f"🚀 Splash icon at {points:g}pt (budget {budget:,} bytes per file)")
+    for result in results:
+        similarity = f"SSIM {result.ssim:.4f}" if result.ssim is not None else ''
+        status = '✅' if result.within_budget else '❌'
+        print(f"   {status} {os.path.basename(result.path):<22} @{result.scale}x {result.pixels:>5}px "
+              f"{result.bytes:>9,} bytes  {result.setting:<11} {similarity:<12} "
+              f"decoded {result.decoded / 1024:7.1f} KB ({result.decoded / full:.0%} of the 1024px image)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render the splash icon for every scale within a byte budget")
+    parser.add_argument('--points', type=float, default=SPLASH_POINTS,
+                        help=f"largest size the app displays the splash icon at, in points "
+                             f"(default: {SPLASH_POINTS})")
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET,
+                        help=f"byte budget per file (default: {DEFAULT_BUDGET})")
+    parser.add_argument('--min-ssim', type=float, default=DEFAULT_MIN_SSIM,
+                        help=f"lowest SSIM a quantized file may have (default: {DEFAULT_MIN_SSIM})")
+    parser.add_argument('--supersample', type=int,
+                        help="supersampling factor (default: 4 with the pillow backend, 1 with sdf)")
+    parser.add_argument('--backend', choices=BACKENDS, default='pillow',
+                        help="rasterizer: pillow or sdf (default: pillow)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild every file even if the build cache says it is up to date")
+    args = parser.parse_args()
+
+    supersample = args.supersample or (1 if args.backend == 'sdf' else 4)
+    cache = BuildCache(force=args.force)
+    results = render_splash(cache, args.points, SPLASH_SCALES, args.budget, args.min_ssim,
+                            supersample, args.backend)
+    cache.save()
+    cache.print_report()
+    print_splash_report(results, args.budget, args.points)
+    if not all(result.within_budget for result in results):
+        print(f"❌ Some splash files exceed the {args.budget:,} byte budget")
+        raise SystemExit(1)
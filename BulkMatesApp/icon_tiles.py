@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+BulkMates Tiled Renderer
+Renders poster-size icons in bands across CPU cores and streams them into a PNG
+
+The canvas is split into bands of full-width rows (PNG stores scanlines top
+to bottom, so bands can be written as soon as they are ready). Each band is
+rendered independently by create_bulkmates_icon_improved(rows=...), with the
+gradient, shapes and shadows clipped to it, then filtered and deflated in the
+worker. The parent only concatenates the compressed bands, so neither the
+full canvas nor the raw image is ever held in memory.
+
+Bands are compressed as independent deflate segments ending on a sync flush
+(the technique used by pigz), which together form one valid zlib stream.
+
+Usage:
+    python3 icon_tiles.py --size 8192 --output BulkMatesIcon-8192-Improved.png
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import numpy as np
+import os
+import struct
+import tempfile
+import time
+import zlib
+
+from create_icon_improved import create_bulkmates_icon_improved
+from icon_profile import is_profiling, profile_stage
+from icon_resize import available_cores
+from icon_sdf import BACKENDS
+
+# Canvas pixels per band (supersampled), which bounds each worker's memory
+TILE_PIXELS = 1 << 23
+
+# Largest IDAT chunk written
+IDAT_CHUNK_BYTES = 1 << 20
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def band_rows(size, supersample=1, tile_pixels=TILE_PIXELS):
+    """Output rows per band so a band's working canvas stays near `tile_pixels`"""
+    canvas = size * supersample
+    return min(size, max(1, tile_pixels // (canvas * supersample)))
+
+def _filter_sub(pixels):
+    """Apply PNG filter type 1 (Sub) to an (rows, width, 3) array; returns the scanline bytes"""
+    rows = pixels.reshape(pixels.shape[0], -1)
+    filtered = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+    filtered[:, 0] = 1
+    filtered[:, 1:4] = rows[:, :3]
+    np.subtract(rows[:, 3:], rows[:, :-3], out=filtered[:, 4:])
+    return filtered.tobytes()
+
+def _render_band(size, supersample, rows, backend, design, level, last):
+    """Render, filter and deflate one band; returns (compressed, adler32, raw length)"""
+    with profile_stage('band', rows=f"{rows[0]}-{rows[1]}"):
+        band = create_bulkmates_icon_improved(size, supersample, backend=backend, design=design,
+                                              rows=rows)
+        with profile_stage('deflate'):
+            raw = _filter_sub(np.asarray(band))
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+            data = compressor.compress(raw)
+            data += compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return data, zlib.adler32(raw), len(raw)
+
+def adler32_combine(adler1, adler2, length2):
+    """Adler-32 of two concatenated buffers from their checksums (port of zlib's adler32_combine)"""
+    base = 65521
+    remainder = length2 % base
+    sum1 = adler1 & 0xffff
+    sum2 = (remainder * sum1) % base
+    sum1 += (adler2 & 0xffff) + base - 1
+    sum2 += (adler1 >> 16) + (adler2 >> 16) + base - remainder
+    if sum1 >= base:
+        sum1 -= base
+    if sum1 >= base:
+        sum1 -= base
+    if sum2 >= base << 1:
+        sum2 -= base << 1
+    if sum2 >= base:
+        sum2 -= base
+    return sum1 | (sum2 << 16)
+
+def _write_chunk(f, kind, data):
+    f.write(struct.pack('>I', len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+def render_tiled(output_path, size, supersample=1, backend='pillow', design=None,
+                 rows_per_band=None, max_workers=None, level=6):
+    """
+    Render the icon at `size` band by band and stream it into `output_path` as PNG
+
+    Bands render in a process pool (in-process with one worker, or while
+    profiling); at most two bands per worker are in flight, so memory stays
+    bounded however large the icon. The file is written next to the output
+    and renamed into place when complete. Returns (bytes written, workers).
+    """
+    rows_per_band = rows_per_band or band_rows(size, supersample)
+    bands = [(top, min(top + rows_per_band, size)) for top in range(0, size, rows_per_band)]
+    workers = 1 if is_profiling() else min(max_workers or available_cores(), len(bands))
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(PNG_SIGNATURE)
+            # 8-bit RGB, no interlacing
+            _write_chunk(f, b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0))
+
+            pending = bytearray(b'\x78\x9c')  # zlib header: deflate, 32K window
+            adler = 1
+            for data, band_adler, length in _band_results(bands, size, supersample, backend,
+                                                          design, level, workers):
+                pending += data
+                adler = adler32_combine(adler, band_adler, length)
+                while len(pending) >= IDAT_CHUNK_BYTES:
+                    _write_chunk(f, b'IDAT', bytes(pending[:IDAT_CHUNK_BYTES]))
+                    del pending[:IDAT_CHUNK_BYTES]
+            pending += struct.pack('>I', adler)
+            _write_chunk(f, b'IDAT', bytes(pending))
+            _write_chunk(f, b'IEND', b'')
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return os.path.getsize(output_path), workers
+
+def _band_results(bands, size, supersample, backend, design, level, workers):
+    """Yield the compressed bands in order, rendering ahead by two bands per worker"""
+    jobs = [(size, supersample, rows, backend, design, level, i == len(bands) - 1)
+            for i, rows in enumerate(bands)]
+    if workers == 1:
+        for job in jobs:
+            yield _render_band(*job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for job in jobs:
+            in_flight.append(pool.submit(_render_band, *job))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render a poster-size icon in bands across CPU cores")
+    parser.add_argument('--size', type=int, default=8192, help="output size in pixels (default: 8192)")
+    parser.add_argument('--output', help="output PNG (default: BulkMatesIcon-SIZE-Improved.png)")
+    parser.add_argument('--supersample', type=int,
+                        help="supersampling factor (default: 2 with the pillow backend, 1 with sdf)")
+    parser.add_argument('--backend', choices=BACKENDS, default='sdf',
+                        help="rasterizer: pillow or sdf (default: sdf)")
+    parser.add_argument('--band-rows', type=int, help="output rows per band (default: automatic)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: all cores)")
+    parser.add_argument('--level', type=int, default=6, help="zlib compression level (default: 6)")
+    args = parser.parse_args()
+
+    supersample = args.supersample or (1 if args.backend == 'sdf' else 2)
+    output_path = args.output or f'BulkMatesIcon-{args.size}-Improved.png'
+    print(f"🧱 Rendering a {args.size}x{args.size} icon in bands "
+          f"({args.backend} backend, {supersample}x supersampling)...")
+    start = time.perf_counter()
+    written, workers = render_tiled(output_path, args.size, supersample, args.backend,
+                                    rows_per_band=args.band_rows, max_workers=args.workers,
+                                    level=args.level)
+    print(f"✅ Wrote {output_path} in {time.perf_counter() - start:.2f}s using {workers} "
+          f"worker{'s' if workers != 1 else ''} ({written / 2**20:.1f} MB)")
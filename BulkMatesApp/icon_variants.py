@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+BulkMates Icon Variants
+Renders alternate app icons, appearances and colorways in one batch
+
+A variants file (JSON, or YAML when PyYAML is installed) lists variants that
+override entries of ICON_DESIGN:
+
+    {
+      "variants": [
+        {"name": "Dark", "gradient_start": "#1B5E20", "gradient_end": "#0D47A1",
+         "person_colors": ["#E65100", "#6A1B9A", "#F9A825", "#C62828", "#00897B", "#4DB6AC"]}
+      ]
+    }
+
+`person_colors` replaces the colors of person_data and keeps its angles.
+Every variant gets the full iOS size set in its own AppIcon-<name>.appiconset
+with a matching Contents.json. All variants render in one process, so the
+shape masks and shadow sprites, which do not depend on color, are built once
+per size and shared by every variant with the same geometry.
+
+Usage:
+    python3 icon_variants.py icon_variants.json
+    python3 icon_variants.py icon_variants.json --only Dark --force
+"""
+
+import argparse
+import json
+import os
+import time
+
+from create_icon_improved import ICON_DESIGN, create_bulkmates_icon_improved, size_hints
+from icon_build_cache import BuildCache, build_key
+from icon_catalog import APPICON_DIR, catalog_targets, dedupe_targets, load_contents, write_contents
+from icon_encoder import DEFAULT_PRESET, PRESETS
+from icon_resize import IconResult, copy_outputs, print_summary, save_png_atomic
+from icon_scene import scene_plan
+from icon_sdf import BACKENDS
+from icon_shadow import shadow_sprite
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+ASSET_CATALOG = 'BulkMatesApp/Assets.xcassets'
+
+def load_variants(path):
+    """Read a variants file and return its list of variant dicts"""
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise RuntimeError("PyYAML is required for YAML variant files (pip install pyyaml)")
+            document = yaml.safe_load(f)
+        else:
+            document = json.load(f)
+    variants = document['variants'] if isinstance(document, dict) else document
+    names = [variant.get('name') for variant in variants]
+    if None in names or len(set(names)) != len(names):
+        raise ValueError("Every variant needs a unique 'name'")
+    return variants
+
+def variant_design(variant):
+    """Apply a variant's overrides to ICON_DESIGN"""
+    design = dict(ICON_DESIGN)
+    for key, value in variant.items():
+        if key in ('name', 'appiconset'):
+            continue
+        if key == 'person_colors':
+            if len(value) != len(design['person_data']):
+                raise ValueError(f"Variant '{variant['name']}': person_colors needs "
+                                 f"{len(design['person_data'])} colors")
+            design['person_data'] = [(color, angle) for color, (_, angle)
+                                     in zip(value, design['person_data'])]
+        elif key in design:
+            design[key] = value
+        else:
+            raise ValueError(f"Variant '{variant['name']}': unknown design key '{key}'")
+    return design
+
+def appiconset_dir(variant, catalog=ASSET_CATALOG):
+    """Output directory of a variant inside the asset catalog"""
+    return os.path.join(catalog, variant.get('appiconset', f"AppIcon-{variant['name']}.appiconset"))
+
+def render_variants(variants, catalog=ASSET_CATALOG, supersample=4, backend='pillow',
+                    preset=DEFAULT_PRESET, force=False):
+    """
+    Render the full size set of every variant, skipping outputs that are up to date
+
+    The slots (and Contents.json) are those of the main AppIcon set. Sizes are
+    the outer loop so each size's layers are built once and reused by all
+    variants before moving on.
+    """
+    designs = {variant['name']: variant_design(variant) for variant in variants}
+    output_dirs = {variant['name']: appiconset_dir(variant, catalog) for variant in variants}
+    contents = load_contents(APPICON_DIR)
+    for output_dir in output_dirs.values():
+        os.makedirs(output_dir, exist_ok=True)
+        write_contents(output_dir, contents)
+
+    # Slots sharing a pixel size are rendered once and copied
+    targets = [(os.path.basename(path), size) for path, size in catalog_targets(APPICON_DIR)]
+    unique, duplicates = dedupe_targets(targets)
+    keys, copies = {}, {}
+    for name, design in designs.items():
+        for filename, size in targets:
+            keys[os.path.join(output_dirs[name], filename)] = build_key(
+                design, size, supersample=supersample, hints=size_hints(size), preset=preset,
+                backend=backend, mode='variant')
+        for filename, others in duplicates.items():
+            copies[os.path.join(output_dirs[name], filename)] = [
+                os.path.join(output_dirs[name], other) for other in others]
+
+    cache = BuildCache(force=force)
+    results = []
+    start = time.perf_counter()
+    for filename, size in unique:
+        for name, design in designs.items():
+            path = os.path.join(output_dirs[name], filename)
+            group = [path] + copies.get(path, [])
+            if all([cache.is_fresh(member, keys[member]) for member in group]):
+                continue
+            render_start = time.perf_counter()
+            icon = create_bulkmates_icon_improved(size, supersample, backend=backend, design=design)
+            written, encode_seconds = save_png_atomic(icon, path, preset)
+            results.append(IconResult(path, size, written, time.perf_counter() - render_start,
+                                      encode_seconds))
+    results += copy_outputs(results, copies)
+    for result in results:
+        cache.record(result.path, keys[result.path])
+    cache.save()
+
+    cache.print_report()
+    if results:
+        print_summary(results, time.perf_counter() - start, 1)
+        layers, sprites = scene_plan.cache_info(), shadow_sprite.cache_info()
+        print(f"🧩 Shared draw plans: {layers.misses} built, {layers.hits} reused; "
+              f"shadow sprites: {sprites.misses} built, {sprites.hits} reused")
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render icon variants from a variants file")
+    parser.add_argument('variants', help="variants file (.json, or .yaml/.yml with PyYAML)")
+    parser.add_argument('--only', action='append', metavar='NAME',
+                        help="render only this variant (repeatable)")
+    parser.add_argument('--catalog', default=ASSET_CATALOG,
+                        help=f"asset catalog to write the .appiconset folders into (default: {ASSET_CATALOG})")
+    parser.add_argument('--supersample', type=int,
+                        help="supersampling factor (default: 4 with the pillow backend, 1 with sdf)")
+    parser.add_argument('--backend', choices=BACKENDS, default='pillow',
+                        help="rasterizer: pillow or sdf (default: pillow)")
+    parser.add_argument('--png-preset', choices=PRESETS, default=DEFAULT_PRESET,
+                        help="PNG encoder preset: fast, balanced or smallest (default: balanced)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild every output even if the build cache says it is up to date")
+    args = parser.parse_args()
+
+    variants = load_variants(args.variants)
+    if args.only:
+        unknown = set(args.only) - {variant['name'] for variant in variants}
+        if unknown:
+            parser.error(f"unknown variant(s): {', '.join(sorted(unknown))}")
+        variants = [variant for variant in variants if variant['name'] in args.only]
+    if args.supersample is None:
+        args.supersample = 1 if args.backend == 'sdf' else 4
+
+    print(f"🎨 Rendering {len(variants)} icon variant{'s' if len(variants) != 1 else ''} "
+          f"× {len(catalog_targets(APPICON_DIR))} sizes")
+    render_variants(variants, args.catalog, args.supersample, args.backend, args.png_preset, args.force)
+    print()
+    for variant in variants:
+        print(f"   {variant['name']:<12} → {appiconset_dir(variant, args.catalog)}/")
+    print()
+    print("Alternate icons also need CFBundleAlternateIcons in Info.plist (or the")
+    print("'Include all app icon assets' build setting) before setAlternateIconName can use them.")
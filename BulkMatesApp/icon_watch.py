@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+BulkMates Icon Watch Mode
+Re-renders every icon size whenever a design parameters file changes
+
+The parameters file is JSON holding ICON_DESIGN entries to override (plus
+`person_colors`, as in icon_variants.json); it is created with the current
+design on first use. The watcher is the warm worker: PIL, NumPy and the
+render caches stay loaded between changes, so only the stages a change
+affects are redone. A color edit reuses the compiled draw plan (the shape
+masks), the shadow sprites and the gradient masks; a geometry edit
+recompiles the plan but keeps the gradients, and sprites whose blur and
+radius did not change.
+
+Every size of the AppIcon set is written to icon-preview/ with the fast PNG
+preset, next to an index.html contact sheet that reloads itself.
+
+Usage:
+    python3 icon_watch.py icon_design.json
+    python3 create_icon_improved.py --watch --supersample 4
+"""
+
+import argparse
+import html
+import json
+import os
+import time
+
+from create_icon_improved import ICON_DESIGN, create_bulkmates_icon_improved, design_geometry
+from icon_catalog import APPICON_DIR, catalog_targets
+from icon_gradient import cached_gradient_mask
+from icon_resize import save_png_atomic, write_atomic
+from icon_scene import scene_plan
+from icon_sdf import BACKENDS
+from icon_shadow import shadow_sprite
+from icon_variants import variant_design
+
+DEFAULT_PARAMS = 'icon_design.json'
+PREVIEW_DIR = 'icon-preview'
+
+# Seconds between checks of the parameters file
+POLL_INTERVAL = 0.1
+
+def write_default_params(path):
+    """Start a parameters file from the current ICON_DESIGN"""
+    document = dict(ICON_DESIGN)
+    document['person_data'] = [list(person) for person in ICON_DESIGN['person_data']]
+    write_atomic((json.dumps(document, indent=2) + '\n').encode(), path)
+
+def load_design(path):
+    """Read a parameters file and apply it to ICON_DESIGN"""
+    with open(path) as f:
+        params = json.load(f)
+    params.pop('name', None)
+    design = variant_design(dict(params, name=path))
+    design['person_data'] = [tuple(person) for person in design['person_data']]
+    return design
+
+def changed_keys(old, new):
+    """Names of the design entries that differ between two designs"""
+    if old is None:
+        return sorted(new)
+    return sorted(key for key in new if old.get(key) != new[key])
+
+def preview_sizes(catalog=APPICON_DIR):
+    """(size, file names) of every distinct pixel size of the AppIcon set, largest first"""
+    sizes = {}
+    for path, size in catalog_targets(catalog):
+        sizes.setdefault(size, []).append(os.path.basename(path))
+    return sorted(sizes.items(), reverse=True)
+
+def render_previews(design, sizes, supersample, backend, preview_dir=PREVIEW_DIR):
+    """Render and write every size with the fast PNG preset; returns the paths"""
+    paths = []
+    for size, _ in sizes:
+        icon = create_bulkmates_icon_improved(size, supersample, backend=backend, design=design)
+        path = os.path.join(preview_dir, f'{size}.png')
+        save_png_atomic(icon, path, 'fast')
+        paths.append(path)
+    return paths
+
+def write_contact_sheet(sizes, version, summary, preview_dir=PREVIEW_DIR):
+    """Write index.html showing every size at 1x, reloading itself every second"""
+    cells = []
+    for size, names in sizes:
+        cells.append(
+            f'<figure><img src="{size}.png?v={version}" width="{size}" height="{size}">'
+            f'<figcaption>{size}px<br>{html.escape(", ".join(names))}</figcaption></figure>')
+    page = f'''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta http-equiv="refresh" content="1">
+<title>BulkMates icon preview</title>
+<style>
+body {{ font-family: -apple-system, sans-serif; background: #f2f2f7; margin: 24px; }}
+main {{ display: flex; flex-wrap: wrap; align-items: flex-end; gap: 24px; }}
+figure {{ margin: 0; text-align: center; font-size: 12px; color: #3c3c43; }}
+img {{ display: block; border-radius: 22.37%; box-shadow: 0 1px 4px rgba(0, 0, 0, 0.2); }}
+</style>
+</head>
+<body>
+<p>{html.escape(summary)}</p>
+<main>
+{chr(10).join(cells)}
+</main>
+</body>
+</html>
+'''
+    write_atomic(page.encode(), os.path.join(preview_dir, 'index.html'))
+
+def _cache_counts():
+    return [cache.cache_info() for cache in (scene_plan, shadow_sprite, cached_gradient_mask)]
+
+def watch(params_path=DEFAULT_PARAMS, supersample=None, backend='pillow', preview_dir=PREVIEW_DIR):
+    """Render the previews, then again every time the parameters file changes"""
+    supersample = supersample or (1 if backend == 'sdf' else 4)
+    if not os.path.exists(params_path):
+        write_default_params(params_path)
+        print(f"📝 Created {params_path} from the current design")
+    os.makedirs(preview_dir, exist_ok=True)
+    sizes = preview_sizes()
+    print(f"👀 Watching {params_path}; contact sheet: "
+          f"file://{os.path.abspath(os.path.join(preview_dir, 'index.html'))}")
+
+    design = None
+    last_mtime = None
+    version = 0
+    while True:
+        try:
+            mtime = os.stat(params_path).st_mtime_ns
+        except OSError:
+            # Editors that save by deleting and rewriting leave the file
+            # missing for a moment; try again on the next poll
+            mtime = last_mtime
+        if mtime != last_mtime:
+            last_mtime = mtime
+            try:
+                new_design = load_design(params_path)
+            except OSError:
+                last_mtime, new_design = None, None
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"❌ {params_path}: {e}")
+                new_design = None
+            changes = changed_keys(design, new_design) if new_design is not None else []
+            if changes:
+                before = _cache_counts()
+                start = time.perf_counter()
+                try:
+                    render_previews(new_design, sizes, supersample, backend, preview_dir)
+                except Exception as e:
+                    print(f"❌ Render failed: {e}")
+                else:
+                    elapsed = time.perf_counter() - start
+                    if design is None:
+                        kind = 'first render'
+                    elif design_geometry(design) == design_geometry(new_design):
+                        kind = 'colors only'
+                    else:
+                        kind = 'geometry'
+                    design = new_design
+                    version += 1
+                    reused = [after.hits - earlier.hits for earlier, after in zip(before, _cache_counts())]
+                    summary = f"Render {version}: {len(sizes)} sizes in {elapsed * 1000:.0f}ms"
+                    if kind != 'first render':
+                        summary += (f" after changing {', '.join(changes[:4])}"
+                                    f"{'…' if len(changes) > 4 else ''}")
+                    write_contact_sheet(sizes, version, summary, preview_dir)
+                    print(f"🔄 {summary} ({kind}; reused {reused[0]} draw plans, "
+                          f"{reused[1]} shadow sprites, {reused[2]} gradient masks)")
+        time.sleep(POLL_INTERVAL)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Re-render every icon size when the design changes")
+    parser.add_argument('params', nargs='?', default=DEFAULT_PARAMS,
+                        help=f"design parameters file (default: {DEFAULT_PARAMS}, created if missing)")
+    parser.add_argument('--supersample', type=int,
+                        help="supersampling factor (default: 4 with the pillow backend, 1 with sdf)")
+    parser.add_argument('--backend', choices=BACKENDS, default='pillow',
+                        help="rasterizer: pillow or sdf (default: pillow)")
+    parser.add_argument('--preview-dir', default=PREVIEW_DIR,
+                        help=f"folder for the previews and contact sheet (default: {PREVIEW_DIR})")
+    args = parser.parse_args()
+
+    try:
+        watch(args.params, args.supersample, args.backend, args.preview_dir)
+    except KeyboardInterrupt:
+        print()
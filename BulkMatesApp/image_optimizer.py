@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+BulkMates Image Optimizer
+Re-encodes store and docs images to meet an SSIM target or a byte budget
+
+JPEGs get a binary search over the quality setting: the lowest quality whose
+SSIM against the original meets the target, or, with a byte budget, the
+highest quality that fits it (both at once: the SSIM pick, lowered further
+if it is still over budget). PNGs try palette quantization at decreasing
+color counts next to a lossless re-encode, and keep the smallest candidate
+that meets the target. SSIM is the lowest over the color channels (and
+alpha), so chroma subsampling, palette banding and damaged edges count
+against the target, not just luminance. Every encode is free of metadata
+(EXIF orientation is applied to the pixels first), and a file is only
+replaced when the result is smaller.
+
+Images are processed in a process pool, one image per task. A JSON report
+with the bytes saved and the encode time per image is written next to the
+table printed at the end.
+
+Usage:
+    python3 image_optimizer.py ../images/final
+    python3 image_optimizer.py ../images/final --max-bytes 60000 --output optimized
+"""
+
+from PIL import Image, ImageOps
+from collections import namedtuple
+import argparse
+import io
+import json
+import os
+import time
+
+from icon_encoder import encode_png
+from icon_resize import channel_ssim, run_parallel, write_atomic
+
+DEFAULT_TARGET_SSIM = 0.99
+DEFAULT_REPORT = 'image-optimization-report.json'
+
+# JPEG quality search range
+MIN_QUALITY = 50
+MAX_QUALITY = 95
+
+# Palette sizes tried for PNGs, largest first
+PNG_COLORS = (256, 128, 64, 32)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# setting: the winning encoder setting; ssim: of the written file against the
+# original pixels; encodes: candidates tried; written: False when the
+# original was kept because nothing smaller met the target
+OptimizeResult = namedtuple('OptimizeResult', ['path', 'output', 'setting', 'before', 'after',
+                                               'ssim', 'encode_seconds', 'encodes', 'written'])
+
+def find_images(paths):
+    """Expand files and folders into the image files they contain, sorted"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found += [os.path.join(path, name) for name in sorted(os.listdir(path))
+                      if name.lower().endswith(IMAGE_EXTENSIONS)]
+        else:
+            found.append(path)
+    return found
+
+def encode_jpeg(img, quality):
+    """Progressive JPEG at a quality setting, without metadata"""
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+def _decoded(data):
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    return img
+
+def search_jpeg(img, target_ssim=None, max_bytes=None):
+    """
+    Binary-search the JPEG quality; returns (data, quality, ssim, encodes)
+
+    The lowest quality meeting `target_ssim` is found first (MAX_QUALITY if
+    none does); with `max_bytes` the highest quality at or below it that fits
+    the budget is used instead when that one is too large.
+    """
+    encodes = 0
+    cache = {}
+
+    def encoded(quality):
+        nonlocal encodes
+        if quality not in cache:
+            encodes += 1
+            data = encode_jpeg(img, quality)
+            cache[quality] = (data, channel_ssim(img, _decoded(data)))
+        return cache[quality]
+
+    quality = MAX_QUALITY
+    if target_ssim is not None:
+        low, high = MIN_QUALITY, MAX_QUALITY
+        while low < high:
+            middle = (low + high) // 2
+            if encoded(middle)[1] >= target_ssim:
+                high = middle
+            else:
+                low = middle + 1
+        quality = low
+
+    if max_bytes is not None and len(encoded(quality)[0]) > max_bytes:
+        low, high = MIN_QUALITY, quality
+        while low < high:
+            middle = (low + high + 1) // 2
+            if len(encoded(middle)[0]) <= max_bytes:
+                low = middle
+            else:
+                high = middle - 1
+        quality = low
+
+    data, similarity = encoded(quality)
+    return data, quality, similarity, encodes
+
+def search_png(img, target_ssim=None, max_bytes=None):
+    """
+    Try a lossless re-encode and palette quantizations; returns (data, setting, ssim, encodes)
+
+    The smallest candidate meeting `target_ssim` wins; quantization stops at
+    the first color count that misses it. With a byte budget and no
+    candidate under it, the smallest candidate is returned.
+    """
+    lossless, _ = encode_png(img, 'smallest')
+    candidates = [(lossless, 'lossless', 1.0)]
+    encodes = 1
+    method = Image.Quantize.FASTOCTREE if 'A' in img.getbands() else Image.Quantize.MEDIANCUT
+    for colors in PNG_COLORS:
+        paletted = img.quantize(colors, method=method)
+        data, _ = encode_png(paletted, 'balanced')
+        encodes += 1
+        similarity = channel_ssim(img, _decoded(data).convert(img.mode))
+        if target_ssim is not None and similarity < target_ssim:
+            break
+        candidates.append((data, f'{colors} colors', similarity))
+
+    if max_bytes is not None:
+        fitting = [candidate for candidate in candidates if len(candidate[0]) <= max_bytes]
+        candidates = fitting or candidates
+    data, setting, similarity = min(candidates, key=lambda candidate: len(candidate[0]))
+    return data, setting, similarity, encodes
+
+def optimize_image(path, output, target_ssim=DEFAULT_TARGET_SSIM, max_bytes=None):
+    """Optimize one image into `output` (which may be `path` itself); returns an OptimizeResult"""
+    before = os.path.getsize(path)
+    source = Image.open(path)
+    is_jpeg = source.format == 'JPEG'
+    # Metadata is not carried over, so bake the EXIF orientation into the pixels
+    img = ImageOps.exif_transpose(source)
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'transparency' in img.info or 'A' in img.getbands() else 'RGB')
+    if is_jpeg and img.mode == 'RGBA':
+        img = img.convert('RGB')
+
+    start = time.perf_counter()
+    if is_jpeg:
+        data, quality, similarity, encodes = search_jpeg(img, target_ssim, max_bytes)
+        setting = f'quality {quality}'
+    else:
+        data, setting, similarity, encodes = search_png(img, target_ssim, max_bytes)
+    encode_seconds = time.perf_counter() - start
+
+    improved = len(data) < before
+    if improved:
+        write_atomic(data, output)
+    else:
+        setting, similarity = 'original', 1.0
+        if output != path:
+            # Copy the original so the output folder is complete
+            with open(path, 'rb') as f:
+                write_atomic(f.read(), output)
+    return OptimizeResult(path, output, setting, before, len(data) if improved else before,
+                          similarity, encode_seconds, encodes, improved)
+
+def optimize_all(paths, output_dir=None, target_ssim=DEFAULT_TARGET_SSIM, max_bytes=None,
+                 max_workers=None):
+    """Optimize every image across worker processes; returns (results, workers)"""
+    jobs = []
+    for path in paths:
+        output = os.path.join(output_dir, os.path.basename(path)) if output_dir else path
+        jobs.append((path, output, target_ssim, max_bytes))
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    return run_parallel(optimize_image, jobs, max_workers)
+
+def write_report(results, elapsed, workers, path=DEFAULT_REPORT):
+    """Write the per-image savings and encode times as JSON"""
+    before = sum(result.before for result in results)
+    after = sum(result.after for result in results)
+    report = {
+        'images': [result._asdict() for result in results],
+        'total_before': before,
+        'total_after': after,
+        'saved_percent': round(100 * (before - after) / before, 1) if before else 0.0,
+        'encode_seconds': round(sum(result.encode_seconds for result in results), 3),
+        'elapsed_seconds': round(elapsed, 3),
+        'workers': workers,
+    }
+    write_atomic((json.dumps(report, indent=2) + '\n').encode(), path)
+
+def print_report(results, elapsed, workers):
+    before = sum(result.before for result in results)
+    after = sum(result.after for result in results)
+    print(f"✅ Optimized {len(results)} images in {elapsed:.2f}s using {workers} "
+          f"worker{'s' if workers != 1 else ''}: {before / 1024:.1f} KB → {after / 1024:.1f} KB "
+          f"({100 * (before - after) / max(before, 1):.1f}% saved)")
+    for result in results:
+        print(f"   {os.path.basename(result.path):<28} {result.before:>9,} → {result.after:>9,} bytes  "
+              f"{result.setting:<12} SSIM {result.ssim:.4f}  {result.encodes:>2} encodes "
+              f"{result.encode_seconds * 1000:7.1f}ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Re-encode images to an SSIM target or byte budget")
+    parser.add_argument('paths', nargs='+', help="images or folders of images (.jpg, .jpeg, .png)")
+    parser.add_argument('--target-ssim', type=float, default=DEFAULT_TARGET_SSIM,
+                        help=f"lowest SSIM against the original (default: {DEFAULT_TARGET_SSIM})")
+    parser.add_argument('--max-bytes', type=int, help="byte budget per image")
+    parser.add_argument('--output', metavar='DIR',
+                        help="write the optimized images here instead of replacing the originals")
+    parser.add_argument('--report', default=DEFAULT_REPORT,
+                        help=f"JSON report of the savings (default: {DEFAULT_REPORT})")
+    parser.add_argument('--workers', type=int, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    paths = find_images(args.paths)
+    if not paths:
+        parser.error("no .jpg, .jpeg or .png images found")
+    goal = f"SSIM ≥ {args.target_ssim}" + (f", ≤ {args.max_bytes:,} bytes" if args.max_bytes else '')
+    print(f"🗜️  Optimizing {len(paths)} images ({goal})")
+    start = time.perf_counter()
+    results, workers = optimize_all(paths, args.output, args.target_ssim, args.max_bytes, args.workers)
+    elapsed = time.perf_counter() - start
+    print_report(results, elapsed, workers)
+    write_report(results, elapsed, workers, args.report)
+    print(f"📝 Report: {args.report}")
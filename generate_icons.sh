@@ -30,36 +30,16 @@ echo "🎨 Generating iOS app icons from: $SOURCE_IMAGE"
 echo "📁 Output directory: $ICON_DIR"
 echo ""
 
-# Function to generate icon
-generate_icon() {
-    local size=$1
-    local filename=$2
-    echo "📱 Generating ${size}x${size} → $filename"
-    sips -z $size $size "$SOURCE_IMAGE" --out "$ICON_DIR/$filename" > /dev/null 2>&1
-    if [ $? -eq 0 ]; then
-        echo "   ✅ Created: $filename"
-    else
-        echo "   ❌ Failed to create: $filename"
-    fi
-}
-
-# Generate all required icon sizes
+# Generate every slot listed in the icon set's Contents.json
+# (sizes are read by BulkMatesApp/icon_catalog.py, so there is no table to keep in sync)
 echo "🔄 Starting icon generation..."
 echo ""
 
-# iPhone icons (60pt)
-generate_icon 120 "app-icon-60@2x.png"    # 60pt @2x = 120x120 (iPhone iOS 10+)
-generate_icon 180 "app-icon-60@3x.png"    # 60pt @3x = 180x180 (iPhone iOS 10+)
-
-# iPad icons (76pt)
-generate_icon 76 "app-icon-76.png"        # 76pt @1x = 76x76 (iPad iOS 10+)
-generate_icon 152 "app-icon-76@2x.png"    # 76pt @2x = 152x152 (iPad iOS 10+)
-
-# iPad Pro icon (83.5pt)
-generate_icon 167 "app-icon-83.5@2x.png"  # 83.5pt @2x = 167x167 (iPad Pro)
-
-# App Store icon
-generate_icon 1024 "app-icon-1024.png"    # 1024x1024 (App Store)
+SOURCE_PATH="$(cd "$(dirname "$SOURCE_IMAGE")" && pwd)/$(basename "$SOURCE_IMAGE")"
+if ! (cd BulkMatesApp && python3 generate_all_icons.py --source "$SOURCE_PATH"); then
+    echo "   ❌ Icon generation failed"
+    exit 1
+fi
 
 echo ""
 echo "🎉 Icon generation complete!"